@@ -3,14 +3,76 @@ ASGI config for _komercio project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests are routed through ``_komercio.urls_async``, which answers the
+product and account read endpoints with native async views and everything
+else with the regular (sync) views.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 """
 
 import os
+from itertools import islice
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "_komercio.settings")
 
-application = get_asgi_application()
+
+class AsyncReadsASGIHandler(ASGIHandler):
+    urlconf = "_komercio.urls_async"
+
+    # Parts of a streaming response pulled per trip to the sync thread.
+    stream_batch_size = 100
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+
+        if request is not None:
+            request.urlconf = self.urlconf
+
+        return request, error_response
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        # Django 4.1 iterates streaming responses on the event loop, where
+        # the database can not be used (e.g. the cursor of the product
+        # export), so the parts are pulled on the thread of the sync view.
+        headers = [
+            (str(header).encode("ascii"), str(value).encode("latin1"))
+            for header, value in response.items()
+        ]
+        headers += [
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            for cookie in response.cookies.values()
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": headers,
+            }
+        )
+
+        parts = iter(response)
+        next_batch = sync_to_async(
+            lambda: list(islice(parts, self.stream_batch_size)),
+            thread_sensitive=True,
+        )
+
+        while batch := await next_batch():
+            for chunk, _ in self.chunk_bytes(b"".join(batch)):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+django.setup(set_prefix=False)
+application = AsyncReadsASGIHandler()
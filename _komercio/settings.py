@@ -15,6 +15,7 @@ from pathlib import Path
 import dj_database_url
 
 import os
+import tempfile
 import dotenv
 
 dotenv.load_dotenv()
@@ -52,13 +53,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Only loaded with TRAFFIC_CAPTURE_FILE set.
+    "utils.capture.TrafficCaptureMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "utils.replicas.PrimaryStickinessMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Innermost, so that it only times the view side of the request.
+    "utils.timing.ServerTimingMiddleware",
 ]
 
 ROOT_URLCONF = "_komercio.urls"
@@ -85,14 +91,35 @@ WSGI_APPLICATION = "_komercio.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# Connections are taken from a per-process pool (see utils.db.pool) and
+# handed back at the end of each request, so threads and requests share
+# them. With a DATABASE_POOL_MAX_SIZE of 0, DATABASE_CONN_MAX_AGE keeps a
+# connection per thread across requests instead.
+DATABASE_CONN_MAX_AGE = int(os.getenv("DATABASE_CONN_MAX_AGE", 0))
+
+DATABASE_POOL = {
+    "MAX_SIZE": int(os.getenv("DATABASE_POOL_MAX_SIZE", 10)),
+    "TIMEOUT": float(os.getenv("DATABASE_POOL_TIMEOUT", 5)),
+    "MAX_AGE": float(os.getenv("DATABASE_POOL_MAX_AGE", 600)),
+    "CHECK_IDLE": float(os.getenv("DATABASE_POOL_CHECK_IDLE", 1)),
+}
+
+POOLED_ENGINES = {
+    "django.db.backends.postgresql": "utils.db.postgresql",
+    "django.db.backends.sqlite3": "utils.db.sqlite3",
+}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "utils.db.postgresql",
         "NAME": os.getenv("POSTGRES_DB_NAME"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": "127.0.0.1",
         "PORT": "5432",
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": DATABASE_POOL,
     },
     "another": {
         "ENGINE": "django.db.backends.sqlite3",
@@ -103,10 +130,105 @@ DATABASES = {
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if DATABASE_URL:
-    db = dj_database_url.config(default=DATABASE_URL)
+    db = dj_database_url.config(
+        default=DATABASE_URL, conn_max_age=DATABASE_CONN_MAX_AGE
+    )
+    db["ENGINE"] = POOLED_ENGINES.get(db["ENGINE"], db["ENGINE"])
     DATABASES["default"].update(db)
     DEBUG = False
 
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+if DATABASE_REPLICA_URL:
+    db = dj_database_url.config(
+        default=DATABASE_REPLICA_URL, conn_max_age=DATABASE_CONN_MAX_AGE
+    )
+    db["ENGINE"] = POOLED_ENGINES.get(db["ENGINE"], db["ENGINE"])
+    DATABASES["another"].update(db, CONN_HEALTH_CHECKS=True, POOL=DATABASE_POOL)
+
+# Aliases of read replicas of "default" (e.g. "another"), which serve the
+# reads of requests not pinned to the primary, see utils.replicas.
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv("DATABASE_REPLICAS", "").split(",") if alias
+]
+
+# How long a client reads from the primary after a write, to read it back
+# whatever the replication lag.
+DATABASE_PRIMARY_STICKY_SECONDS = int(os.getenv("DATABASE_PRIMARY_STICKY_SECONDS", 10))
+
+# Aliases of the databases the products are sharded across by seller (e.g.
+# "default,shard1"), see products.sharding. Empty keeps them on "default".
+PRODUCT_SHARDS = [
+    alias for alias in os.getenv("PRODUCT_SHARDS", "").split(",") if alias
+]
+
+# A page at offset N reads N rows of every shard to merge them, so with
+# shards the page number listings stop at this offset; deeper pages are for
+# ?pagination=cursor, which costs the same at any depth.
+PRODUCT_SHARDS_MAX_OFFSET = int(os.getenv("PRODUCT_SHARDS_MAX_OFFSET", 1000))
+
+# More databases, e.g. the shards: DATABASE_SHARD_URLS="shard1=postgres://..."
+DATABASE_SHARD_URLS = os.getenv("DATABASE_SHARD_URLS")
+
+if DATABASE_SHARD_URLS:
+    for item in DATABASE_SHARD_URLS.split(","):
+        alias, url = item.split("=", 1)
+        db = dj_database_url.parse(url, conn_max_age=DATABASE_CONN_MAX_AGE)
+        db["ENGINE"] = POOLED_ENGINES.get(db["ENGINE"], db["ENGINE"])
+        DATABASES[alias.strip()] = {
+            **db,
+            "CONN_HEALTH_CHECKS": True,
+            "POOL": DATABASE_POOL,
+        }
+
+DATABASE_ROUTERS = [
+    "products.sharding.ProductShardRouter",
+    "utils.replicas.PrimaryReplicaRouter",
+]
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Product listing responses. Files are shared by the workers of one
+    # host; use django.core.cache.backends.redis.RedisCache (any
+    # Redis-compatible server) across hosts. The listing is not cached with
+    # a local memory backend, whose invalidations would only reach the
+    # worker that made them.
+    "products": {
+        "BACKEND": os.getenv(
+            "PRODUCTS_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv(
+            "PRODUCTS_CACHE_LOCATION",
+            os.path.join(tempfile.gettempdir(), "komercio-products"),
+        ),
+        "TIMEOUT": int(os.getenv("PRODUCTS_CACHE_TIMEOUT", 300)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("PRODUCTS_CACHE_MAX_ENTRIES", 1000)),
+        },
+    },
+    # Token -> user lookups of users.authentication. Use a shared backend
+    # (e.g. django.core.cache.backends.redis.RedisCache): with local memory
+    # revocations only reach the worker that made them, so the lookups are
+    # kept for AUTH_TOKEN_LOCAL_TIMEOUT seconds only.
+    "auth": {
+        "BACKEND": os.getenv(
+            "AUTH_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("AUTH_CACHE_LOCATION", "auth"),
+        "TIMEOUT": int(os.getenv("AUTH_CACHE_TIMEOUT", 60)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -151,15 +273,106 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "users.User"
 
+AUTHENTICATION_BACKENDS = ["users.backends.HashingPoolModelBackend"]
+
+# Django's defaults, with PBKDF2 run PASSWORD_HASHER_ITERATIONS times.
+PASSWORD_HASHERS = [
+    "users.hashing.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 2,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "utils.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "utils.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "utils.parsers.ORJSONParser",
+        "utils.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# Serve read endpoints from values() rows through utils.serializers
+# instead of building model instances for the DRF serializers.
+FAST_SERIALIZERS = os.getenv("FAST_SERIALIZERS", "false").lower() == "true"
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Komercio API",
     "DESCRIPTION": "Web site sales API",
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
 }
+
+
+# Metrics
+
+# Directory where each process dumps its request metrics for /metrics to
+# add up, see utils.metrics. Unset, /metrics only reports its own process.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1))
+
+# Who may scrape /metrics: these client addresses (REMOTE_ADDR, so the
+# proxy's behind one), and requests with "Authorization: Bearer
+# <METRICS_TOKEN>". Unset, only the addresses.
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+# Traffic capture
+
+# File that utils.capture appends the (sampled) requests to, for
+# benchmarks.replay to play back. Unset, nothing is captured.
+TRAFFIC_CAPTURE_FILE = os.getenv("TRAFFIC_CAPTURE_FILE")
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", 1))
+
+
+# Users
+
+AUTH_TOKEN_CACHE = "auth"
+# How long a worker keeps the token lookups it made when AUTH_TOKEN_CACHE is
+# process-local, and so may let a token revoked by another worker in.
+AUTH_TOKEN_LOCAL_TIMEOUT = int(os.getenv("AUTH_TOKEN_LOCAL_TIMEOUT", 5))
+
+# Passwords are checked (and rehashed) with this many PBKDF2 iterations.
+PASSWORD_HASHER_ITERATIONS = int(os.getenv("PASSWORD_HASHER_ITERATIONS", 390000))
+
+# Processes hashing passwords for each server process, see users.hashing,
+# and how many hashes may wait or run before logins get a 503. With no
+# workers, passwords are hashed in the request worker.
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", 2))
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv("PASSWORD_HASHING_MAX_PENDING", 32))
+
+# /api/accounts/newest/<num>/ lists at most this many accounts, all served
+# from the in-memory index of users.newest, which finds the writes of
+# other processes through this cache. With the default locmem backend of
+# "auth" the index is bypassed, and each listing is one indexed query.
+ACCOUNTS_NEWEST_MAX = int(os.getenv("ACCOUNTS_NEWEST_MAX", 100))
+ACCOUNTS_NEWEST_CACHE = "auth"
+
+
+# Products
+
+PRODUCTS_BULK_CREATE_BATCH_SIZE = int(
+    os.getenv("PRODUCTS_BULK_CREATE_BATCH_SIZE", 1000)
+)
+PRODUCTS_BULK_UPDATE_BATCH_SIZE = int(
+    os.getenv("PRODUCTS_BULK_UPDATE_BATCH_SIZE", 1000)
+)
+
+# One of "conditional", "select_for_update" or "nowait", see
+# products.services.reserve_stock.
+PRODUCTS_STOCK_LOCK_MODE = os.getenv("PRODUCTS_STOCK_LOCK_MODE", "conditional")
+
+PRODUCTS_EXPORT_CHUNK_SIZE = int(os.getenv("PRODUCTS_EXPORT_CHUNK_SIZE", 2000))
+PRODUCTS_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCTS_IMPORT_CHUNK_SIZE", 5000))
+
+PRODUCTS_LISTING_CACHE = "products"
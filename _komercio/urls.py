@@ -20,10 +20,13 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from utils.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("users.urls")),
     path("api/", include("products.urls")),
     path("schema", SpectacularAPIView.as_view(), name="schema"),
     path("api/swagger-doc/", SpectacularSwaggerView.as_view(url_name="schema")),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,47 @@
+"""URL configuration of the ASGI entry point (see `_komercio.asgi`).
+
+The read endpoints, registration and login are answered by native async
+views first; everything else, including the requests those views hand
+back, is served by the regular `_komercio.urls`.
+"""
+from django.urls import path
+from rest_framework.authtoken.views import ObtainAuthToken
+
+from _komercio.urls import urlpatterns as sync_urlpatterns
+from products import views as product_views
+from products.async_views import AsyncListProductView, AsyncRetrieveProductView
+from users import views as user_views
+from users.async_views import (
+    AsyncListAccountByDateView,
+    AsyncListAccountView,
+    AsyncLoginView,
+)
+
+urlpatterns = [
+    path(
+        "api/accounts/",
+        AsyncListAccountView.as_view(
+            sync_view=user_views.ListCreateAccountView.as_view()
+        ),
+    ),
+    path(
+        "api/accounts/newest/<int:num>/",
+        AsyncListAccountByDateView.as_view(
+            sync_view=user_views.ListAccountByDateView.as_view()
+        ),
+    ),
+    path("api/login/", AsyncLoginView.as_view(sync_view=ObtainAuthToken.as_view())),
+    path(
+        "api/products/",
+        AsyncListProductView.as_view(
+            sync_view=product_views.ListCreateProductView.as_view()
+        ),
+    ),
+    path(
+        "api/products/<uuid:pk>/",
+        AsyncRetrieveProductView.as_view(
+            sync_view=product_views.RetrieveUpdateProductView.as_view()
+        ),
+    ),
+    *sync_urlpatterns,
+]
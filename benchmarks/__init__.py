@@ -0,0 +1,85 @@
+"""Standalone performance benchmarks.
+
+Each module runs against a throwaway test database built from the project
+settings, e.g. ``python -m benchmarks.product_filters --products 200000``.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "_komercio.settings")
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Creates (and afterwards destroys) a migrated test database."""
+
+    setup_django()
+
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, serialize=False)
+
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def best_of(func, repeat=5):
+    """Returns the fastest of `repeat` runs of `func`, in seconds."""
+
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def seed_products(products, sellers=100, batch_size=5000, seed=0):
+    """Bulk inserts `sellers` sellers and `products` products spread over them."""
+
+    import random
+    from decimal import Decimal
+
+    from django.contrib.auth.hashers import make_password
+
+    from products.models import Product
+    from users.models import User
+
+    rng = random.Random(seed)
+    password = make_password(None)
+
+    seller_accounts = User.objects.bulk_create(
+        [
+            User(username=f"seller{index}", password=password, is_seller=True)
+            for index in range(sellers)
+        ],
+        batch_size=batch_size,
+    )
+
+    for start in range(0, products, batch_size):
+        Product.objects.bulk_create(
+            [
+                Product(
+                    description=f"produto {index}",
+                    price=Decimal(rng.randint(100, 500000)) / 100,
+                    quantity=rng.choice([0, rng.randint(1, 500)]),
+                    is_active=rng.random() < 0.8,
+                    seller=rng.choice(seller_accounts),
+                )
+                for index in range(start, min(start + batch_size, products))
+            ]
+        )
+
+    return seller_accounts
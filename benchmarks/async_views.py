@@ -0,0 +1,151 @@
+"""Compares requests/sec of the read endpoints under WSGI and ASGI.
+
+    python -m benchmarks.async_views --concurrency 500 --requests 5000
+
+The handlers are driven in process, without a server in front:
+
+- "wsgi" calls the WSGI handler from `--concurrency` threads.
+- "asgi sync views" runs Django's ASGI handler with the regular urlconf,
+  so every request hops to a thread for the sync DRF view.
+- "asgi async views" runs `_komercio.asgi.application`, which answers the
+  read endpoints with the native async views.
+
+Both ASGI runs keep `--concurrency` requests in flight on one event loop.
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import benchmark_database, seed_products
+
+
+def wsgi_environ(path):
+    path, _, query_string = path.partition("?")
+
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query_string,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.url_scheme": "http",
+    }
+
+
+def asgi_scope(path):
+    path, _, query_string = path.partition("?")
+
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "query_string": query_string.encode(),
+        "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 0),
+    }
+
+
+def run_wsgi(application, paths, requests, concurrency):
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    def request(path):
+        response = application(wsgi_environ(path), start_response)
+        b"".join(response)
+        response.close()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(request, itertools.islice(itertools.cycle(paths), requests)))
+        elapsed = time.perf_counter() - start
+
+    assert all(status.startswith("200") for status in statuses), set(statuses)
+
+    return elapsed
+
+
+def run_asgi(application, paths, requests, concurrency):
+    statuses = []
+
+    async def request(path):
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await application(asgi_scope(path), receive, send)
+
+    async def client(queue):
+        while queue:
+            await request(queue.pop())
+
+    async def main():
+        queue = list(itertools.islice(itertools.cycle(paths), requests))
+        start = time.perf_counter()
+        await asyncio.gather(*(client(queue) for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+
+    assert all(status == 200 for status in statuses), set(statuses)
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=2000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        from django.core.handlers.asgi import ASGIHandler
+        from django.core.handlers.wsgi import WSGIHandler
+
+        from _komercio.asgi import application as async_application
+        from products.models import Product
+
+        seed_products(args.products, sellers=50)
+        product_ids = Product.objects.values_list("id", flat=True)[:20]
+
+        paths = [
+            "/api/products/",
+            "/api/products/?page=3",
+            "/api/accounts/",
+            "/api/accounts/newest/10/",
+            *(f"/api/products/{product_id}/" for product_id in product_ids),
+        ]
+
+        runs = {
+            "wsgi": (run_wsgi, WSGIHandler()),
+            "asgi sync views": (run_asgi, ASGIHandler()),
+            "asgi async views": (run_asgi, async_application),
+        }
+
+        print(f"{args.requests} requests, {args.concurrency} concurrent clients")
+        print(f"{'handler':<20}{'seconds':>10}{'requests/s':>12}")
+
+        for name, (run, application) in runs.items():
+            run(application, paths, args.concurrency, args.concurrency)
+            elapsed = run(application, paths, args.requests, args.concurrency)
+
+            print(f"{name:<20}{elapsed:>10.2f}{args.requests / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compares requests/sec with new, persistent and pooled database connections.
+
+    python -m benchmarks.database_pool --threads 8 --requests 5000
+
+Runs against the database of the settings (PostgreSQL with DATABASE_URL
+pointing at it). The WSGI handler is called from `--threads` threads, on
+product detail requests, which run one query each:
+
+- "new": a connection per request (`CONN_MAX_AGE` 0, no pool).
+- "persistent": a connection per thread (`CONN_MAX_AGE` 60, no pool).
+- "pooled": connections of `utils.db.pool`, handed back after every
+  request, with a pool of `--pool-size`.
+
+On SQLite, which has no handshake, `--connect-latency` stands in for the
+TCP and authentication round trips of a server connection by delaying
+every new connection that many milliseconds.
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks import benchmark_database, seed_products, setup_django
+from benchmarks.async_views import run_wsgi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--connect-latency", type=float, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+
+    if connection.vendor == "sqlite":
+        # Connections to in-memory databases are never closed, so never
+        # pooled either.
+        directory = tempfile.TemporaryDirectory()
+        connection.settings_dict["TEST"]["NAME"] = f"{directory.name}/db.sqlite3"
+
+    with benchmark_database():
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.db import connections
+
+        from products.models import Product
+        from utils.db.pool import PooledDatabaseWrapperMixin, clear_pools
+
+        seed_products(200, sellers=10)
+        product_ids = Product.objects.values_list("id", flat=True)[:50]
+        paths = [f"/api/products/{product_id}/" for product_id in product_ids]
+
+        if args.connect_latency:
+            # The backend the pooled wrapper opens its connections with.
+            backend = next(
+                cls
+                for cls in type(connections["default"]).__mro__
+                if not issubclass(cls, PooledDatabaseWrapperMixin)
+            )
+            get_new_connection = backend.get_new_connection
+
+            def slow_get_new_connection(self, conn_params):
+                time.sleep(args.connect_latency / 1000)
+                return get_new_connection(self, conn_params)
+
+            backend.get_new_connection = slow_get_new_connection
+
+        settings_dict = connection.settings_dict
+        runs = {
+            "new": (0, 0),
+            "persistent": (60, 0),
+            "pooled": (0, args.pool_size),
+        }
+
+        print(
+            f"{args.requests} requests, {args.threads} threads, "
+            f"{args.connect_latency} ms connect latency"
+        )
+        print(f"{'connections':<14}{'seconds':>10}{'requests/s':>12}")
+
+        for name, (conn_max_age, pool_size) in runs.items():
+            settings_dict["CONN_MAX_AGE"] = conn_max_age
+            settings_dict["POOL"] = {**settings_dict["POOL"], "MAX_SIZE": pool_size}
+            connections.close_all()
+            clear_pools()
+
+            handler = WSGIHandler()
+            # Warms up the threads (and their persistent connections).
+            run_wsgi(handler, paths, args.threads, args.threads)
+            elapsed = run_wsgi(handler, paths, args.requests, args.threads)
+
+            print(f"{name:<14}{elapsed:>10.2f}{args.requests / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Measures login throughput, and what a login burst does to other requests.
+
+    python -m benchmarks.login --concurrency 20 --logins 100 --workers 2
+
+`--concurrency` clients log in `--logins` times in total, while a probe
+client keeps listing products one request at a time. The handlers are
+driven in process, like in `benchmarks.async_views`:
+
+- "wsgi inline" hashes in the request threads (no hashing workers).
+- "wsgi pool" hashes in `--workers` processes, each request thread waiting
+  for its hash.
+- "asgi async" answers logins with the native async view, which awaits the
+  hash from the pool on the event loop the probe also runs on.
+
+Logins turned away with a 503 (more than `--max-pending` hashes at once)
+are counted apart.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import benchmark_database, seed_products
+
+PROBE_PATH = "/api/products/"
+LOGIN_PATH = "/api/login/"
+
+
+def wsgi_environ(method, path, body=b""):
+    return {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.url_scheme": "http",
+    }
+
+
+def asgi_scope(method, path, body=b""):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 0),
+    }
+
+
+def run_wsgi(application, bodies, concurrency):
+    def request(method, path, body=b""):
+        statuses = []
+
+        response = application(
+            wsgi_environ(method, path, body),
+            lambda status, headers: statuses.append(int(status[:3])),
+        )
+        b"".join(response)
+        response.close()
+
+        return statuses[0]
+
+    done = threading.Event()
+    probe_latencies = []
+
+    def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            request("GET", PROBE_PATH)
+            probe_latencies.append(time.perf_counter() - start)
+
+    probe_thread = threading.Thread(target=probe)
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        probe_thread.start()
+        statuses = list(
+            executor.map(lambda body: request("POST", LOGIN_PATH, body), bodies)
+        )
+        elapsed = time.perf_counter() - start
+
+    done.set()
+    probe_thread.join()
+
+    return statuses, elapsed, probe_latencies
+
+
+def run_asgi(application, bodies, concurrency):
+    async def request(method, path, body=b""):
+        statuses = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await application(asgi_scope(method, path, body), receive, send)
+
+        return statuses[0]
+
+    async def client(queue, statuses):
+        while queue:
+            statuses.append(await request("POST", LOGIN_PATH, queue.pop()))
+
+    async def probe(done, probe_latencies):
+        while not done.is_set():
+            start = time.perf_counter()
+            await request("GET", PROBE_PATH)
+            probe_latencies.append(time.perf_counter() - start)
+
+    async def main():
+        queue, statuses, probe_latencies = list(bodies), [], []
+        done = asyncio.Event()
+
+        start = time.perf_counter()
+        probe_task = asyncio.create_task(probe(done, probe_latencies))
+        await asyncio.gather(*(client(queue, statuses) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        await probe_task
+
+        return statuses, elapsed, probe_latencies
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=32)
+    parser.add_argument("--iterations", type=int, help="PBKDF2 iterations")
+    args = parser.parse_args()
+
+    with benchmark_database():
+        from django.conf import settings
+        from django.contrib.auth.hashers import make_password
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.test import override_settings
+
+        from _komercio.asgi import application as async_application
+        from users.hashing import shutdown_pool
+        from users.models import User
+
+        iterations = args.iterations or settings.PASSWORD_HASHER_ITERATIONS
+        hashing_settings = override_settings(
+            PASSWORD_HASHER_ITERATIONS=iterations,
+            PASSWORD_HASHING_MAX_PENDING=args.max_pending,
+        )
+        hashing_settings.enable()
+
+        seed_products(200, sellers=10)
+        password = make_password("1234")
+        User.objects.bulk_create(
+            [
+                User(username=f"login{index}", password=password)
+                for index in range(args.users)
+            ]
+        )
+
+        bodies = [
+            json.dumps(
+                {"username": f"login{index % args.users}", "password": "1234"}
+            ).encode()
+            for index in range(args.logins)
+        ]
+
+        runs = {
+            "wsgi inline": (run_wsgi, WSGIHandler(), 0),
+            "wsgi pool": (run_wsgi, WSGIHandler(), args.workers),
+            "asgi async": (run_asgi, async_application, args.workers),
+        }
+
+        print(
+            f"{args.logins} logins, {args.concurrency} concurrent clients, "
+            f"{iterations} iterations"
+        )
+        print(
+            f"{'handler':<14}{'seconds':>9}{'logins/s':>10}{'503s':>6}"
+            f"{'probes':>8}{'probe p50 ms':>14}{'probe max ms':>14}"
+        )
+
+        for name, (run, application, workers) in runs.items():
+            with override_settings(PASSWORD_HASHING_WORKERS=workers):
+                # Starts the hashing workers before timing anything.
+                run(application, bodies[: args.concurrency], args.concurrency)
+
+                statuses, elapsed, probes = run(application, bodies, args.concurrency)
+
+            counts = Counter(statuses)
+            assert counts.keys() <= {200, 503}, counts
+
+            print(
+                f"{name:<14}{elapsed:>9.2f}{counts[200] / elapsed:>10.1f}"
+                f"{counts[503]:>6}{len(probes):>8}"
+                f"{statistics.median(probes) * 1000:>14.1f}"
+                f"{max(probes) * 1000:>14.1f}"
+            )
+
+        shutdown_pool()
+        hashing_settings.disable()
+
+
+if __name__ == "__main__":
+    main()
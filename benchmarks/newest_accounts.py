@@ -0,0 +1,78 @@
+"""Compares the ways of listing the newest accounts.
+
+    python -m benchmarks.newest_accounts --users 1000000
+
+- "full sort" is the former query of `ListAccountByDateView`, ordering on
+  `date_joined` without an index.
+- "index" is the same query on the descending `date_joined` index.
+- "ring" is `users.newest.get_newest_accounts`, once its ring is loaded.
+- "view" is a whole request to `/api/accounts/newest/<num>/` (ring and
+  rendering).
+"""
+
+import argparse
+
+from benchmarks import benchmark_database, best_of
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--num", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with benchmark_database() as connection:
+        from django.test import Client
+
+        from products.dataset import generate_dataset
+        from users.models import User
+        from users.newest import FIELDS, get_newest_accounts
+
+        generate_dataset(users=args.users, products=0, seller_ratio=0)
+
+        index = User._meta.indexes[0]
+        client = Client(HTTP_HOST="localhost")
+
+        def sort_query(num):
+            return list(User.objects.order_by("-date_joined").values(*FIELDS)[:num])
+
+        def index_query(num):
+            return list(
+                User.objects.order_by("-date_joined", "-id").values(*FIELDS)[:num]
+            )
+
+        def view(num):
+            client.get(f"/api/accounts/newest/{num}/")
+
+        with connection.schema_editor() as schema_editor:
+            schema_editor.remove_index(User, index)
+
+        results = {
+            "full sort": [
+                best_of(lambda: sort_query(num), args.repeat) for num in args.num
+            ]
+        }
+
+        with connection.schema_editor() as schema_editor:
+            schema_editor.add_index(User, index)
+
+        results["index"] = [
+            best_of(lambda: index_query(num), args.repeat) for num in args.num
+        ]
+        results["ring"] = [
+            best_of(lambda: get_newest_accounts(num), args.repeat) for num in args.num
+        ]
+        results["view"] = [best_of(lambda: view(num), args.repeat) for num in args.num]
+
+        print(f"{args.users} users, best of {args.repeat}, milliseconds")
+        print(f"{'num':<12}" + "".join(f"{num:>10}" for num in args.num))
+
+        for name, timings in results.items():
+            print(
+                f"{name:<12}" + "".join(f"{timing * 1000:>10.3f}" for timing in timings)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Times the product listing filters with and without their indexes.
+
+    python -m benchmarks.product_filters --products 200000
+"""
+
+import argparse
+
+from benchmarks import benchmark_database, best_of, seed_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--sellers", type=int, default=100)
+    args = parser.parse_args()
+
+    with benchmark_database() as connection:
+        from django.http import QueryDict
+
+        from products.filters import LISTING_ORDERING, filter_products
+        from products.models import Product
+
+        sellers = seed_products(args.products, sellers=args.sellers)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        scenarios = {
+            "active under 50.00": "is_active=true&price_max=50.00",
+            "active in stock": "is_active=true&in_stock=true",
+            "seller active in stock": (
+                f"seller={sellers[0].id}&is_active=true&in_stock=true"
+                "&price_min=10.00&price_max=1000.00"
+            ),
+        }
+
+        indexes = [
+            index
+            for index in Product._meta.indexes
+            if index.name
+            in (
+                "product_active_price_idx",
+                "product_seller_price_idx",
+                "product_in_stock_created_idx",
+            )
+        ]
+
+        def run(query_string):
+            # In the order of the listing view, as it pages them.
+            queryset = filter_products(
+                Product.objects.order_by(*LISTING_ORDERING), QueryDict(query_string)
+            )
+            return queryset, lambda: list(queryset.values_list("id")[:50])
+
+        results = {}
+
+        for label, query_string in scenarios.items():
+            queryset, page = run(query_string)
+            results[label] = {"indexed": best_of(page)}
+            print(f"--- {label}\n{queryset.explain()}\n")
+
+        with connection.schema_editor() as schema_editor:
+            for index in indexes:
+                schema_editor.remove_index(Product, index)
+
+        for label, query_string in scenarios.items():
+            results[label]["unindexed"] = best_of(run(query_string)[1])
+
+        print(f"{'scenario':<26}{'indexed':>12}{'unindexed':>12}{'speedup':>10}")
+
+        for label, timings in results.items():
+            print(
+                f"{label:<26}{timings['indexed'] * 1000:>10.2f}ms"
+                f"{timings['unindexed'] * 1000:>10.2f}ms"
+                f"{timings['unindexed'] / timings['indexed']:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Measures import_products throughput for plain inserts and upserts.
+
+    python -m benchmarks.product_import --rows 1000000
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+
+from benchmarks import benchmark_database, seed_products
+
+
+def build_ndjson(rows, sellers, seed=0):
+    rng = random.Random(seed)
+    buffer = io.StringIO()
+
+    for index in range(rows):
+        seller = sellers[index % len(sellers)]
+        buffer.write(
+            json.dumps(
+                {
+                    "seller": seller.username,
+                    "sku": f"SKU-{index}",
+                    "description": f"produto {index}",
+                    "price": f"{rng.randint(100, 500000) / 100:.2f}",
+                    "quantity": rng.randint(0, 500),
+                    "is_active": rng.random() < 0.8,
+                }
+            )
+            + "\n"
+        )
+
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--sellers", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int)
+    args = parser.parse_args()
+
+    with benchmark_database() as connection:
+        from products.importer import import_products, iter_import_rows
+
+        sellers = seed_products(0, sellers=args.sellers)
+        payload = build_ndjson(args.rows, sellers)
+
+        print(f"{connection.vendor}, {args.rows} rows")
+        print(f"{'mode':<10}{'seconds':>10}{'rows/min':>14}")
+
+        for mode, upsert in (("insert", False), ("upsert", True)):
+            start = time.perf_counter()
+            result = import_products(
+                iter_import_rows(io.StringIO(payload), "ndjson"),
+                upsert=upsert,
+                chunk_size=args.chunk_size,
+            )
+            elapsed = time.perf_counter() - start
+
+            assert not result["errors"], result["errors"][:5]
+
+            print(f"{mode:<10}{elapsed:>10.2f}{args.rows / elapsed * 60:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compares rows/sec of the DRF product serializers and their ValuesSerializer.
+
+    python -m benchmarks.product_serializers --products 20000
+"""
+
+import argparse
+
+from benchmarks import benchmark_database, best_of, seed_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        from rest_framework.renderers import JSONRenderer
+
+        from products.models import Product
+        from products.serializers import (
+            ProductFilterSerializer,
+            ProductFilterValuesSerializer,
+            ProductGeneralSerializer,
+            ProductGeneralValuesSerializer,
+        )
+
+        seed_products(args.products)
+        render = JSONRenderer().render
+
+        scenarios = {
+            "general": (
+                Product.objects.order_by("created_at", "id"),
+                ProductGeneralSerializer,
+                ProductGeneralValuesSerializer,
+            ),
+            "filter (nested seller)": (
+                Product.objects.select_related("seller").order_by("created_at", "id"),
+                ProductFilterSerializer,
+                ProductFilterValuesSerializer,
+            ),
+        }
+
+        print(
+            f"{'serializer':<24}{'regular rows/s':>16}{'values rows/s':>16}{'speedup':>10}"
+        )
+
+        for name, (queryset, serializer_class, values_serializer) in scenarios.items():
+            values = queryset.values(*values_serializer.lookups)
+
+            def regular():
+                return render(serializer_class(queryset.all(), many=True).data)
+
+            def fast():
+                return render(values_serializer.to_representation_many(values.all()))
+
+            assert regular() == fast(), f"{name} output differs"
+
+            regular_time = best_of(regular, args.repeat)
+            fast_time = best_of(fast, args.repeat)
+
+            print(
+                f"{name:<24}{args.products / regular_time:>16.0f}"
+                f"{args.products / fast_time:>16.0f}"
+                f"{regular_time / fast_time:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compares product pages with nested and with sideloaded sellers.
+
+    python -m benchmarks.product_sideload --sellers 1 5 100
+
+Every page holds `--page-size` products spread over `--sellers` sellers.
+"expand" is `?expand=seller`, every product with its seller nested, and
+"sideload" is `?sideload=seller`, every seller once in the `sellers` map.
+Timings are whole requests missing the listing cache, with both the
+regular and the values serializers.
+"""
+
+import argparse
+
+from benchmarks import benchmark_database, best_of, seed_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sellers", type=int, nargs="+", default=[1, 5, 100])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        from django.core.cache import caches
+        from django.test import Client, override_settings
+
+        from products.models import Product
+        from users.models import User
+
+        client = Client(HTTP_HOST="localhost")
+        cache = caches["products"]
+
+        def get(url):
+            cache.clear()
+            return client.get(url)
+
+        base_url = f"/api/products/?pagination=cursor&page_size={args.page_size}"
+
+        print(f"{args.page_size} products per page, best of {args.repeat}")
+        print(
+            f"{'sellers':<10}{'mode':<10}{'bytes':>10}"
+            f"{'regular ms':>12}{'values ms':>12}"
+        )
+
+        for sellers in args.sellers:
+            Product.objects.all().delete()
+            User.objects.all().delete()
+            seed_products(args.page_size, sellers=sellers)
+
+            for mode in ("expand", "sideload"):
+                url = f"{base_url}&{mode}=seller"
+                timings = []
+
+                for fast_serializers in (False, True):
+                    with override_settings(FAST_SERIALIZERS=fast_serializers):
+                        size = len(get(url).content)
+                        timings.append(best_of(lambda: get(url), args.repeat))
+
+                print(
+                    f"{sellers:<10}{mode:<10}{size:>10}"
+                    + "".join(f"{timing * 1000:>12.2f}" for timing in timings)
+                )
+
+
+if __name__ == "__main__":
+    main()
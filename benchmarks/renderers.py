@@ -0,0 +1,64 @@
+"""Times rendering and parsing product list pages with each renderer.
+
+    python -m benchmarks.renderers --page-sizes 20 100 1000
+"""
+
+import argparse
+import io
+
+from benchmarks import benchmark_database, best_of, seed_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        from rest_framework.parsers import JSONParser
+        from rest_framework.renderers import JSONRenderer
+
+        from products.models import Product
+        from products.serializers import ProductFilterSerializer
+        from utils.parsers import MessagePackParser, ORJSONParser
+        from utils.renderers import MessagePackRenderer, ORJSONRenderer
+
+        seed_products(max(args.page_sizes))
+
+        formats = {
+            "json": (JSONRenderer(), JSONParser()),
+            "orjson": (ORJSONRenderer(), ORJSONParser()),
+            "msgpack": (MessagePackRenderer(), MessagePackParser()),
+        }
+
+        print(
+            f"{'page size':<10}{'format':<10}{'bytes':>10}"
+            f"{'render ms':>12}{'parse ms':>12}"
+        )
+
+        for page_size in args.page_sizes:
+            products = Product.objects.select_related("seller")[:page_size]
+            data = {
+                "count": page_size,
+                "next": None,
+                "previous": None,
+                "results": ProductFilterSerializer(products, many=True).data,
+            }
+
+            for name, (renderer, parser) in formats.items():
+                body = renderer.render(data)
+
+                render_time = best_of(lambda: renderer.render(data), args.repeat)
+                parse_time = best_of(
+                    lambda: parser.parse(io.BytesIO(body)), args.repeat
+                )
+
+                print(
+                    f"{page_size:<10}{name:<10}{len(body):>10}"
+                    f"{render_time * 1000:>12.3f}{parse_time * 1000:>12.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Replays traffic captured by `utils.capture` and reports it per route.
+
+    python -m benchmarks.replay traffic.jsonl --concurrency 20
+    python -m benchmarks.replay traffic.jsonl --url http://localhost:8000 \\
+        --tokens tokens.json
+
+In process (the default), the requests go through the Django test client
+against a throwaway database seeded with `--products` products. Each user
+pseudonym of the capture is stood in for by a new account with the same
+role flags, and each product or account id by a seeded row, so detail
+routes resolve. With `--url`, the requests go to a running server instead,
+and `--tokens` is a JSON object mapping user pseudonyms to tokens valid
+there (requests of unmapped users go anonymous).
+
+For each route it reports the statuses, the p50/p95/p99 latency, the
+throughput and the SQL queries per request, as reported by the
+`Server-Timing` header of `utils.timing`.
+"""
+
+import argparse
+import itertools
+import json
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import benchmark_database, seed_products
+
+UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def load_records(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def get_query_count(server_timing) -> int:
+    match = QUERIES_RE.search(server_timing or "")
+    return int(match.group(1)) if match else 0
+
+
+class IdMapper:
+    """Maps each id of the capture to a row of the replay database."""
+
+    def __init__(self, account_ids, product_ids):
+        self.accounts = itertools.cycle(account_ids)
+        self.products = itertools.cycle(product_ids)
+        self.ids = {}
+        self.lock = threading.Lock()
+
+    def map(self, value: str, ids) -> str:
+        with self.lock:
+            if value not in self.ids:
+                self.ids[value] = str(next(ids))
+
+            return self.ids[value]
+
+    def map_record(self, record) -> dict:
+        ids = self.accounts if "/accounts/" in record["path"] else self.products
+        path = UUID_RE.sub(lambda match: self.map(match[0], ids), record["path"])
+        body = record["body"]
+
+        if body:
+            # Ids in bodies reference products (inventory, reservations).
+            body = UUID_RE.sub(lambda match: self.map(match[0], self.products), body)
+
+        return {**record, "path": path, "body": body}
+
+
+class TestClientReplayer:
+    def __init__(self, tokens, id_mapper):
+        from django.test import Client
+
+        self.tokens = tokens
+        self.id_mapper = id_mapper
+        self.clients = threading.local()
+        self.client_class = Client
+
+    def get_client(self):
+        if not hasattr(self.clients, "client"):
+            self.clients.client = self.client_class(
+                HTTP_HOST="localhost", raise_request_exception=False
+            )
+
+        return self.clients.client
+
+    def send(self, record):
+        record = self.id_mapper.map_record(record)
+        extra = {}
+        token = record["auth"] and self.tokens.get(record["auth"]["user"])
+
+        if token:
+            extra["HTTP_AUTHORIZATION"] = f"Token {token}"
+
+        path = record["path"] + (f"?{record['query']}" if record["query"] else "")
+        start = time.perf_counter()
+        response = self.get_client().generic(
+            record["method"],
+            path,
+            data=record["body"] or "",
+            content_type=record["content_type"] or "application/octet-stream",
+            **extra,
+        )
+
+        if response.streaming:
+            b"".join(response.streaming_content)
+
+        latency = time.perf_counter() - start
+
+        return response.status_code, latency, response.get("Server-Timing")
+
+
+class HTTPReplayer:
+    def __init__(self, url, tokens):
+        self.url = url.rstrip("/")
+        self.tokens = tokens
+
+    def send(self, record):
+        headers = {}
+        token = record["auth"] and self.tokens.get(record["auth"]["user"])
+
+        if token:
+            headers["Authorization"] = f"Token {token}"
+
+        if record["body"]:
+            headers["Content-Type"] = record["content_type"]
+
+        url = self.url + record["path"]
+        url += f"?{record['query']}" if record["query"] else ""
+        request = urllib.request.Request(
+            url,
+            data=record["body"].encode() if record["body"] else None,
+            headers=headers,
+            method=record["method"],
+        )
+        start = time.perf_counter()
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+        except urllib.error.HTTPError as error:
+            response = error
+            response.read()
+
+        latency = time.perf_counter() - start
+
+        return response.status, latency, response.headers.get("Server-Timing")
+
+
+def replay(replayer, records, concurrency):
+    results = defaultdict(list)
+    lock = threading.Lock()
+
+    def send(record):
+        status, latency, server_timing = replayer.send(record)
+        route = f"{record['method']} {record['route'] or '<unmatched>'}"
+
+        with lock:
+            results[route].append((status, latency, get_query_count(server_timing)))
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(send, records))
+        elapsed = time.perf_counter() - start
+
+    return results, elapsed
+
+
+def percentiles(latencies):
+    if len(latencies) == 1:
+        return latencies * 3
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def report(results, elapsed):
+    print(
+        f"{'route':<40}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'req/s':>9}{'queries':>9}  statuses"
+    )
+
+    rows = sorted(results.items())
+    rows.append(("total", [result for _, items in rows for result in items]))
+
+    for route, items in rows:
+        statuses, latencies, queries = zip(*items)
+        p50, p95, p99 = (value * 1000 for value in percentiles(sorted(latencies)))
+        counts = " ".join(
+            f"{status}x{count}" for status, count in sorted(Counter(statuses).items())
+        )
+
+        print(
+            f"{route:<40}{len(items):>9}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}"
+            f"{len(items) / elapsed:>9.0f}{statistics.mean(queries):>9.1f}  {counts}"
+        )
+
+
+def stand_in_users(records):
+    """Creates an account with a token for each user of the capture."""
+
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+
+    from users.models import User
+
+    password = make_password(None)
+    users = {
+        record["auth"]["user"]: record["auth"] for record in records if record["auth"]
+    }
+    accounts = User.objects.bulk_create(
+        [
+            User(
+                username=f"replay{index}",
+                password=password,
+                is_seller=auth["is_seller"],
+                is_superuser=auth["is_superuser"],
+            )
+            for index, auth in enumerate(users.values())
+        ]
+    )
+    tokens = Token.objects.bulk_create(
+        [Token(key=Token.generate_key(), user=account) for account in accounts]
+    )
+
+    return {user: token.key for user, token in zip(users, tokens)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", nargs="?", default="traffic.jsonl")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--url", help="replay against a running server")
+    parser.add_argument("--tokens", help="JSON file of user pseudonym -> token")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--sellers", type=int, default=100)
+    args = parser.parse_args()
+
+    records = load_records(args.path) * args.repeat
+
+    if not records:
+        parser.error(f"{args.path} holds no requests")
+
+    if args.url:
+        tokens = {}
+
+        if args.tokens:
+            with open(args.tokens) as file:
+                tokens = json.load(file)
+
+        report(*replay(HTTPReplayer(args.url, tokens), records, args.concurrency))
+        return
+
+    with benchmark_database():
+        from products.models import Product
+        from users.models import User
+
+        seed_products(args.products, sellers=args.sellers)
+        tokens = stand_in_users(records)
+        id_mapper = IdMapper(
+            User.objects.values_list("id", flat=True),
+            Product.objects.values_list("id", flat=True),
+        )
+
+        replayer = TestClientReplayer(tokens, id_mapper)
+        report(*replay(replayer, records, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
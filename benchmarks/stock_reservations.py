@@ -0,0 +1,89 @@
+"""Measures stock reservations per second under concurrent buyers.
+
+    python -m benchmarks.stock_reservations --workers 16 --stock 5000
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import benchmark_database, seed_products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--items-per-reservation", type=int, default=2)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        from django.db import OperationalError, connections
+
+        from products.models import Product
+        from products.services import (
+            STOCK_LOCK_MODES,
+            InsufficientStock,
+            StockLocked,
+            reserve_stock,
+        )
+
+        seed_products(args.products, sellers=1)
+        product_ids = list(Product.objects.values_list("id", flat=True))
+
+        print(f"{'lock mode':<20}{'reserved':>10}{'retries':>10}{'per second':>12}")
+
+        for lock_mode in STOCK_LOCK_MODES:
+            Product.objects.update(quantity=args.stock, is_active=True)
+            counters = {"reserved": 0, "retries": 0}
+            counters_lock = threading.Lock()
+
+            def buyer(worker_index):
+                reserved = retries = 0
+                position = worker_index
+
+                try:
+                    while True:
+                        items = {
+                            product_ids[(position + offset) % len(product_ids)]: 1
+                            for offset in range(args.items_per_reservation)
+                        }
+                        position += 1
+
+                        try:
+                            reserve_stock(items, lock_mode)
+                            reserved += 1
+                        except (OperationalError, StockLocked):
+                            retries += 1
+                        except InsufficientStock:
+                            break
+                finally:
+                    connections.close_all()
+
+                with counters_lock:
+                    counters["reserved"] += reserved
+                    counters["retries"] += retries
+
+            start = time.perf_counter()
+
+            with ThreadPoolExecutor(args.workers) as executor:
+                list(executor.map(buyer, range(args.workers)))
+
+            elapsed = time.perf_counter() - start
+            remaining = sum(Product.objects.values_list("quantity", flat=True))
+            sold = args.stock * len(product_ids) - remaining
+
+            assert (
+                sold == counters["reserved"] * args.items_per_reservation
+            ), "oversold or lost an update"
+
+            print(
+                f"{lock_mode:<20}{counters['reserved']:>10}{counters['retries']:>10}"
+                f"{counters['reserved'] / elapsed:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
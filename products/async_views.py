@@ -0,0 +1,154 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+
+from products.cache import (
+    aget_cached_listing,
+    aget_listing_generation,
+    aset_cached_listing,
+    get_listing_key,
+)
+from products.filters import LISTING_ORDERING, filter_listing
+from products.models import Product
+from products.sharding import is_sharded
+from products.serializers import (
+    ProductFilterSerializer,
+    ProductGeneralSerializer,
+    ProductListQuerySerializer,
+)
+from utils.async_views import AsyncReadView
+from utils.serializers import (
+    get_sideload_key,
+    get_sideloaded,
+    get_sideloaded_pks,
+    get_sparse_values_serializer,
+    get_values_serializer,
+    parse_sparse_fieldset,
+)
+
+
+class AsyncListProductView(AsyncReadView):
+    """Async product listing, sharing the listing cache, filters and search
+    of the sync view. The cache is read through its async interface, so a
+    slow backend never blocks the event loop.
+    """
+
+    query_params = (
+        "page",
+        "q",
+        "fields",
+        "expand",
+        "sideload",
+        *ProductListQuerySerializer().fields,
+    )
+
+    async def aget_state(self):
+        if is_sharded():
+            # The sync view merges the shards.
+            return None
+
+        # Like the sync listing, versioned by the listing generation alone.
+        self.listing_generation = await aget_listing_generation()
+
+        if self.listing_generation is None:
+            # Not cached, the sync view renders it untagged.
+            return None
+
+        return (self.listing_generation,), None
+
+    async def aget_response(self):
+        query_params = self.request.GET
+        key = get_listing_key(self.request, self.listing_generation)
+        data = await aget_cached_listing(key)
+
+        if data is not None:
+            response = self.render(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        try:
+            fieldset = parse_sparse_fieldset(
+                ProductGeneralSerializer, query_params, sideload=True
+            )
+            values_serializer = get_sparse_values_serializer(
+                ProductGeneralSerializer, *fieldset
+            )
+            queryset = filter_listing(
+                Product.objects.order_by(*LISTING_ORDERING), query_params
+            )
+        except ValidationError:
+            return None
+
+        data = await self.apaginate(
+            queryset.values(*values_serializer.lookups), values_serializer
+        )
+
+        if data is None:
+            return None
+
+        for name in fieldset[2]:
+            data[get_sideload_key(name)] = await self.aget_sideloaded(
+                data["results"], name
+            )
+
+        await aset_cached_listing(key, data)
+        response = self.render(data)
+        response["X-Cache"] = "MISS"
+
+        return response
+
+    async def aget_sideloaded(self, data, name) -> dict:
+        serializer_class = ProductGeneralSerializer.Meta.expandable_fields[name]
+        values_serializer = get_values_serializer(serializer_class)
+        pks = get_sideloaded_pks(data, name)
+        rows = [
+            row
+            async for row in serializer_class.Meta.model.objects.filter(
+                pk__in=pks
+            ).values(*values_serializer.lookups)
+        ]
+
+        return get_sideloaded(pks, values_serializer.to_representation_many(rows))
+
+
+class AsyncRetrieveProductView(AsyncReadView):
+    query_params = ("fields", "expand")
+
+    async def aget_state(self):
+        if is_sharded():
+            return None
+
+        try:
+            self.values_serializer = get_sparse_values_serializer(
+                ProductFilterSerializer,
+                *parse_sparse_fieldset(ProductFilterSerializer, self.request.GET),
+            )
+        except ValidationError:
+            return None
+
+        lookups = ["updated_at", "seller__updated_at"]
+
+        if not self.values_serializer.relations:
+            lookups.pop()
+
+        try:
+            state = (
+                await Product.objects.filter(pk=self.kwargs["pk"])
+                .values_list(*lookups)
+                .afirst()
+            )
+        except (ValueError, DjangoValidationError):
+            return None
+
+        return state and (state, max(state))
+
+    async def aget_response(self):
+        try:
+            row = (
+                await Product.objects.filter(pk=self.kwargs["pk"])
+                .values(*self.values_serializer.lookups)
+                .aget()
+            )
+        except Product.DoesNotExist:
+            return None
+
+        return self.render(self.values_serializer.to_representation(row))
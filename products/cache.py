@@ -0,0 +1,153 @@
+"""Response cache for the public product listing.
+
+Entries are keyed by a generation number and the normalized query string.
+Any write to `Product` bumps the generation (see `products.signals` and the
+bulk services), which makes every cached page unreachable at once; the old
+entries then age out through the backend's TTL/LRU eviction. The backend is
+whatever `CACHES[PRODUCTS_LISTING_CACHE]` points at, files or a
+Redis-compatible server. The generation must be the same in every worker
+(it is also the ETag of the listing), so with a process-local backend
+there is none: the listing is then neither cached nor tagged.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+from utils.caches import is_process_local
+
+GENERATION_KEY = "products:listing:generation"
+HITS_KEY = "products:listing:hits"
+MISSES_KEY = "products:listing:misses"
+
+
+def get_listing_cache():
+    return caches[settings.PRODUCTS_LISTING_CACHE]
+
+
+def get_listing_generation():
+    cache = get_listing_cache()
+
+    if is_process_local(cache):
+        return None
+
+    generation = cache.get(GENERATION_KEY)
+
+    if generation is None:
+        # Seeding from the clock rather than 1 keeps an evicted generation
+        # from ever colliding with the keys it had produced.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+
+    return generation
+
+
+async def aget_listing_generation():
+    """`get_listing_generation()` through the async cache interface."""
+
+    cache = get_listing_cache()
+
+    if is_process_local(cache):
+        return None
+
+    generation = await cache.aget(GENERATION_KEY)
+
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = await cache.aget(GENERATION_KEY)
+
+    return generation
+
+
+def bump_listing_generation() -> None:
+    cache = get_listing_cache()
+
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_product_listing() -> None:
+    """Drops every cached listing page.
+
+    The generation is bumped right away and again once the surrounding
+    transaction commits, so a page rendered from the not-yet-committed
+    state cannot outlive the write.
+    """
+
+    bump_listing_generation()
+    transaction.on_commit(bump_listing_generation)
+
+
+def get_listing_key(request, generation: int) -> str:
+    """The key of the listing answering `request` (Django's or DRF's).
+
+    The pagination links of a listing are absolute, so the scheme and host
+    it was requested through are part of the key.
+    """
+
+    query = urlencode(
+        sorted(
+            (param, value) for param, values in request.GET.lists() for value in values
+        )
+    )
+    url = f"{request.scheme}://{request.get_host()}?{query}"
+    digest = hashlib.md5(url.encode()).hexdigest()
+
+    return f"products:listing:{generation}:{digest}"
+
+
+def get_lookup_counter(data) -> str:
+    return MISSES_KEY if data is None else HITS_KEY
+
+
+def get_cached_listing(key: str):
+    cache = get_listing_cache()
+    data = cache.get(key)
+    counter = get_lookup_counter(data)
+
+    try:
+        cache.incr(counter)
+    except ValueError:
+        cache.add(counter, 1, timeout=None)
+
+    return data
+
+
+async def aget_cached_listing(key: str):
+    """`get_cached_listing()` through the async cache interface."""
+
+    cache = get_listing_cache()
+    data = await cache.aget(key)
+    counter = get_lookup_counter(data)
+
+    try:
+        await cache.aincr(counter)
+    except ValueError:
+        await cache.aadd(counter, 1, timeout=None)
+
+    return data
+
+
+def set_cached_listing(key: str, data) -> None:
+    get_listing_cache().set(key, data)
+
+
+async def aset_cached_listing(key: str, data) -> None:
+    await get_listing_cache().aset(key, data)
+
+
+def get_listing_stats() -> dict:
+    cache = get_listing_cache()
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+
+    return {
+        "hits": counters.get(HITS_KEY, 0),
+        "misses": counters.get(MISSES_KEY, 0),
+        "generation": get_listing_generation(),
+    }
@@ -0,0 +1,272 @@
+"""Synthetic users, sellers and products for tests and benchmarks at scale.
+
+Everything is drawn from one `random.Random(seed)`, ids and timestamps
+included, so a seed always generates the same rows. Sales concentrate on
+few sellers (a Zipf distribution of products per seller), descriptions,
+prices and stock follow long tailed log-normal distributions, and a share
+of the catalog is inactive or out of stock.
+
+Users share a single password hash, computed once, and are written with
+`bulk_create`. Products go through the loaders of `products.importer`:
+`COPY` on PostgreSQL, `bulk_create` (which stamps `created_at` and
+`updated_at` with the load time) elsewhere, and on the shard of their
+seller when the products are sharded.
+"""
+
+import math
+import multiprocessing
+import random
+import uuid
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from contextlib import ExitStack
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from products.cache import invalidate_product_listing
+from products.importer import get_product_loader
+from products.sharding import replicate_users
+from users.models import User
+from users.newest import invalidate_newest_accounts
+
+DEFAULT_START = datetime(2022, 1, 1, tzinfo=dt_timezone.utc)
+
+WORDS = (
+    "cadeira mesa sofá cama armário estante luminária tapete cortina espelho "
+    "panela frigideira prato copo talher garrafa caneca chaleira liquidificador "
+    "batedeira ventilador aquecedor geladeira fogão forno microondas notebook "
+    "celular fone teclado mouse monitor cabo carregador caixa mochila bolsa "
+    "carteira relógio óculos camiseta camisa calça bermuda vestido saia casaco "
+    "jaqueta tênis sapato sandália meia boné livro caderno caneta lápis "
+    "brinquedo boneca bola bicicleta patinete capacete barraca lanterna "
+    "ferramenta martelo chave furadeira parafuso escada vaso planta semente "
+    "madeira metal vidro couro algodão plástico cerâmica inox bambu "
+    "azul vermelho verde preto branco cinza amarelo rosa marrom dourado "
+    "grande pequeno médio leve resistente portátil dobrável ajustável "
+    "elétrico manual digital sem fio recarregável compacto premium novo "
+    "usado clássico moderno infantil adulto unissex kit conjunto par unidade"
+).split()
+
+FIRST_NAMES = (
+    "ana maria joão pedro lucas gabriel julia beatriz rafael mariana "
+    "logan kamila yoshi carlos fernanda bruno camila diego larissa mateus"
+).split()
+
+LAST_NAMES = (
+    "silva santos oliveira souza rodrigues ferreira alves pereira lima gomes "
+    "costa ribeiro martins carvalho almeida lopes mattos muller barbosa rocha"
+).split()
+
+
+class DatasetGenerator:
+    """Draws the rows of a dataset.
+
+    Users come from one sequence seeded with `seed`. Each batch of products
+    is drawn from its own seed (`seed` and the batch number), so batches can
+    be generated in any order, by any process, and still come out the same
+    for the same `seed` and batch size. SKUs start with `seed`, so the
+    products of different seeds never share one.
+    """
+
+    def __init__(self, seed=0, start=DEFAULT_START, days=365, seller_skew=1.1):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.start = start
+        self.span = timedelta(days=days).total_seconds()
+        self.seller_skew = seller_skew
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def timestamp(self) -> datetime:
+        return self.start + timedelta(seconds=self.rng.random() * self.span)
+
+    def lognormal(self, mu: float, sigma: float) -> float:
+        # `gauss` caches the second value of each pair it draws, which makes
+        # it about twice as fast as `lognormvariate`.
+        return math.exp(self.rng.gauss(mu, sigma))
+
+    def description(self) -> str:
+        words = min(max(round(self.lognormal(2.2, 0.7)), 1), 300)
+        return " ".join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def price(self) -> Decimal:
+        reais = min(int(self.lognormal(3.6, 1.3)), 99_999_999)
+        ending = self.rng.random()
+
+        # Half the prices end in ,99, then ,90 and round ones.
+        if ending < 0.5:
+            cents = 99
+        elif ending < 0.7:
+            cents = 90
+        elif ending < 0.9:
+            cents = 0
+        else:
+            cents = int(ending * 1000) % 100
+
+        return Decimal(max(reais * 100 + cents, 1)) / 100
+
+    def quantity(self) -> int:
+        if self.rng.random() < 0.08:
+            return 0
+
+        return min(round(self.lognormal(2.5, 1.2)) + 1, 100_000)
+
+    def users(self, count: int, seller_ratio: float, password: str, prefix: str):
+        rng = self.rng
+
+        for index in range(count):
+            yield User(
+                id=self.uuid(),
+                username=f"{prefix}{index}",
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                is_seller=rng.random() < seller_ratio,
+                date_joined=self.timestamp(),
+            )
+
+    def set_sellers(self, seller_ids) -> None:
+        """Spreads the products over `seller_ids` by a Zipf law of their rank."""
+
+        self.seller_ids = seller_ids
+        self.cum_weights = list(
+            accumulate(
+                rank**-self.seller_skew for rank in range(1, len(seller_ids) + 1)
+            )
+        )
+
+    def product_batch(self, number: int, batch_size: int, count: int):
+        """Returns the rows of the `number`th batch of `count` products."""
+
+        rng = self.rng = random.Random(f"{self.seed}:products:{number}")
+        end = self.start + timedelta(seconds=self.span)
+        first = number * batch_size
+        size = min(batch_size, count - first)
+        sellers = rng.choices(self.seller_ids, cum_weights=self.cum_weights, k=size)
+        batch = []
+
+        for index, seller_id in enumerate(sellers, start=first):
+            created_at = self.timestamp()
+            updated_at = created_at + timedelta(days=rng.expovariate(1 / 30))
+
+            batch.append(
+                {
+                    "id": self.uuid(),
+                    "description": self.description(),
+                    "price": self.price(),
+                    "quantity": self.quantity(),
+                    "is_active": rng.random() < 0.9,
+                    "created_at": created_at,
+                    "updated_at": min(updated_at, end),
+                    "seller_id": seller_id,
+                    "sku": f"{self.seed}-{index:010d}",
+                }
+            )
+
+        return batch
+
+
+worker_generator = None
+
+
+def init_worker(generator) -> None:
+    global worker_generator
+    worker_generator = generator
+
+
+def generate_worker_batch(args):
+    return worker_generator.product_batch(*args)
+
+
+def generate_dataset(
+    users: int,
+    products: int,
+    seller_ratio=0.1,
+    seed=0,
+    password="1234",
+    username_prefix="user",
+    batch_size=None,
+    workers=1,
+    using=DEFAULT_DB_ALIAS,
+    progress=None,
+):
+    """Creates `users` users and `products` products, one batch per transaction.
+
+    Without new users, products go to the sellers already in the database.
+    With more than one worker, product batches are drawn by a process pool
+    while the current process loads them. `progress` is called with the
+    running totals after every batch.
+    """
+
+    batch_size = batch_size or settings.PRODUCTS_IMPORT_CHUNK_SIZE
+    generator = DatasetGenerator(seed)
+    manager = User.objects.db_manager(using)
+    result = {"users": 0, "sellers": 0, "products": 0}
+    seller_ids = []
+
+    accounts = generator.users(
+        users, seller_ratio, make_password(password), username_prefix
+    )
+
+    while batch := list(islice(accounts, batch_size)):
+        with transaction.atomic(using=using):
+            manager.bulk_create(batch)
+
+        replicate_users(batch)
+
+        seller_ids += [account.id for account in batch if account.is_seller]
+        result["users"] += len(batch)
+
+        if progress:
+            progress(result)
+
+    if users:
+        invalidate_newest_accounts()
+    else:
+        seller_ids = list(
+            manager.filter(is_seller=True)
+            .order_by("date_joined", "id")
+            .values_list("id", flat=True)
+        )
+
+    result["sellers"] = len(seller_ids)
+
+    if products and not seller_ids:
+        raise ValueError("There are no sellers to own the products.")
+
+    generator.set_sellers(seller_ids)
+    load = get_product_loader(using)
+    tasks = [
+        (number, batch_size, products)
+        for number in range(math.ceil(products / batch_size))
+    ]
+
+    with ExitStack() as stack:
+        if workers > 1:
+            # Forked workers must not share the open connections.
+            connections.close_all()
+            pool = stack.enter_context(
+                multiprocessing.Pool(workers, init_worker, (generator,))
+            )
+            batches = pool.imap(generate_worker_batch, tasks)
+        else:
+            batches = (generator.product_batch(*task) for task in tasks)
+
+        for batch in batches:
+            with transaction.atomic(using=using):
+                load(batch, False, using)
+
+            result["products"] += len(batch)
+
+            if progress:
+                progress(result)
+
+    if products:
+        invalidate_product_listing()
+
+    return result
@@ -0,0 +1,57 @@
+import csv
+import json
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+EXPORT_FIELDS = ("id", "description", "price", "quantity", "is_active", "seller")
+EXPORT_LOOKUPS = ("id", "description", "price", "quantity", "is_active", "seller_id")
+
+
+def iter_product_rows(queryset: QuerySet, chunk_size=None):
+    """Yields export rows as plain tuples, `chunk_size` rows per fetch.
+
+    `values_list().iterator()` skips model instantiation and, on
+    PostgreSQL, reads through a server-side cursor, so memory stays flat no
+    matter how large the catalog is.
+    """
+
+    chunk_size = chunk_size or settings.PRODUCTS_EXPORT_CHUNK_SIZE
+    rows = queryset.order_by("created_at", "id").values_list(*EXPORT_LOOKUPS)
+
+    for product_id, description, price, quantity, is_active, seller_id in rows.iterator(
+        chunk_size=chunk_size
+    ):
+        yield (
+            str(product_id),
+            description,
+            str(price),
+            quantity,
+            is_active,
+            str(seller_id),
+        )
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + "\n"
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(EXPORT_FIELDS)
+
+    for *values, is_active, seller in rows:
+        yield writer.writerow([*values, "true" if is_active else "false", seller])
+
+
+EXPORT_WRITERS = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
@@ -0,0 +1,53 @@
+from django.db.models import QuerySet
+
+from products.search import search_products
+from products.serializers import ProductListQuerySerializer
+
+# The order of the product listing, sync and async.
+LISTING_ORDERING = ("created_at", "id")
+
+
+def filter_products(queryset: QuerySet, query_params) -> QuerySet:
+    """Applies the listing filters accepted by `ProductListQuerySerializer`.
+
+    The filters line up with the partial `is_active` indexes on `Product`:
+    `product_active_price_idx` on price, `product_seller_price_idx` on
+    `(seller, price)`, and `product_in_stock_created_idx`, which walks the
+    in-stock products in listing order.
+    """
+
+    serializer = ProductListQuerySerializer(data=query_params.dict())
+    serializer.is_valid(raise_exception=True)
+    filters = serializer.validated_data
+
+    if "seller" in filters:
+        queryset = queryset.filter(seller_id=filters["seller"])
+
+    if "is_active" in filters:
+        queryset = queryset.filter(is_active=filters["is_active"])
+
+    if "price_min" in filters:
+        queryset = queryset.filter(price__gte=filters["price_min"])
+
+    if "price_max" in filters:
+        queryset = queryset.filter(price__lte=filters["price_max"])
+
+    if filters.get("in_stock") is True:
+        queryset = queryset.filter(quantity__gt=0)
+    elif filters.get("in_stock") is False:
+        queryset = queryset.filter(quantity=0)
+
+    return queryset
+
+
+def filter_listing(queryset: QuerySet, query_params) -> QuerySet:
+    """The product listing for `query_params`: its filters, then its `q`
+    search terms."""
+
+    queryset = filter_products(queryset, query_params)
+    terms = query_params.get("q")
+
+    if terms:
+        queryset = search_products(queryset, terms)
+
+    return queryset
@@ -0,0 +1,342 @@
+import csv
+import io
+import json
+import uuid
+from itertools import islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField
+
+from products.cache import invalidate_product_listing
+from products.models import Product
+from products.search import index_products
+from products.serializers import ProductImportSerializer
+from products.sharding import get_shard, is_sharded
+from users.models import User
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+IMPORT_FIELDS = (
+    "id",
+    "description",
+    "price",
+    "quantity",
+    "is_active",
+    "created_at",
+    "updated_at",
+    "seller",
+    "sku",
+)
+UPSERT_FIELDS = ("description", "price", "quantity", "is_active", "updated_at")
+
+IMPORT_COLUMNS = [Product._meta.get_field(name).column for name in IMPORT_FIELDS]
+IMPORT_VALUES = itemgetter(
+    *(Product._meta.get_field(name).attname for name in IMPORT_FIELDS)
+)
+
+IMPORT_TABLE = "products_product_import"
+
+
+def iter_import_rows(stream, format: str):
+    """Yields `(line_number, row)` pairs read lazily from a text stream.
+
+    NDJSON lines that are not valid JSON are passed on as the raw line, so
+    they are rejected (and reported) by validation like any other bad row.
+    """
+
+    if format == "csv":
+        reader = csv.DictReader(stream)
+
+        for row in reader:
+            yield reader.line_num, row
+
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, line
+
+
+def validate_row(fields, row) -> dict:
+    """Validates `row` against the `ProductImportSerializer` fields.
+
+    Runs each field (and its validators) directly, which is what
+    `Serializer.run_validation` does for a serializer without object level
+    validation, minus its per call overhead.
+    """
+
+    if not isinstance(row, dict):
+        raise ValidationError({"non_field_errors": ["Expected an object."]})
+
+    data, errors = {}, {}
+
+    for name, field in fields:
+        try:
+            data[name] = field.run_validation(field.get_value(row))
+        except SkipField:
+            pass
+        except ValidationError as error:
+            errors[name] = error.detail
+
+    if errors:
+        raise ValidationError(errors)
+
+    return data
+
+
+def validate_chunk(chunk, sellers: dict, errors: list, using: str):
+    """Turns a chunk of `(line_number, row)` pairs into product rows.
+
+    Seller usernames not seen in earlier chunks are resolved with a single
+    query, and `sellers` remembers them (unknown names included) for the
+    chunks that follow. Rejected rows are appended to `errors`.
+    """
+
+    fields = list(ProductImportSerializer().fields.items())
+    validated = []
+
+    for line_number, row in chunk:
+        try:
+            validated.append((line_number, validate_row(fields, row)))
+        except ValidationError as error:
+            errors.append({"line": line_number, "errors": error.detail})
+
+    missing = {data["seller"] for _, data in validated} - sellers.keys()
+
+    if missing:
+        sellers.update(
+            User.objects.using(using)
+            .filter(username__in=missing, is_seller=True)
+            .values_list("username", "id")
+        )
+        sellers.update(dict.fromkeys(missing - sellers.keys()))
+
+    now = timezone.now()
+    products = []
+
+    for line_number, data in validated:
+        seller_id = sellers[data.pop("seller")]
+
+        if seller_id is None:
+            errors.append({"line": line_number, "errors": {"seller": ["Not found."]}})
+            continue
+
+        data.update(
+            id=uuid.uuid4(),
+            sku=data.get("sku") or None,
+            seller_id=seller_id,
+            created_at=now,
+            updated_at=now,
+        )
+        products.append(data)
+
+    return products
+
+
+def copy_products(products, upsert: bool, using: str):
+    """Streams product rows into PostgreSQL with `COPY FROM STDIN`.
+
+    Plain imports are copied straight into the products table. Upserts are
+    copied into a temporary table and merged with `INSERT ... ON CONFLICT`
+    on the seller/sku constraint. The search vector is a generated column,
+    so there is no separate index to maintain. Returns the inserted and
+    updated row counts.
+    """
+
+    table = Product._meta.db_table
+    columns = ", ".join(IMPORT_COLUMNS)
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(map(IMPORT_VALUES, products))
+    buffer.seek(0)
+
+    connection = connections[using]
+
+    # Django does not translate the errors of `copy_expert`, which the
+    # callers catch as `django.db.IntegrityError`.
+    with connection.cursor() as cursor:
+        if not upsert:
+            with connection.wrap_database_errors:
+                cursor.copy_expert(
+                    f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            return len(products), 0
+
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {IMPORT_TABLE} (LIKE {table}) ON COMMIT DROP"
+        )
+
+        with connection.wrap_database_errors:
+            cursor.copy_expert(
+                f"COPY {IMPORT_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}"
+            for column in (
+                Product._meta.get_field(name).column for name in UPSERT_FIELDS
+            )
+        )
+        cursor.execute(
+            f"WITH upserted AS ("
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {IMPORT_TABLE} "
+            f"ON CONFLICT (seller_id, sku) DO UPDATE SET {updates} "
+            f"RETURNING xmax = 0 AS inserted) "
+            f"SELECT count(*) FILTER (WHERE inserted), "
+            f"count(*) FILTER (WHERE NOT inserted) FROM upserted"
+        )
+
+        return cursor.fetchone()
+
+
+def bulk_load_products(products, upsert: bool, using: str):
+    """Loads product rows with `bulk_create`, used where `COPY` is missing.
+
+    Upserts go through `bulk_create(update_conflicts=True)` on the
+    seller/sku constraint. The ids of the products that already exist are
+    read first, with one query, to count them and to keep the search index
+    keyed on the id the database kept. Returns the inserted and updated row
+    counts.
+    """
+
+    manager = Product.objects.db_manager(using)
+    products = [Product(**data) for data in products]
+    existing = {}
+
+    if upsert:
+        keyed = [product for product in products if product.sku]
+        existing = {
+            (seller_id, sku): product_id
+            for seller_id, sku, product_id in manager.filter(
+                seller_id__in={product.seller_id for product in keyed},
+                sku__in={product.sku for product in keyed},
+            ).values_list("seller_id", "sku", "id")
+        }
+
+    manager.bulk_create(
+        products,
+        batch_size=settings.PRODUCTS_BULK_CREATE_BATCH_SIZE,
+        update_conflicts=upsert,
+        unique_fields=("seller_id", "sku") if upsert else None,
+        update_fields=UPSERT_FIELDS if upsert else None,
+    )
+
+    for product in products:
+        product.pk = existing.get((product.seller_id, product.sku), product.pk)
+
+    index_products(products, using)
+
+    return len(products) - len(existing), len(existing)
+
+
+def load_sharded_products(products, upsert: bool, using: str):
+    """Loads every product on the shard of its seller, see `products.sharding`.
+
+    Each shard is loaded in a transaction of its own, with the loader of its
+    database, so a chunk is only all or nothing on every shard apart.
+    """
+
+    shards = {}
+
+    for data in products:
+        shards.setdefault(get_shard(data["seller_id"]), []).append(data)
+
+    inserted = updated = 0
+
+    for alias, rows in shards.items():
+        with transaction.atomic(using=alias):
+            counts = get_database_loader(alias)(rows, upsert, alias)
+
+        inserted += counts[0]
+        updated += counts[1]
+
+    return inserted, updated
+
+
+def get_database_loader(using: str):
+    """Returns `copy_products` on PostgreSQL, `bulk_load_products` elsewhere."""
+
+    if connections[using].vendor == "postgresql":
+        return copy_products
+
+    return bulk_load_products
+
+
+def get_product_loader(using: str):
+    """The loader of `using`, or `load_sharded_products` on sharded products."""
+
+    if is_sharded():
+        return load_sharded_products
+
+    return get_database_loader(using)
+
+
+def import_products(
+    rows, upsert=False, chunk_size=None, using=DEFAULT_DB_ALIAS, progress=None
+):
+    """Validates and loads `(line_number, row)` pairs `chunk_size` at a time.
+
+    Every chunk is loaded in its own transaction, through `COPY` on
+    PostgreSQL and `bulk_create` elsewhere. With `upsert`, a row whose
+    seller already has a product with the same `sku` updates that product
+    instead of inserting a new one; the last row wins when a chunk repeats
+    a sku. `progress` is called with the running totals after every chunk.
+
+    Returns the number of rows read, inserted and updated, and the errors
+    of the rejected rows by line number.
+    """
+
+    chunk_size = chunk_size or settings.PRODUCTS_IMPORT_CHUNK_SIZE
+    load = get_product_loader(using)
+
+    rows = iter(rows)
+    sellers = {}
+    result = {"rows": 0, "inserted": 0, "updated": 0, "errors": []}
+
+    while chunk := list(islice(rows, chunk_size)):
+        products = validate_chunk(chunk, sellers, result["errors"], using)
+
+        if upsert:
+            products = list(
+                {
+                    (data["seller_id"], data["sku"])
+                    if data["sku"]
+                    else data["id"]: data
+                    for data in products
+                }.values()
+            )
+
+        try:
+            with transaction.atomic(using=using):
+                inserted, updated = load(products, upsert, using)
+        except IntegrityError as error:
+            result["errors"].append(
+                {
+                    "line": chunk[0][0],
+                    "errors": [
+                        f"Lines {chunk[0][0]}-{chunk[-1][0]} were rolled back: {error}"
+                    ],
+                }
+            )
+        else:
+            result["inserted"] += inserted
+            result["updated"] += updated
+
+        result["rows"] += len(chunk)
+
+        if progress:
+            progress(result)
+
+    if result["inserted"] or result["updated"]:
+        invalidate_product_listing()
+
+    return result
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from products.export import EXPORT_WRITERS, iter_product_rows
+from products.models import Product
+from products.sharding import shard_queryset
+
+
+class Command(BaseCommand):
+    help = "Streams the product catalog as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=EXPORT_WRITERS, default="ndjson")
+        parser.add_argument(
+            "--output", help="File to write to, defaults to standard output."
+        )
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument(
+            "--database", help="Defaults to every shard of the products."
+        )
+
+    def handle(self, *args, **options):
+        if options["database"]:
+            queryset = Product.objects.using(options["database"])
+        else:
+            queryset = shard_queryset(Product.objects.all())
+
+        rows = iter_product_rows(queryset, options["chunk_size"])
+        lines = EXPORT_WRITERS[options["format"]](rows)
+
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as output:
+            output.writelines(lines)
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from products.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with synthetic users, sellers and products, the "
+        "same ones for the same --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument(
+            "--seller-ratio",
+            type=float,
+            default=0.1,
+            help="Share of the users that are sellers.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--password", default="1234", help="Password of every user."
+        )
+        parser.add_argument(
+            "--username-prefix",
+            default="user",
+            help="Usernames are the prefix followed by a sequence number.",
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes drawing the products while this one loads them.",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+
+        def progress(result):
+            elapsed = time.perf_counter() - started_at
+            self.stderr.write(
+                f"{result['users']} users, {result['products']} products "
+                f"({elapsed:.0f}s)"
+            )
+
+        try:
+            result = generate_dataset(
+                options["users"],
+                options["products"],
+                seller_ratio=options["seller_ratio"],
+                seed=options["seed"],
+                password=options["password"],
+                username_prefix=options["username_prefix"],
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                using=options["database"],
+                progress=progress if options["verbosity"] > 1 else None,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        except IntegrityError as error:
+            raise CommandError(
+                f"{error}. The rows of this --seed (or --username-prefix) are "
+                "already in the database, generate the dataset with other ones."
+            )
+
+        elapsed = time.perf_counter() - started_at
+        rows = result["users"] + result["products"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['users']} users ({result['sellers']} sellers) and "
+                f"{result['products']} products in {elapsed:.1f}s "
+                f"({rows / elapsed:.0f} rows/s)."
+            )
+        )
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import IMPORT_FORMATS, import_products, iter_import_rows
+
+SHOWN_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports products from a CSV or NDJSON file with a seller (username), "
+        "sku, description, price, quantity and is_active per row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='File to read, "-" for standard input.')
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="Defaults to the extension of the file.",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update the products that match a seller and sku instead of "
+            "inserting them again.",
+        )
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+
+        if format not in IMPORT_FORMATS:
+            raise CommandError("Pass --format, it can not be told from the path.")
+
+        started_at = time.perf_counter()
+
+        def progress(result):
+            elapsed = time.perf_counter() - started_at
+            self.stderr.write(
+                f"{result['rows']} rows read ({result['rows'] / elapsed:.0f} rows/s)"
+            )
+
+        if path == "-":
+            stream = nullcontext(sys.stdin)
+        else:
+            stream = open(path, encoding="utf-8", newline="")
+
+        with stream as lines:
+            result = import_products(
+                iter_import_rows(lines, format),
+                upsert=options["upsert"],
+                chunk_size=options["chunk_size"],
+                using=options["database"],
+                progress=progress if options["verbosity"] else None,
+            )
+
+        for error in result["errors"][:SHOWN_ERRORS]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['rows']} rows in {elapsed:.1f}s "
+                f"({result['rows'] / elapsed:.0f} rows/s): "
+                f"{result['inserted']} inserted, {result['updated']} updated, "
+                f"{len(result['errors'])} rejected."
+            )
+        )
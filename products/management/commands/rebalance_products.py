@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from products.sharding import rebalance_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the products that are not on the shard of their seller there, "
+        "e.g. after a shard was added to PRODUCT_SHARDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            dest="sources",
+            help="Database to move products out of, e.g. a shard removed from "
+            "PRODUCT_SHARDS. Defaults to every shard, can be repeated.",
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the products to move.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.PRODUCT_SHARDS:
+            raise CommandError("The products are not sharded, see PRODUCT_SHARDS.")
+
+        unknown = set(options["sources"] or ()) - connections.databases.keys()
+
+        if unknown:
+            raise CommandError(f"Unknown databases: {', '.join(sorted(unknown))}.")
+
+        moves = rebalance_products(
+            options["sources"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        verb = "to move" if options["dry_run"] else "moved"
+
+        for (source, target), count in sorted(moves.items()):
+            self.stdout.write(f"{source} -> {target}: {count} products {verb}")
+
+        self.stdout.write(self.style.SUCCESS(f"{sum(moves.values())} products {verb}."))
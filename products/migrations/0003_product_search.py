@@ -0,0 +1,92 @@
+from django.db import migrations
+
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE products_product
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', description)) STORED
+    """,
+    """
+    CREATE INDEX product_search_vector_idx
+    ON products_product USING gin (search_vector)
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE TABLE products_product_fts_documents (
+        id INTEGER PRIMARY KEY,
+        product_id CHAR(32) NOT NULL UNIQUE,
+        description TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE products_product_fts USING fts5(
+        description,
+        content = 'products_product_fts_documents',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER products_product_fts_insert
+    AFTER INSERT ON products_product_fts_documents BEGIN
+        INSERT INTO products_product_fts (rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_delete
+    AFTER DELETE ON products_product_fts_documents BEGIN
+        INSERT INTO products_product_fts (products_product_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_update
+    AFTER UPDATE ON products_product_fts_documents BEGIN
+        INSERT INTO products_product_fts (products_product_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO products_product_fts (rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    """
+    INSERT INTO products_product_fts_documents (product_id, description)
+    SELECT id, description FROM products_product
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS products_product_fts",
+    "DROP TABLE IF EXISTS products_product_fts_documents",
+]
+
+
+def run_for_vendor(postgresql, sqlite):
+    def operation(apps, schema_editor):
+        statements = {"postgresql": postgresql, "sqlite": sqlite}
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_product_created_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRESQL_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
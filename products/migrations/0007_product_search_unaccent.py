@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# Matches accented and unaccented spellings alike, like the
+# `remove_diacritics 2` tokenizer of the sqlite index. Needs the unaccent
+# extension (in contrib), which only a superuser or the database owner can
+# create.
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE TEXT SEARCH CONFIGURATION product_search (COPY = simple)",
+    """
+    ALTER TEXT SEARCH CONFIGURATION product_search
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple
+    """,
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector",
+    """
+    ALTER TABLE products_product
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('product_search', description)) STORED
+    """,
+    """
+    CREATE INDEX product_search_vector_idx
+    ON products_product USING gin (search_vector)
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector",
+    """
+    ALTER TABLE products_product
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', description)) STORED
+    """,
+    """
+    CREATE INDEX product_search_vector_idx
+    ON products_product USING gin (search_vector)
+    """,
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS product_search",
+]
+
+
+def run_for_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_product_sku"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_postgresql(POSTGRESQL_FORWARD),
+            run_for_postgresql(POSTGRESQL_BACKWARD),
+        ),
+    ]
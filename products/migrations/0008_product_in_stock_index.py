@@ -0,0 +1,21 @@
+# Generated by Django 4.1.2 on 2026-10-18 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0007_product_search_unaccent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("quantity__gt", 0)),
+                fields=["created_at", "id"],
+                name="product_in_stock_created_idx",
+            ),
+        ),
+    ]
@@ -8,7 +8,35 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField()
     is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    sku = models.CharField(max_length=64, null=True, blank=True)
 
     seller = models.ForeignKey(
         "users.User", on_delete=models.CASCADE, related_name="products"
     )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="product_created_id_idx"),
+            models.Index(
+                fields=["price"],
+                condition=models.Q(is_active=True),
+                name="product_active_price_idx",
+            ),
+            models.Index(
+                fields=["seller", "price"],
+                condition=models.Q(is_active=True),
+                name="product_seller_price_idx",
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_active=True, quantity__gt=0),
+                name="product_in_stock_created_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["seller", "sku"], name="product_seller_sku_unique"
+            ),
+        ]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from products.sharding import is_sharded
+
+
+class ProductCursorPagination(CursorPagination):
+    """Cursor pagination in `product_created_id_idx` order.
+
+    DRF seeks on `created_at` alone (`WHERE created_at > <cursor>`), then
+    skips with an OFFSET the rows of the page boundary's timestamp that were
+    already listed; `id` only breaks the ties of the ordering. No COUNT(*)
+    is issued, so a page costs about the same at any depth unless many
+    products share a `created_at`.
+    """
+
+    ordering = ("created_at", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ShardedOffsetPaginator(Paginator):
+    """Turns down the pages past `PRODUCT_SHARDS_MAX_OFFSET` when sharded,
+    as a `ShardedQuerySet` reads every row up to the page on every shard."""
+
+    def page(self, number):
+        number = self.validate_number(number)
+
+        if (
+            is_sharded()
+            and (number - 1) * self.per_page > settings.PRODUCT_SHARDS_MAX_OFFSET
+        ):
+            raise NotFound(
+                "Page too deep, list the products with ?pagination=cursor instead."
+            )
+
+        return super().page(number)
+
+
+class ProductPageNumberPagination(PageNumberPagination):
+    django_paginator_class = ShardedOffsetPaginator
@@ -16,4 +16,4 @@ class IsSellerProductOwner(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return request.user.is_authenticated and request.user.id == obj.seller.id
+        return request.user.is_authenticated and request.user.id == obj.seller_id
@@ -0,0 +1,26 @@
+import json
+
+from rest_framework import renderers
+
+
+class ExportRenderer(renderers.BaseRenderer):
+    """Negotiates an export format for `ProductExportView`.
+
+    Successful exports are streamed by the view itself; the renderer only
+    ever renders error payloads, as a single JSON document.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
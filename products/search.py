@@ -0,0 +1,122 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F, QuerySet
+from django.db.models.expressions import RawSQL
+
+from products.models import Product
+
+# The unaccented `simple` configuration of migration 0007.
+SEARCH_CONFIG = "product_search"
+
+FTS_TABLE = "products_product_fts"
+FTS_DOCUMENTS_TABLE = "products_product_fts_documents"
+
+
+class PostgreSQLSearchBackend:
+    """Ranks against the generated `search_vector` column and its GIN index.
+
+    The column is computed by PostgreSQL from `description`, so it never
+    needs to be written by the application.
+    """
+
+    def search(self, queryset: QuerySet, terms: str) -> QuerySet:
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVectorField,
+        )
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type="websearch")
+        document = RawSQL(
+            f'"{Product._meta.db_table}"."search_vector"',
+            [],
+            output_field=SearchVectorField(),
+        )
+
+        return (
+            queryset.alias(document=document)
+            .filter(document=query)
+            .annotate(search_rank=SearchRank(F("document"), query))
+            .order_by("-search_rank", *queryset.query.order_by)
+        )
+
+    def index(self, products, using: str) -> None:
+        pass
+
+    def remove(self, product_ids, using: str) -> None:
+        pass
+
+
+class SQLiteSearchBackend:
+    """Falls back to an FTS5 index on sqlite.
+
+    `FTS_DOCUMENTS_TABLE` is the external content table of `FTS_TABLE`;
+    its triggers keep the FTS5 index in step, so indexing a product is a
+    single upsert keyed on the product id.
+    """
+
+    def search(self, queryset: QuerySet, terms: str) -> QuerySet:
+        match = " ".join('"%s"' % term.replace('"', '""') for term in terms.split())
+
+        if not match:
+            return queryset.none()
+
+        matching_ids = RawSQL(
+            f"SELECT documents.product_id FROM {FTS_TABLE} "
+            f"JOIN {FTS_DOCUMENTS_TABLE} documents "
+            f"ON documents.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s",
+            [match],
+        )
+
+        return queryset.filter(id__in=matching_ids)
+
+    def index(self, products, using: str) -> None:
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_DOCUMENTS_TABLE} (product_id, description) "
+                "VALUES (%s, %s) ON CONFLICT (product_id) DO UPDATE "
+                "SET description = excluded.description "
+                "WHERE description IS NOT excluded.description",
+                [(product.pk.hex, product.description) for product in products],
+            )
+
+    def remove(self, product_ids, using: str) -> None:
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_DOCUMENTS_TABLE} WHERE product_id = %s",
+                [(product_id.hex,) for product_id in product_ids],
+            )
+
+
+class FallbackSearchBackend:
+    def search(self, queryset: QuerySet, terms: str) -> QuerySet:
+        return queryset.filter(description__icontains=terms)
+
+    def index(self, products, using: str) -> None:
+        pass
+
+    def remove(self, product_ids, using: str) -> None:
+        pass
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgreSQLSearchBackend(),
+    "sqlite": SQLiteSearchBackend(),
+}
+
+
+def get_search_backend(using: str = DEFAULT_DB_ALIAS):
+    vendor = connections[using].vendor
+    return SEARCH_BACKENDS.get(vendor, FallbackSearchBackend())
+
+
+def search_products(queryset: QuerySet, terms: str) -> QuerySet:
+    return get_search_backend(queryset.db).search(queryset, terms.strip())
+
+
+def index_products(products, using: str = DEFAULT_DB_ALIAS) -> None:
+    get_search_backend(using).index(products, using)
+
+
+def remove_products(product_ids, using: str = DEFAULT_DB_ALIAS) -> None:
+    get_search_backend(using).remove(product_ids, using)
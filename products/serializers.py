@@ -1,11 +1,25 @@
 from rest_framework import serializers
 from .models import Product
 from users.serializers import SellerSerializer
+from utils.serializers import (
+    SparseFieldsetSerializerMixin,
+    TimedSerializerMixin,
+    ValuesSerializer,
+)
 
 
-class ProductDetailedSerializer(serializers.ModelSerializer):
+class ProductDetailedSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     seller = SellerSerializer(read_only=True)
 
+    def create(self, validated_data):
+        # Saved as an instance, which the router sends to the shard of its
+        # seller (see `products.sharding`): `Product.objects.create()` picks
+        # the database before the product exists.
+        product = Product(**validated_data)
+        product.save(force_insert=True)
+
+        return product
+
     class Meta:
         model = Product
         fields = [
@@ -18,7 +32,9 @@ class ProductDetailedSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductGeneralSerializer(serializers.ModelSerializer):
+class ProductGeneralSerializer(
+    TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Product
         fields = [
@@ -29,9 +45,12 @@ class ProductGeneralSerializer(serializers.ModelSerializer):
             "is_active",
             "seller",
         ]
+        expandable_fields = {"seller": SellerSerializer}
 
 
-class ProductFilterSerializer(serializers.ModelSerializer):
+class ProductFilterSerializer(
+    TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     seller = SellerSerializer(read_only=True)
 
     class Meta:
@@ -43,4 +62,70 @@ class ProductFilterSerializer(serializers.ModelSerializer):
             "is_active",
             "seller",
         ]
+        # Always expanded.
+        expandable_fields = {"seller": SellerSerializer}
+
+
+ProductGeneralValuesSerializer = ValuesSerializer(ProductGeneralSerializer)
+ProductFilterValuesSerializer = ValuesSerializer(ProductFilterSerializer)
+
+
+class ProductListQuerySerializer(serializers.Serializer):
+    price_min = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    price_max = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    in_stock = serializers.BooleanField(required=False)
+    is_active = serializers.BooleanField(required=False)
+    seller = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        price_min = attrs.get("price_min")
+        price_max = attrs.get("price_max")
+
+        if price_min is not None and price_max is not None and price_min > price_max:
+            raise serializers.ValidationError(
+                {"price_max": "Ensure this value is greater than price_min."}
+            )
+
+        return attrs
+
+
+class ProductInventorySerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    quantity = serializers.IntegerField(min_value=0, required=False)
+    is_active = serializers.BooleanField(required=False)
+
+
+class StockReservationItemSerializer(serializers.Serializer):
+    product = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class StockReservationSerializer(serializers.Serializer):
+    items = StockReservationItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        quantities = {}
+
+        for item in items:
+            quantities.setdefault(item["product"], 0)
+            quantities[item["product"]] += item["quantity"]
+
+        return quantities
+
 
+class ProductImportSerializer(serializers.Serializer):
+    seller = serializers.CharField(max_length=150)
+    sku = serializers.CharField(
+        max_length=64, required=False, allow_null=True, allow_blank=True
+    )
+    description = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    quantity = serializers.IntegerField(min_value=0)
+    is_active = serializers.BooleanField(default=True)
@@ -0,0 +1,212 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, router, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from products.cache import invalidate_product_listing
+from products.models import Product
+from products.search import index_products
+from products.sharding import get_product_shards, get_shard, shard_queryset
+from products.serializers import (
+    ProductDetailedSerializer,
+    ProductInventorySerializer,
+)
+
+STOCK_LOCK_MODES = ("conditional", "select_for_update", "nowait")
+
+
+class InsufficientStock(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Not enough stock for the requested products."
+    default_code = "insufficient_stock"
+
+
+class StockLocked(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The requested products are being reserved, try again."
+    default_code = "stock_locked"
+
+
+def bulk_create_products(seller, items, batch_size=None):
+    """Validates `items` and inserts the valid ones for `seller`.
+
+    A single serializer instance validates every item, so the per-request
+    serializer setup is paid once per batch instead of once per product.
+    Rows are inserted with `bulk_create` in chunks of `batch_size` inside
+    one transaction. Returns the created products (paired with their index
+    in `items`) and the validation errors of the rejected ones.
+    """
+
+    batch_size = batch_size or settings.PRODUCTS_BULK_CREATE_BATCH_SIZE
+    serializer = ProductDetailedSerializer()
+    created, errors = [], []
+
+    for index, item in enumerate(items):
+        try:
+            validated_data = serializer.run_validation(item)
+        except ValidationError as error:
+            errors.append({"index": index, "errors": error.detail})
+            continue
+
+        created.append((index, Product(**validated_data, seller=seller)))
+
+    products = [product for _, product in created]
+    using = get_shard(seller.pk)
+
+    with transaction.atomic(using=using):
+        Product.objects.using(using).bulk_create(products, batch_size=batch_size)
+        index_products(products, using)
+        invalidate_product_listing()
+
+    return created, errors
+
+
+def bulk_update_inventory(seller, items, batch_size=None):
+    """Applies `{id, price, quantity, is_active}` changes owned by `seller`.
+
+    Ownership of every referenced product is read with one query, and the
+    changes are written back with a `bulk_update` per set of changed
+    fields: a product is only written the fields its items set, so a
+    concurrent change of another field (e.g. a stock reservation) is kept.
+    Returns the updated ids, the ids that do not exist, the ids that belong
+    to another seller and the validation errors by item index.
+    """
+
+    batch_size = batch_size or settings.PRODUCTS_BULK_UPDATE_BATCH_SIZE
+    serializer = ProductInventorySerializer()
+    changes, errors = {}, []
+
+    for index, item in enumerate(items):
+        try:
+            validated_data = serializer.run_validation(item)
+        except ValidationError as error:
+            errors.append({"index": index, "errors": error.detail})
+            continue
+
+        changes.setdefault(validated_data.pop("id"), {}).update(validated_data)
+
+    products = (
+        shard_queryset(Product.objects.all()).filter(id__in=changes).only("seller_id")
+    )
+    found = {product.id: product for product in products}
+
+    unknown = [product_id for product_id in changes if product_id not in found]
+    not_owned = [
+        product_id
+        for product_id, product in found.items()
+        if product.seller_id != seller.id
+    ]
+
+    updated = []
+    updated_at = timezone.now()
+    # By shard (when the products are sharded) and changed fields.
+    groups = {}
+
+    for product_id, product in found.items():
+        if product.seller_id != seller.id:
+            continue
+
+        for field, value in changes[product_id].items():
+            setattr(product, field, value)
+
+        product.updated_at = updated_at
+        updated.append(product)
+
+        using = router.db_for_write(Product, instance=product)
+        fields = tuple(sorted(changes[product_id])) + ("updated_at",)
+        groups.setdefault((using, fields), []).append(product)
+
+    for (using, fields), products in groups.items():
+        Product.objects.using(using).bulk_update(
+            products, fields, batch_size=batch_size
+        )
+
+    if updated:
+        invalidate_product_listing()
+
+    return {
+        "updated": [product.id for product in updated],
+        "unknown": unknown,
+        "not_owned": not_owned,
+        "errors": errors,
+    }
+
+
+def reserve_stock(items, lock_mode=None):
+    """Atomically decrements stock for `{product_id: quantity}`.
+
+    Every product is reserved or none is. Rows are touched in primary key
+    order so concurrent multi-product reservations always lock in the same
+    order and cannot deadlock each other.
+
+    `lock_mode` (default `PRODUCTS_STOCK_LOCK_MODE`) picks the strategy:
+    "conditional" issues one `UPDATE ... WHERE quantity >= n` per product,
+    "select_for_update" locks the rows first and "nowait" does the same but
+    fails fast when another transaction holds the lock.
+
+    On sharded products, there is a transaction on each shard holding some
+    of them, opened in alias order and committed one after the other at the
+    end: an error rolls all of them back, but without a two-phase commit, a
+    commit that fails after another one went through leaves that shard's
+    reservations in place.
+    """
+
+    lock_mode = lock_mode or settings.PRODUCTS_STOCK_LOCK_MODE
+
+    if lock_mode not in STOCK_LOCK_MODES:
+        raise ValueError(f"Unknown stock lock mode {lock_mode!r}.")
+
+    ordered_items = sorted(items.items())
+    updated_at = timezone.now()
+    # The shard of each product, none when not sharded.
+    shards = get_product_shards(items)
+    databases = sorted(set(shards.values())) or [None]
+
+    with ExitStack() as stack:
+        for using in databases:
+            stack.enter_context(transaction.atomic(using=using))
+
+        if lock_mode == "conditional":
+            for product_id, quantity in ordered_items:
+                reserved = (
+                    Product.objects.using(shards.get(product_id))
+                    .filter(pk=product_id, is_active=True, quantity__gte=quantity)
+                    .update(quantity=F("quantity") - quantity, updated_at=updated_at)
+                )
+
+                if not reserved:
+                    raise InsufficientStock({"product": product_id})
+
+            invalidate_product_listing()
+            return
+
+        available = {}
+
+        for using in databases:
+            products = (
+                Product.objects.using(using)
+                .select_for_update(nowait=lock_mode == "nowait")
+                .filter(pk__in=items, is_active=True)
+            )
+
+            try:
+                available.update(products.order_by("pk").values_list("pk", "quantity"))
+            except DatabaseError:
+                if lock_mode != "nowait":
+                    raise
+                raise StockLocked()
+
+        for product_id, quantity in ordered_items:
+            if available.get(product_id, 0) < quantity:
+                raise InsufficientStock({"product": product_id})
+
+        for product_id, quantity in ordered_items:
+            Product.objects.using(shards.get(product_id)).filter(pk=product_id).update(
+                quantity=F("quantity") - quantity, updated_at=updated_at
+            )
+
+        invalidate_product_listing()
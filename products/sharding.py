@@ -0,0 +1,513 @@
+"""Shards the products across databases by a hash of their seller.
+
+`PRODUCT_SHARDS` lists the database aliases the catalog is split across.
+The products of a seller all live on one of them, picked by rendezvous
+hashing of the seller id (`get_shard()`): adding a shard only moves the
+sellers that now hash to it, and `rebalance_products` moves them.
+
+The users table stays on "default" and is copied to every shard
+(`replicate_users()`, on every save of a field products show of their
+seller), so products keep their foreign key and the seller joins of the
+product reads run on the shard.
+
+`ProductShardRouter` sends product writes to the shard of their seller.
+Reads go through `shard_queryset()`: the `ShardedQuerySet` it returns runs
+a query on every shard and merges their rows on its ordering, or runs it on
+a single shard once filtered by seller. Without `PRODUCT_SHARDS`, products
+stay on "default" and `shard_queryset()` returns querysets unchanged.
+"""
+
+import hashlib
+import heapq
+import uuid
+from itertools import chain, islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Max, Min, Sum
+
+from products.models import Product
+from users.models import User
+
+SELLER_LOOKUPS = frozenset({"seller", "seller_id", "seller__id", "seller__pk"})
+
+# How the aggregates of the shards add up to the aggregate of the catalog.
+AGGREGATE_MERGES = {
+    Count: sum,
+    Sum: sum,
+    Max: max,
+    Min: min,
+}
+
+
+def is_sharded() -> bool:
+    return bool(settings.PRODUCT_SHARDS)
+
+
+def get_shard_weight(alias: str, seller_id) -> int:
+    key = f"{alias}:{uuid.UUID(str(seller_id))}".encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def get_shard(seller_id, shards=None) -> str:
+    """The database holding the products of the seller `seller_id`.
+
+    Each shard weighs a hash of its alias and the seller id, and the
+    heaviest one wins: the choice does not depend on the order or the
+    number of the other shards.
+    """
+
+    shards = settings.PRODUCT_SHARDS if shards is None else shards
+
+    if not shards:
+        return DEFAULT_DB_ALIAS
+
+    return max(shards, key=lambda alias: get_shard_weight(alias, seller_id))
+
+
+def get_replicated_fields() -> list:
+    return [
+        field.attname for field in User._meta.concrete_fields if not field.primary_key
+    ]
+
+
+def replicate_users(users) -> None:
+    """Copies (or updates) `users` on every shard but "default"."""
+
+    fields = get_replicated_fields()
+    copies = [
+        User(pk=user.pk, **{name: getattr(user, name) for name in fields})
+        for user in users
+    ]
+
+    if not copies:
+        return
+
+    for alias in settings.PRODUCT_SHARDS:
+        if alias == DEFAULT_DB_ALIAS:
+            continue
+
+        User.objects.using(alias).bulk_create(
+            copies, update_conflicts=True, unique_fields=["id"], update_fields=fields
+        )
+
+
+def remove_replicated_user(user_id) -> None:
+    """Deletes the copies of a user, and so their products, from the shards."""
+
+    for alias in settings.PRODUCT_SHARDS:
+        if alias != DEFAULT_DB_ALIAS:
+            User.objects.using(alias).filter(pk=user_id).delete()
+
+
+class ProductShardRouter:
+    """Routes the products (and the relations of their sellers) to their shard.
+
+    Only used with `PRODUCT_SHARDS`, and only for queries with an instance
+    to route by: the others fall through to the next router. So products
+    are created with `save()` on the instance, through a seller
+    (`seller.products.create()`) or with `using(get_shard(seller_id))`;
+    `Product.objects.create()` picks the database before the product
+    exists and writes to "default".
+    """
+
+    def get_shard(self, model, instance):
+        if not is_sharded() or model is not Product or instance is None:
+            return None
+
+        if isinstance(instance, User):
+            # E.g. `seller.products`.
+            return get_shard(instance.pk)
+
+        if instance._state.db and not instance._state.adding:
+            # Where it was read, even halfway through a rebalancing.
+            return instance._state.db
+
+        return get_shard(instance.seller_id)
+
+    def db_for_read(self, model, **hints):
+        return self.get_shard(model, hints.get("instance"))
+
+    def db_for_write(self, model, **hints):
+        return self.get_shard(model, hints.get("instance"))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every shard has a copy of the users.
+        if is_sharded() and {type(obj1), type(obj2)} == {Product, User}:
+            return True
+
+        return None
+
+
+def get_ordering(queryset) -> list:
+    """`(name, descending)` pairs of the `order_by()` of `queryset`."""
+
+    return [
+        (name.lstrip("-"), name.startswith("-")) for name in queryset.query.order_by
+    ]
+
+
+class SortKey:
+    """Compares rows on an ordering mixing ascending and descending fields."""
+
+    __slots__ = ("values", "descending")
+
+    def __init__(self, values, descending):
+        self.values = values
+        self.descending = descending
+
+    def __lt__(self, other):
+        for value, other_value, descending in zip(
+            self.values, other.values, self.descending
+        ):
+            if value != other_value:
+                return value > other_value if descending else value < other_value
+
+        return False
+
+
+class ShardedQuerySet:
+    """A product query over every shard of the catalog.
+
+    Supports what the product views, their paginators and the services do
+    with a queryset. Chained calls apply to the queryset of every shard,
+    and a filter on the seller drops every shard but theirs. Rows are read
+    from each shard in the order of the query and merged with a k-way
+    merge (`heapq.merge`), so a slice `[start:stop]` reads at most `stop`
+    rows of every shard, and `iterator()` streams them. Deep offsets thus
+    cost `stop` rows per shard: listings page with cursors instead, and
+    stop page numbers at `PRODUCT_SHARDS_MAX_OFFSET` (see
+    `products.pagination`).
+
+    `values()`, `values_list()` and `only()` also select the ordering
+    fields, which the merge compares. `values_list()` rows leave them out
+    again, `values()` rows keep them.
+    """
+
+    chained = frozenset(
+        {
+            "all",
+            "alias",
+            "annotate",
+            "defer",
+            "distinct",
+            "exclude",
+            "none",
+            "order_by",
+            "prefetch_related",
+            "select_related",
+        }
+    )
+
+    def __init__(self, querysets, fields=None):
+        self.querysets = list(querysets)
+        # The `values_list()` fields, ordering fields last.
+        self.fields = fields
+
+    def __getattr__(self, name):
+        if name not in self.chained:
+            raise AttributeError(name)
+
+        def chain_call(*args, **kwargs):
+            return self.clone(
+                getattr(queryset, name)(*args, **kwargs) for queryset in self.querysets
+            )
+
+        return chain_call
+
+    def clone(self, querysets, fields=None):
+        return ShardedQuerySet(querysets, fields or self.fields)
+
+    @property
+    def model(self):
+        return self.querysets[0].model
+
+    @property
+    def query(self):
+        return self.querysets[0].query
+
+    @property
+    def db(self) -> str:
+        return self.querysets[0].db
+
+    @property
+    def ordered(self) -> bool:
+        return self.querysets[0].ordered
+
+    def filter(self, *args, **kwargs):
+        querysets = self.querysets
+        sellers = {
+            getattr(value, "pk", value)
+            for name, value in kwargs.items()
+            if name in SELLER_LOOKUPS
+        }
+
+        if len(sellers) == 1:
+            shard = get_shard(*sellers)
+            querysets = [
+                queryset for queryset in querysets if queryset.db == shard
+            ] or [querysets[0].none()]
+
+        return self.clone(queryset.filter(*args, **kwargs) for queryset in querysets)
+
+    def get_ordering_fields(self, fields) -> list:
+        return [name for name, _ in get_ordering(self) if name not in fields]
+
+    def values(self, *fields, **expressions):
+        fields = [*fields, *self.get_ordering_fields([*fields, *expressions])]
+
+        return self.clone(
+            queryset.values(*fields, **expressions) for queryset in self.querysets
+        )
+
+    def values_list(self, *fields):
+        selected = [*fields, *self.get_ordering_fields(fields)]
+
+        return self.clone(
+            (queryset.values_list(*selected) for queryset in self.querysets),
+            (selected, len(fields)),
+        )
+
+    def only(self, *fields):
+        model_fields = {field.name for field in Product._meta.concrete_fields}
+        fields = [
+            *fields,
+            *(
+                name
+                for name in self.get_ordering_fields(fields)
+                if name in model_fields or name == "pk"
+            ),
+        ]
+
+        return self.clone(queryset.only(*fields) for queryset in self.querysets)
+
+    def get_sort_key(self):
+        ordering = get_ordering(self)
+
+        if not ordering:
+            return None
+
+        names = [name for name, _ in ordering]
+        descending = tuple(descending for _, descending in ordering)
+
+        if self.fields:
+            positions = [self.fields[0].index(name) for name in names]
+            values = lambda row: tuple(row[position] for position in positions)
+        elif self.query.values_select:
+            values = lambda row: tuple(row[name] for name in names)
+        else:
+            values = lambda row: tuple(getattr(row, name) for name in names)
+
+        if not any(descending):
+            return values
+
+        return lambda row: SortKey(values(row), descending)
+
+    def merge(self, iterables):
+        key = self.get_sort_key()
+        rows = chain(*iterables) if key is None else heapq.merge(*iterables, key=key)
+
+        return self.strip(rows)
+
+    def strip(self, rows):
+        """Drops the ordering fields `values_list()` added from its rows."""
+
+        if not self.fields or len(self.fields[0]) == self.fields[1]:
+            return rows
+
+        visible = self.fields[1]
+
+        return (row[:visible] for row in rows)
+
+    def __iter__(self):
+        return self.merge(self.querysets)
+
+    def iterator(self, chunk_size=None):
+        return self.merge(
+            queryset.iterator(chunk_size=chunk_size) for queryset in self.querysets
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            if index < 0:
+                raise ValueError("Negative indexing is not supported.")
+
+            try:
+                return self[index : index + 1][0]
+            except IndexError:
+                raise IndexError("Index out of range.") from None
+
+        if index.step is not None or (index.start or 0) < 0 or index.stop is None:
+            raise ValueError("Only slices with a start and a stop are supported.")
+
+        stop = index.stop
+        rows = self.merge(queryset[:stop] for queryset in self.querysets)
+
+        return list(islice(rows, index.start, stop))
+
+    def count(self) -> int:
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def exists(self) -> bool:
+        return any(queryset.exists() for queryset in self.querysets)
+
+    def aggregate(self, **aggregates) -> dict:
+        results = [queryset.aggregate(**aggregates) for queryset in self.querysets]
+        merged = {}
+
+        for name, aggregate in aggregates.items():
+            merge = AGGREGATE_MERGES.get(type(aggregate))
+
+            if merge is None:
+                raise NotImplementedError(
+                    f"{type(aggregate).__name__} can not be merged across shards."
+                )
+
+            values = [result[name] for result in results if result[name] is not None]
+            merged[name] = merge(values) if values else None
+
+        return merged
+
+    def get(self, *args, **kwargs):
+        """Looks for the object shard by shard, until one has it."""
+
+        for queryset in self.filter(*args, **kwargs).querysets:
+            try:
+                row = queryset.get()
+            except Product.DoesNotExist:
+                continue
+
+            [row] = self.strip([row])
+
+            return row
+
+        raise Product.DoesNotExist("Product matching query does not exist.")
+
+    def first(self):
+        key = self.get_sort_key()
+        rows = []
+
+        for queryset in self.querysets:
+            row = queryset.first()
+
+            if row is not None and key is None:
+                rows = [row]
+                break
+
+            if row is not None:
+                rows.append(row)
+
+        rows = list(self.merge([[row] for row in rows]))
+
+        return rows[0] if rows else None
+
+
+def shard_queryset(queryset):
+    """`queryset` over every shard, or `queryset` itself when not sharded."""
+
+    if not is_sharded():
+        return queryset
+
+    return ShardedQuerySet(queryset.using(alias) for alias in settings.PRODUCT_SHARDS)
+
+
+def get_product_shards(product_ids) -> dict:
+    """Maps the ids of the existing products to the shard holding them."""
+
+    if not is_sharded():
+        return {}
+
+    return {
+        product_id: alias
+        for alias in settings.PRODUCT_SHARDS
+        for product_id in Product.objects.using(alias)
+        .filter(pk__in=product_ids)
+        .values_list("pk", flat=True)
+    }
+
+
+def move_products(queryset, target: str, batch_size=None) -> int:
+    """Moves the products of `queryset` to the database `target`.
+
+    Batches are copied with raw saves (which keep their timestamps and
+    update the copies an interrupted run left behind), committed on
+    `target`, and only then deleted from the source, inside a transaction
+    that locks them there. A failure leaves products on both databases,
+    never on neither, and running again finishes the move.
+    """
+
+    batch_size = batch_size or settings.PRODUCTS_BULK_CREATE_BATCH_SIZE
+    source = queryset.db
+    moved = 0
+
+    while True:
+        with transaction.atomic(using=source):
+            products = list(queryset.select_for_update()[:batch_size])
+
+            if not products:
+                return moved
+
+            with transaction.atomic(using=target):
+                for product in products:
+                    product.save_base(raw=True, using=target)
+
+            Product.objects.using(source).filter(
+                pk__in=[product.pk for product in products]
+            ).delete()
+
+        moved += len(products)
+
+
+def rebalance_products(sources=None, batch_size=None, dry_run=False) -> dict:
+    """Moves the products on `sources` (the shards by default) that are not
+    on the shard of their seller there.
+
+    Copies the users to every shard first, e.g. to a new one. Returns the
+    number of products moved (or to move, with `dry_run`) by `(source,
+    target)` pair.
+    """
+
+    batch_size = batch_size or settings.PRODUCTS_BULK_CREATE_BATCH_SIZE
+    moves = {}
+
+    if not dry_run:
+        users = User.objects.using(DEFAULT_DB_ALIAS).iterator(chunk_size=batch_size)
+
+        while batch := list(islice(users, batch_size)):
+            replicate_users(batch)
+
+    for source in sources or settings.PRODUCT_SHARDS:
+        seller_ids = list(
+            Product.objects.using(source)
+            .order_by()
+            .values_list("seller_id", flat=True)
+            .distinct()
+        )
+
+        for seller_id in seller_ids:
+            target = get_shard(seller_id)
+
+            if target == source:
+                continue
+
+            products = Product.objects.using(source).filter(seller_id=seller_id)
+
+            if dry_run:
+                moved = products.count()
+            else:
+                moved = move_products(products, target, batch_size)
+
+            moves[source, target] = moves.get((source, target), 0) + moved
+
+    return moves
+
+
+class ShardedQuerySetMixin:
+    """Runs the queryset of a product view over the shards.
+
+    Listed after the mixins that refine the queryset (e.g. with `only()`),
+    which then apply to every shard.
+    """
+
+    def get_queryset(self):
+        return shard_queryset(super().get_queryset())
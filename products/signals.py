@@ -0,0 +1,63 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.cache import invalidate_product_listing
+from products.models import Product
+from products.search import index_products, remove_products
+from products.sharding import remove_replicated_user, replicate_users
+from users.models import User
+from users.serializers import SellerSerializer
+
+# What listings with `?expand=seller` show of a seller.
+SELLER_FIELDS = frozenset(SellerSerializer.Meta.fields) | {"updated_at"}
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is None or "description" in update_fields:
+        index_products([instance], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def remove_deleted_product(sender, instance, using, **kwargs):
+    remove_products([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_listing_cache(sender, **kwargs):
+    invalidate_product_listing()
+
+
+@receiver(post_save, sender=User)
+def invalidate_listing_cache_for_seller(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    # New accounts own no products yet; deleted ones take theirs along,
+    # which invalidates through the product signals.
+    if created or (update_fields and update_fields.isdisjoint(SELLER_FIELDS)):
+        return
+
+    invalidate_product_listing()
+
+
+@receiver(post_save, sender=User)
+def replicate_saved_user(
+    sender, instance, created, using, update_fields=None, **kwargs
+):
+    # The copies on the shards are written without signals, and only kept up
+    # to date with what products show of their seller.
+    if using != DEFAULT_DB_ALIAS or (
+        not created and update_fields and update_fields.isdisjoint(SELLER_FIELDS)
+    ):
+        return
+
+    replicate_users([instance])
+
+
+@receiver(post_delete, sender=User)
+def remove_deleted_user(sender, instance, using, **kwargs):
+    # Takes the products of the user along, on every shard.
+    if using == DEFAULT_DB_ALIAS:
+        remove_replicated_user(instance.pk)
@@ -0,0 +1,12 @@
+import tempfile
+
+from django.conf import settings
+
+# Keeps the tests off the listing cache of the server run from this tree.
+LISTING_CACHES = {
+    **settings.CACHES,
+    "products": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(),
+    },
+}
@@ -0,0 +1,244 @@
+import io
+import json
+import os
+import tempfile
+import uuid
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from products.dataset import DatasetGenerator
+from products.models import Product
+from products.search import search_products
+from users.models import User
+
+
+class TestExportProductsCommand(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        seller = User.objects.create_user(
+            username="logan", first_name="logan", last_name="mattos", is_seller=True
+        )
+
+        cls.products = [
+            Product.objects.create(
+                description=f"produto {index}", price="10.00", quantity=1, seller=seller
+            )
+            for index in range(5)
+        ]
+
+    def test_export_streams_every_product(self):
+        output = io.StringIO()
+
+        call_command("export_products", "--chunk-size", "2", stdout=output)
+
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertListEqual(
+            [row["id"] for row in rows], [str(product.id) for product in self.products]
+        )
+
+
+class TestImportProductsCommand(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(
+            username="logan", first_name="logan", last_name="mattos", is_seller=True
+        )
+        User.objects.create_user(
+            username="kamila", first_name="kamila", last_name="mattos"
+        )
+
+    def write_file(self, suffix, content):
+        descriptor, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.remove, path)
+
+        with os.fdopen(descriptor, "w") as file:
+            file.write(content)
+
+        return path
+
+    def import_file(self, path, *args):
+        output, errors = io.StringIO(), io.StringIO()
+
+        call_command(
+            "import_products",
+            path,
+            *args,
+            "--chunk-size",
+            "2",
+            stdout=output,
+            stderr=errors,
+        )
+
+        return output.getvalue(), errors.getvalue()
+
+    def test_import_csv(self):
+        path = self.write_file(
+            ".csv",
+            "seller,sku,description,price,quantity,is_active\n"
+            'logan,A-1,"caderno, azul",10.50,3,true\n'
+            "logan,,lapis preto,1.25,10,false\n"
+            "logan,A-3,borracha,0.75,0,true\n",
+        )
+
+        output, _ = self.import_file(path)
+
+        self.assertIn("3 inserted, 0 updated, 0 rejected", output)
+
+        product = Product.objects.get(sku="A-1")
+        self.assertEqual(product.seller, self.seller)
+        self.assertEqual(product.description, "caderno, azul")
+        self.assertEqual(str(product.price), "10.50")
+        self.assertFalse(Product.objects.get(description="lapis preto").is_active)
+        self.assertEqual(
+            search_products(Product.objects.all(), "caderno").get(), product
+        )
+
+    def test_import_reports_rejected_rows(self):
+        path = self.write_file(
+            ".ndjson",
+            "\n".join(
+                [
+                    json.dumps(
+                        {
+                            "seller": "logan",
+                            "description": "a",
+                            "price": "1.00",
+                            "quantity": 1,
+                        }
+                    ),
+                    json.dumps(
+                        {
+                            "seller": "kamila",
+                            "description": "b",
+                            "price": "1.00",
+                            "quantity": 1,
+                        }
+                    ),
+                    json.dumps(
+                        {
+                            "seller": "logan",
+                            "description": "c",
+                            "price": "x",
+                            "quantity": 1,
+                        }
+                    ),
+                    "{not json",
+                ]
+            ),
+        )
+
+        output, errors = self.import_file(path)
+
+        self.assertIn("1 inserted, 0 updated, 3 rejected", output)
+        self.assertIn('line 2: {"seller": ["Not found."]}', errors)
+        self.assertIn('line 3: {"price"', errors)
+        self.assertIn("line 4:", errors)
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_upsert_updates_products_by_seller_sku(self):
+        product = Product.objects.create(
+            description="caderno",
+            price="10.00",
+            quantity=1,
+            sku="A-1",
+            seller=self.seller,
+        )
+        path = self.write_file(
+            ".ndjson",
+            "\n".join(
+                json.dumps(row)
+                for row in [
+                    {
+                        "seller": "logan",
+                        "sku": "A-1",
+                        "description": "caderno azul",
+                        "price": "12.00",
+                        "quantity": 5,
+                    },
+                    {
+                        "seller": "logan",
+                        "sku": "A-2",
+                        "description": "lapis",
+                        "price": "1.00",
+                        "quantity": 1,
+                    },
+                    {
+                        "seller": "logan",
+                        "sku": "A-1",
+                        "description": "caderno verde",
+                        "price": "13.00",
+                        "quantity": 7,
+                    },
+                ]
+            ),
+        )
+
+        output, _ = self.import_file(path, "--upsert")
+
+        self.assertIn("1 inserted, 2 updated, 0 rejected", output)
+        self.assertEqual(Product.objects.count(), 2)
+
+        product.refresh_from_db()
+        self.assertEqual(product.description, "caderno verde")
+        self.assertEqual(product.quantity, 7)
+        self.assertEqual(search_products(Product.objects.all(), "verde").get(), product)
+
+
+class TestGenerateDatasetCommand(TestCase):
+    def generate(self, *args):
+        output = io.StringIO()
+        call_command("generate_dataset", *args, stdout=output, stderr=io.StringIO())
+
+        return output.getvalue()
+
+    def test_generate_users_and_products(self):
+        self.generate("--users", "50", "--products", "300", "--batch-size", "64")
+
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Product.objects.count(), 300)
+        self.assertTrue(User.objects.get(username="user0").check_password("1234"))
+        self.assertEqual(Product.objects.filter(seller__is_seller=False).count(), 0)
+        self.assertEqual(Product.objects.values("sku").distinct().count(), 300)
+
+    def test_generate_products_for_existing_sellers(self):
+        seller = User.objects.create_user(
+            username="logan", first_name="logan", last_name="mattos", is_seller=True
+        )
+
+        self.generate("--users", "0", "--products", "20")
+
+        product = seller.products.first()
+        word = product.description.split()[0]
+
+        self.assertEqual(seller.products.count(), 20)
+        self.assertIn(product, search_products(Product.objects.all(), word))
+
+    def test_generate_more_products_with_another_seed(self):
+        self.generate("--users", "5", "--products", "20", "--seller-ratio", "1")
+        self.generate("--users", "0", "--products", "20", "--seed", "1")
+
+        self.assertEqual(Product.objects.count(), 40)
+
+        with self.assertRaises(CommandError):
+            self.generate("--users", "0", "--products", "20", "--seed", "1")
+
+        self.assertEqual(Product.objects.count(), 40)
+
+    def test_generate_without_sellers_fails(self):
+        with self.assertRaises(CommandError):
+            self.generate("--users", "0", "--products", "20")
+
+    def test_same_seed_generates_same_products(self):
+        seller_ids = [uuid.uuid4() for _ in range(10)]
+        batches = []
+
+        for seed in (1, 1, 2):
+            generator = DatasetGenerator(seed)
+            generator.set_sellers(seller_ids)
+            batches.append(generator.product_batch(3, 100, 1000))
+
+        self.assertEqual(batches[0], batches[1])
+        self.assertNotEqual(batches[0], batches[2])
+        self.assertEqual(batches[0][0]["sku"], "1-0000000300")
@@ -0,0 +1,153 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.db import OperationalError, connections
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from utils.db.pool import clear_pools
+
+
+class TestConnectionPool(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(clear_pools, "pooled")
+        self.path = Path(directory.name) / "pooled.sqlite3"
+
+    def get_wrapper(self, **pool):
+        """A pooled SQLite connection wrapper on the temporary database."""
+
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "ENGINE": "utils.db.sqlite3",
+            "NAME": str(self.path),
+            "POOL": {"MAX_SIZE": 2, "TIMEOUT": 0.5, **pool},
+        }
+
+        return load_backend("utils.db.sqlite3").DatabaseWrapper(
+            settings_dict, alias="pooled"
+        )
+
+    def checkout(self, wrapper):
+        wrapper.ensure_connection()
+        return wrapper.connection
+
+    def in_thread(self, func):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(func()))
+        thread.start()
+        thread.join()
+
+        return results[0]
+
+    def test_closed_connections_are_reused(self):
+        wrapper = self.get_wrapper()
+        connection = self.checkout(wrapper)
+        wrapper.close()
+
+        # By the wrapper of another thread too.
+        def reuse():
+            other = self.get_wrapper()
+            reused = self.checkout(other)
+            other.close()
+            return reused
+
+        self.assertIs(self.in_thread(reuse), connection)
+        self.assertEqual(wrapper.pool.get_state()["opened"], 1)
+
+    def test_checkouts_wait_for_a_full_pool(self):
+        wrappers = [self.get_wrapper(MAX_SIZE=1, TIMEOUT=5) for _ in range(2)]
+        connection = self.checkout(wrappers[0])
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(self.checkout(wrappers[1]))
+        )
+        thread.start()
+        time.sleep(0.1)
+        wrappers[0].close()
+        thread.join()
+
+        self.assertIs(results[0], connection)
+
+        state = wrappers[0].pool.get_state()
+        self.assertEqual(state["waits"], 1)
+        self.assertGreater(state["wait_seconds"], 0.05)
+
+    def test_checkouts_give_up_waiting(self):
+        wrappers = [self.get_wrapper(MAX_SIZE=1, TIMEOUT=0.05) for _ in range(2)]
+        self.checkout(wrappers[0])
+
+        with self.assertRaises(OperationalError):
+            wrappers[1].ensure_connection()
+
+        self.assertEqual(wrappers[0].pool.get_state()["timeouts"], 1)
+        wrappers[0].close()
+
+    def test_old_connections_are_replaced(self):
+        wrapper = self.get_wrapper(MAX_AGE=0.05)
+        connection = self.checkout(wrapper)
+        wrapper.close()
+
+        time.sleep(0.1)
+
+        self.assertIsNot(self.checkout(wrapper), connection)
+        self.assertEqual(wrapper.pool.get_state()["closed"], 1)
+        wrapper.close()
+
+    def test_broken_idle_connections_are_replaced(self):
+        wrapper = self.get_wrapper(CHECK_IDLE=0)
+        connection = self.checkout(wrapper)
+        wrapper.close()
+
+        # E.g. the server restarted while the connection sat in the pool.
+        connection.close()
+
+        replacement = self.checkout(wrapper)
+        self.assertIsNot(replacement, connection)
+        replacement.execute("SELECT 1")
+        wrapper.close()
+
+    def test_unfinished_transactions_are_rolled_back(self):
+        wrapper = self.get_wrapper()
+
+        with wrapper.cursor() as cursor:
+            cursor.execute("CREATE TABLE item (id integer)")
+
+        wrapper.set_autocommit(False)
+
+        with wrapper.cursor() as cursor:
+            cursor.execute("INSERT INTO item VALUES (1)")
+
+        wrapper.close()
+
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM item")
+            self.assertEqual(cursor.fetchone(), (0,))
+
+        wrapper.close()
+
+    def test_in_memory_databases_are_not_pooled(self):
+        wrapper = self.get_wrapper()
+        wrapper.settings_dict["NAME"] = ":memory:"
+        wrapper.ensure_connection()
+
+        self.assertIsNone(wrapper.pool)
+        wrapper.close()
+
+    def test_metrics_report_the_pools(self):
+        wrapper = self.get_wrapper()
+        self.checkout(wrapper)
+
+        metrics = self.client.get(reverse("metrics")).content.decode()
+        wrapper.close()
+
+        label = f'pool="pooled:{self.path}"'
+        self.assertIn(f'db_pool_connections{{{label},state="in_use"}} 1', metrics)
+        self.assertIn(f"db_pool_checkouts_total{{{label}}} 1", metrics)
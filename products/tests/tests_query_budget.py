@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APITestCase
+from rest_framework.views import status
+
+from products.cache import invalidate_product_listing
+from products.models import Product
+from users.models import User
+from utils.query_budget import QueryBudgetMixin
+
+
+# sqlite keeps its FTS5 search index in step with one extra write per save,
+# PostgreSQL computes the search vector itself.
+SEARCH_INDEX_WRITES = 1 if connection.vendor == "sqlite" else 0
+
+
+class TestProductQueryBudget(QueryBudgetMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(
+            username="logan",
+            password="1234",
+            first_name="logan",
+            last_name="mattos",
+            is_seller=True,
+        )
+        cls.seller_token = Token.objects.create(user=cls.seller)
+
+        cls.product = Product.objects.create(
+            description="cadeira", price="2500.99", quantity=10, seller=cls.seller
+        )
+
+        cls.base_url = reverse("product-view")
+        cls.detail_url = reverse("product-detail", kwargs={"pk": cls.product.id})
+
+    def create_rows(self, count: int) -> None:
+        password = make_password(None)
+        offset = User.objects.count()
+        sellers = User.objects.bulk_create(
+            User(
+                username=f"seller{offset + index}",
+                password=password,
+                is_seller=True,
+            )
+            for index in range(count)
+        )
+        Product.objects.bulk_create(
+            Product(description="teclado", price="250.99", quantity=1, seller=seller)
+            for seller in sellers
+        )
+        invalidate_product_listing()
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+    # Pages hold many products, or an N+1 would stay under the budget.
+    @mock.patch.object(PageNumberPagination, "page_size", 100)
+    def test_list_products_budget(self):
+        for query in ("", "?expand=seller"):
+            with self.subTest(query=query):
+                self.assertQueryBudget(
+                    2,
+                    lambda: self.client.get(self.base_url + query),
+                    status.HTTP_200_OK,
+                )
+
+    def test_cached_list_products_budget(self):
+        self.client.get(self.base_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.base_url)
+
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_list_products_cursor_budget(self):
+        self.assertQueryBudget(
+            1,
+            lambda: self.client.get(self.base_url + "?pagination=cursor&page_size=100"),
+            status.HTTP_200_OK,
+        )
+
+    def test_create_product_budget(self):
+        self.authenticate()
+        product_data = {"description": "mouse", "price": "99.90", "quantity": 5}
+
+        self.assertQueryBudget(
+            2 + SEARCH_INDEX_WRITES,
+            lambda: self.client.post(self.base_url, product_data),
+            status.HTTP_201_CREATED,
+        )
+
+    def test_retrieve_product_budget(self):
+        self.assertQueryBudget(
+            2, lambda: self.client.get(self.detail_url), status.HTTP_200_OK
+        )
+
+    def test_not_modified_product_budget(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        self.assertQueryBudget(
+            1,
+            lambda: self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag),
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+    def test_update_product_budget(self):
+        self.authenticate()
+
+        self.assertQueryBudget(
+            3 + SEARCH_INDEX_WRITES,
+            lambda: self.client.patch(self.detail_url, {"quantity": 7}),
+            status.HTTP_200_OK,
+        )
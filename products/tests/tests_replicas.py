@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework.views import status
+
+from products.models import Product
+from products.tests import LISTING_CACHES
+from products.views import ListCreateProductView
+from users.models import User
+from utils.replicas import STICKY_COOKIE, STICKY_HEADER, signer, use_primary
+
+
+@override_settings(
+    CACHES=LISTING_CACHES,
+    DATABASE_REPLICAS=["another"],
+    DATABASE_PRIMARY_STICKY_SECONDS=10,
+)
+class TestPrimaryReplicaRouting(TransactionTestCase):
+    """The "another" test database stands in for a replica that has not
+    caught up with the primary at all."""
+
+    databases = {"default", "another"}
+    client_class = APIClient
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+
+        for database, description in (("default", "mesa"), ("another", "cadeira")):
+            seller = User.objects.db_manager(database).create_user(
+                username="logan", password="1234", is_seller=True
+            )
+            Product.objects.using(database).create(
+                description=description, price="10", quantity=1, seller=seller
+            )
+
+        seller = User.objects.using("default").get(username="logan")
+        self.token = Token.objects.create(user=seller)
+        self.url = reverse("product-view")
+
+    def get_descriptions(self, response):
+        return [product["description"] for product in response.data["results"]]
+
+    def test_reads_go_to_the_replica(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(self.get_descriptions(response), ["cadeira"])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        product = Product.objects.using("another").get()
+        response = self.client.get(reverse("product-detail", kwargs={"pk": product.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse("account-register"))
+        self.assertEqual(
+            response.data["results"][0]["id"],
+            str(User.objects.using("another").get().id),
+        )
+
+    def test_writes_go_to_the_primary_and_stick(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+        response = self.client.post(
+            self.url, {"description": "sofa", "price": "99.90", "quantity": 5}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Product.objects.using("default").filter(id=response.data["id"]))
+        self.assertEqual(response.cookies[STICKY_COOKIE]["max-age"], 10)
+
+        # The client reads its write back, from the primary.
+        response = self.client.get(self.url)
+        self.assertEqual(self.get_descriptions(response), ["mesa", "sofa"])
+
+    def test_clients_without_cookies_stick_with_the_header(self):
+        value = signer.sign("primary")
+        caches["products"].clear()
+
+        response = self.client.get(self.url, HTTP_X_PRIMARY_STICKY=value)
+        self.assertEqual(self.get_descriptions(response), ["mesa"])
+
+        # Tampered with.
+        caches["products"].clear()
+        response = self.client.get(self.url, HTTP_X_PRIMARY_STICKY=value + "0")
+        self.assertEqual(self.get_descriptions(response), ["cadeira"])
+
+    def test_stickiness_expires(self):
+        self.client.cookies[STICKY_COOKIE] = signer.sign("primary")
+
+        with mock.patch("django.core.signing.time.time", return_value=2**40):
+            response = self.client.get(self.url)
+
+        self.assertEqual(self.get_descriptions(response), ["cadeira"])
+
+    def test_failed_writes_do_not_stick(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+        response = self.client.post(self.url, {"description": "sofa"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertNotIn(STICKY_HEADER, response)
+
+    def test_views_can_force_the_primary(self):
+        with mock.patch.object(
+            ListCreateProductView, "use_primary_database", True, create=True
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(self.get_descriptions(response), ["mesa"])
+
+    async def test_async_views_can_force_the_primary(self):
+        with self.settings(ROOT_URLCONF="_komercio.urls_async"), mock.patch.object(
+            ListCreateProductView, "use_primary_database", True, create=True
+        ):
+            response = await AsyncClient().get(self.url)
+
+        self.assertEqual(response.json()["results"][0]["description"], "mesa")
+
+    def test_async_views_follow_the_same_routes(self):
+        with self.settings(ROOT_URLCONF="_komercio.urls_async"):
+            response = self.client.get(self.url)
+            self.assertEqual(response.json()["results"][0]["description"], "cadeira")
+
+            caches["products"].clear()
+            self.client.cookies[STICKY_COOKIE] = signer.sign("primary")
+            response = self.client.get(self.url)
+            self.assertEqual(response.json()["results"][0]["description"], "mesa")
+
+    def test_token_lookups_read_the_primary(self):
+        # The token only exists on the primary.
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_code_can_pin_the_primary(self):
+        self.assertEqual(Product.objects.get().description, "cadeira")
+
+        with use_primary():
+            self.assertEqual(Product.objects.get().description, "mesa")
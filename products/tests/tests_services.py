@@ -0,0 +1,177 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.db import OperationalError, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from products.models import Product
+from products.services import (
+    STOCK_LOCK_MODES,
+    InsufficientStock,
+    StockLocked,
+    bulk_update_inventory,
+    reserve_stock,
+)
+from users.models import User
+
+
+class TestReserveStock(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        seller = User.objects.create_user(
+            username="logan", first_name="logan", last_name="mattos", is_seller=True
+        )
+
+        cls.chair = Product.objects.create(
+            description="cadeira", price="2500.99", quantity=5, seller=seller
+        )
+        cls.keyboard = Product.objects.create(
+            description="teclado", price="250.99", quantity=1, seller=seller
+        )
+        cls.inactive = Product.objects.create(
+            description="mouse",
+            price="50.00",
+            quantity=10,
+            is_active=False,
+            seller=seller,
+        )
+
+    def test_reservation_decrements_every_product(self):
+        for lock_mode in STOCK_LOCK_MODES:
+            with self.subTest(lock_mode=lock_mode):
+                reserve_stock({self.chair.id: 2, self.keyboard.id: 1}, lock_mode)
+
+                self.chair.refresh_from_db()
+                self.keyboard.refresh_from_db()
+
+                self.assertEqual(self.chair.quantity, 3)
+                self.assertEqual(self.keyboard.quantity, 0)
+
+                Product.objects.filter(pk=self.chair.pk).update(quantity=5)
+                Product.objects.filter(pk=self.keyboard.pk).update(quantity=1)
+
+    def test_reservation_is_all_or_nothing(self):
+        for lock_mode in STOCK_LOCK_MODES:
+            with self.subTest(lock_mode=lock_mode):
+                with self.assertRaises(InsufficientStock):
+                    reserve_stock({self.chair.id: 2, self.keyboard.id: 2}, lock_mode)
+
+                with self.assertRaises(InsufficientStock):
+                    reserve_stock({self.inactive.id: 1}, lock_mode)
+
+                self.chair.refresh_from_db()
+                self.assertEqual(self.chair.quantity, 5)
+
+
+class TestBulkUpdateInventory(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(username="logan", is_seller=True)
+        cls.products = [
+            Product.objects.create(
+                description=description, price="10.00", quantity=5, seller=cls.seller
+            )
+            for description in ("cadeira", "mesa")
+        ]
+
+    def test_concurrent_reservations_are_not_written_over(self):
+        chair, table = self.products
+        now = timezone.now
+
+        def reserve_then_now():
+            # Between the read of the products and the write of the changes.
+            if not reserve_then_now.reserved:
+                reserve_then_now.reserved = True
+                reserve_stock({chair.id: 2, table.id: 1})
+
+            return now()
+
+        reserve_then_now.reserved = False
+
+        with mock.patch("products.services.timezone.now", reserve_then_now):
+            result = bulk_update_inventory(
+                self.seller,
+                [
+                    {"id": str(chair.id), "price": "12.50"},
+                    {"id": str(table.id), "quantity": 9, "is_active": False},
+                ],
+            )
+
+        self.assertEqual(len(result["updated"]), 2)
+
+        chair.refresh_from_db()
+        table.refresh_from_db()
+
+        self.assertEqual((str(chair.price), chair.quantity), ("12.50", 3))
+        self.assertEqual((table.quantity, table.is_active), (9, False))
+
+
+class TestReserveStockConcurrency(TransactionTestCase):
+    workers = 8
+    attempts_per_worker = 15
+
+    def setUp(self) -> None:
+        seller = User.objects.create_user(
+            username="logan", first_name="logan", last_name="mattos", is_seller=True
+        )
+
+        self.products = [
+            Product.objects.create(
+                description=f"produto {index}",
+                price="10.00",
+                quantity=40,
+                seller=seller,
+            )
+            for index in range(2)
+        ]
+
+    def reserve_concurrently(self, lock_mode):
+        outcomes = {"reserved": 0, "rejected": 0}
+        outcomes_lock = threading.Lock()
+
+        def worker(worker_index):
+            ordered = self.products if worker_index % 2 else self.products[::-1]
+            items = {product.id: 1 for product in ordered}
+
+            try:
+                for _ in range(self.attempts_per_worker):
+                    while True:
+                        try:
+                            reserve_stock(items, lock_mode)
+                            outcome = "reserved"
+                        except InsufficientStock:
+                            outcome = "rejected"
+                        except (OperationalError, StockLocked):
+                            # sqlite refuses concurrent writers instead of
+                            # waiting for them and "nowait" fails fast by
+                            # design, retry until the lock is free.
+                            continue
+                        break
+
+                    with outcomes_lock:
+                        outcomes[outcome] += 1
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            list(executor.map(worker, range(self.workers)))
+
+        return outcomes
+
+    def test_concurrent_reservations_never_oversell(self):
+        for lock_mode in STOCK_LOCK_MODES:
+            with self.subTest(lock_mode=lock_mode):
+                Product.objects.update(quantity=40)
+
+                outcomes = self.reserve_concurrently(lock_mode)
+
+                self.assertEqual(outcomes["reserved"], 40)
+                self.assertEqual(
+                    outcomes["rejected"],
+                    self.workers * self.attempts_per_worker - 40,
+                )
+                self.assertListEqual(
+                    list(Product.objects.values_list("quantity", flat=True)), [0, 0]
+                )
@@ -0,0 +1,237 @@
+import json
+import uuid
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import status
+
+from products.models import Product
+from products.services import InsufficientStock, reserve_stock
+from products.sharding import get_shard
+from products.tests import LISTING_CACHES
+from users.models import User
+
+SHARDS = ["default", "another"]
+
+
+@override_settings(CACHES=LISTING_CACHES, PRODUCT_SHARDS=SHARDS)
+class TestProductSharding(TransactionTestCase):
+    """The "default" and "another" test databases are the two shards."""
+
+    databases = {"default", "another"}
+    client_class = APIClient
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+        self.sellers = {
+            shard: self.create_seller(f"seller_{shard}", shard) for shard in SHARDS
+        }
+        self.url = reverse("product-view")
+
+    def create_seller(self, username, shard):
+        seller_id = next(
+            seller_id
+            for seller_id in iter(uuid.uuid4, None)
+            if get_shard(seller_id) == shard
+        )
+
+        return User.objects.create_user(
+            id=seller_id, username=username, password="1234", is_seller=True
+        )
+
+    def create_products(self, count):
+        """`count` products, a minute apart, alternating between the shards."""
+
+        now = timezone.now()
+        products = []
+
+        for index in range(count):
+            # Through the seller, which the router routes by.
+            product = self.sellers[SHARDS[index % 2]].products.create(
+                description=f"produto {index}", price="10", quantity=5
+            )
+            # Not with the save, `created_at` is set on insert.
+            Product.objects.using(product._state.db).filter(pk=product.pk).update(
+                created_at=now + timedelta(minutes=index)
+            )
+            products.append(product)
+
+        return products
+
+    def test_sellers_keep_their_shard_when_one_is_added(self):
+        for seller_id in iter(uuid.uuid4, None):
+            shard = get_shard(seller_id, [*SHARDS, "third"])
+            self.assertIn(shard, {get_shard(seller_id), "third"})
+
+            if shard == "third":
+                break
+
+    def test_products_are_created_on_the_shard_of_their_seller(self):
+        for shard, seller in self.sellers.items():
+            self.client.force_authenticate(seller)
+            response = self.client.post(
+                self.url, {"description": "mesa", "price": "10", "quantity": 1}
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(
+                list(Product.objects.using(shard).values_list("id", flat=True)),
+                [uuid.UUID(response.data["id"])],
+            )
+
+        # The users are copied to the other shard.
+        self.assertEqual(User.objects.using("another").count(), 2)
+
+    def test_listing_merges_the_shards_in_order(self):
+        products = self.create_products(5)
+        descriptions = []
+        url = self.url
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.data["count"], 5)
+            descriptions += [row["description"] for row in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(descriptions, [product.description for product in products])
+
+    @override_settings(PRODUCT_SHARDS_MAX_OFFSET=2)
+    def test_deep_pages_are_left_to_cursor_pagination(self):
+        self.create_products(5)
+
+        response = self.client.get(self.url, {"page": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url, {"page": 3})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn("pagination=cursor", response.data["detail"])
+
+    def test_cursor_listing_merges_the_shards_in_order(self):
+        products = self.create_products(5)
+        descriptions = []
+        url = self.url + "?pagination=cursor&fields=description"
+
+        with self.settings(FAST_SERIALIZERS=True):
+            while url:
+                response = self.client.get(url)
+                results = response.data["results"]
+                self.assertEqual(list(results[0]), ["description"])
+                descriptions += [row["description"] for row in results]
+                url = response.data["next"]
+
+        self.assertEqual(descriptions, [product.description for product in products])
+
+    def test_search_covers_every_shard(self):
+        self.create_products(3)
+
+        response = self.client.get(self.url, {"q": "produto", "page_size": 10})
+
+        self.assertEqual(response.data["count"], 3)
+
+    def test_seller_filter_queries_one_shard(self):
+        self.create_products(4)
+        seller = self.sellers["default"]
+
+        with CaptureQueriesContext(connections["another"]) as queries:
+            response = self.client.get(self.url, {"seller": seller.id})
+
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(len(queries), 0)
+
+    def test_detail_and_updates_find_the_shard(self):
+        product = self.create_products(2)[1]
+        url = reverse("product-detail", kwargs={"pk": product.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["seller"]["username"], "seller_another")
+
+        self.client.force_authenticate(self.sellers["another"])
+        response = self.client.patch(url, {"quantity": 9})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Product.objects.using("another").get().quantity, 9)
+
+        response = self.client.get(
+            reverse("product-detail", kwargs={"pk": uuid.uuid4()})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_listing_falls_back_to_the_merge(self):
+        products = self.create_products(2)
+
+        with self.settings(ROOT_URLCONF="_komercio.urls_async"):
+            response = self.client.get(self.url)
+
+        self.assertEqual(
+            [row["description"] for row in response.json()["results"]],
+            [product.description for product in products],
+        )
+
+    def test_reservations_span_the_shards(self):
+        first, second = self.create_products(2)
+
+        with self.assertRaises(InsufficientStock):
+            reserve_stock({first.id: 1, second.id: 6})
+
+        self.assertEqual(Product.objects.using("default").get().quantity, 5)
+
+        reserve_stock({first.id: 1, second.id: 5})
+
+        self.assertEqual(Product.objects.using("default").get().quantity, 4)
+        self.assertEqual(Product.objects.using("another").get().quantity, 0)
+
+    def test_deleted_sellers_take_their_products_from_every_shard(self):
+        self.create_products(2)
+
+        self.sellers["another"].delete()
+
+        self.assertFalse(Product.objects.using("another").exists())
+        self.assertEqual(User.objects.using("another").count(), 1)
+
+    def test_export_merges_the_shards(self):
+        products = self.create_products(3)
+        self.client.force_authenticate(self.sellers["default"])
+
+        response = self.client.get(
+            reverse("product-export"), HTTP_ACCEPT="application/x-ndjson"
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(
+            [row["id"] for row in rows], [str(product.id) for product in products]
+        )
+
+    def test_rebalancing_moves_products_to_a_new_shard(self):
+        with self.settings(PRODUCT_SHARDS=["default"]):
+            self.create_products(4)
+
+        moved = set(
+            Product.objects.filter(seller__username="seller_another").values_list(
+                "id", "created_at"
+            )
+        )
+        output = StringIO()
+        call_command("rebalance_products", "--dry-run", stdout=output)
+
+        self.assertIn("default -> another: 2 products to move", output.getvalue())
+        self.assertFalse(Product.objects.using("another").exists())
+
+        call_command("rebalance_products", "--batch-size", "1", stdout=StringIO())
+
+        self.assertEqual(
+            set(Product.objects.using("another").values_list("id", "created_at")),
+            moved,
+        )
+        self.assertEqual(Product.objects.using("default").count(), 2)
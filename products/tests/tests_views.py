@@ -1,9 +1,35 @@
+import asyncio
+import csv
+import datetime
+import decimal
+import io
+import json
+import tempfile
+import uuid
+from unittest import mock
+
+import msgpack
+from asgiref.sync import sync_to_async
+
 from rest_framework.test import APITestCase
+from _komercio.asgi import AsyncReadsASGIHandler, application
+from products.cache import GENERATION_KEY
 from products.models import Product
+from products.tests import LISTING_CACHES
+from products.views import ListCreateProductView, RetrieveUpdateProductView
 from users.models import User
 from rest_framework.views import status
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from utils.renderers import ORJSONRenderer
+from utils.timing import install_query_recorder
 
 
 class TestProductView(APITestCase):
@@ -243,3 +269,1600 @@ class TestProductDetailView(APITestCase):
         excepted_response = status.HTTP_403_FORBIDDEN
 
         self.assertEqual(response.status_code, excepted_response)
+
+
+class TestProductCursorPagination(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        seller_account = User.objects.create_user(**cls.user_data)
+
+        cls.products = [
+            Product.objects.create(
+                description=f"produto {index}",
+                price="10.00",
+                quantity=index,
+                seller=seller_account,
+            )
+            for index in range(5)
+        ]
+
+        cls.base_url = reverse("product-view")
+
+    def test_cursor_pages_follow_creation_order(self):
+        url = self.base_url + "?pagination=cursor"
+        listed_ids = []
+
+        while url:
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+
+            listed_ids += [product["id"] for product in response.data["results"]]
+            url = response.data["next"]
+
+        expected_ids = [str(product.id) for product in self.products]
+
+        self.assertListEqual(expected_ids, listed_ids)
+
+    def test_cursor_page_does_not_count_rows(self):
+        first_page = self.client.get(self.base_url + "?pagination=cursor")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(first_page.data["next"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_page_number_pagination_is_still_the_default(self):
+        response = self.client.get(self.base_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], len(self.products))
+
+
+class TestProductSearch(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        seller_account = User.objects.create_user(**cls.user_data)
+
+        cls.chair = Product.objects.create(
+            description="Cadeira gamer reclinável",
+            price="1200.00",
+            quantity=3,
+            seller=seller_account,
+        )
+        cls.keyboard = Product.objects.create(
+            description="Teclado mecânico",
+            price="250.99",
+            quantity=10,
+            seller=seller_account,
+        )
+
+        cls.base_url = reverse("product-view")
+
+    def search(self, terms):
+        response = self.client.get(self.base_url, {"q": terms})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return [product["id"] for product in response.data["results"]]
+
+    def test_search_matches_description_terms(self):
+        self.assertListEqual([str(self.chair.id)], self.search("cadeira"))
+        self.assertListEqual([str(self.keyboard.id)], self.search("teclado mecanico"))
+        self.assertListEqual([], self.search("monitor"))
+
+    def test_search_index_follows_updates_and_deletes(self):
+        self.keyboard.description = "Monitor ultrawide"
+        self.keyboard.save()
+
+        self.assertListEqual([], self.search("teclado"))
+        self.assertListEqual([str(self.keyboard.id)], self.search("monitor"))
+
+        self.keyboard.delete()
+
+        self.assertListEqual([], self.search("monitor"))
+
+
+class TestProductFilters(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.user_data2 = {
+            "username": "sandy",
+            "password": "1234",
+            "first_name": "sandy",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.seller_account = User.objects.create_user(**cls.user_data)
+        other_seller_account = User.objects.create_user(**cls.user_data2)
+
+        cls.cheap = Product.objects.create(
+            description="mouse", price="50.00", quantity=5, seller=cls.seller_account
+        )
+        cls.expensive = Product.objects.create(
+            description="monitor",
+            price="1500.00",
+            quantity=2,
+            seller=cls.seller_account,
+        )
+        cls.sold_out = Product.objects.create(
+            description="teclado",
+            price="250.00",
+            quantity=0,
+            seller=other_seller_account,
+        )
+        cls.inactive = Product.objects.create(
+            description="cadeira",
+            price="900.00",
+            quantity=1,
+            is_active=False,
+            seller=other_seller_account,
+        )
+
+        cls.base_url = reverse("product-view")
+
+    def filter(self, **params):
+        response = self.client.get(self.base_url, {**params, "pagination": "cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return {product["id"] for product in response.data["results"]}
+
+    def ids(self, *products):
+        return {str(product.id) for product in products}
+
+    def test_filter_by_price_range(self):
+        self.assertSetEqual(
+            self.ids(self.sold_out, self.inactive),
+            self.filter(price_min="100.00", price_max="1000.00"),
+        )
+
+    def test_filter_by_stock_and_active_flag(self):
+        self.assertSetEqual(self.ids(self.sold_out), self.filter(in_stock="false"))
+        self.assertSetEqual(
+            self.ids(self.cheap, self.expensive),
+            self.filter(in_stock="true", is_active="true"),
+        )
+
+    def test_filter_by_seller(self):
+        self.assertSetEqual(
+            self.ids(self.cheap),
+            self.filter(seller=self.seller_account.id, price_max="100.00"),
+        )
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(
+            self.base_url, {"price_min": "500.00", "price_max": "100.00"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("price_max", response.data)
+
+        response = self.client.get(self.base_url, {"seller": "not-an-id"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestProductBulkCreate(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.seller_account = User.objects.create_user(**cls.user_data)
+        cls.seller_token = Token.objects.create(user=cls.seller_account)
+
+        cls.base_url = reverse("product-view")
+
+    def setUp(self) -> None:
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+    def test_seller_can_create_products_in_bulk(self):
+        products_data = [
+            {"description": f"produto {index}", "price": "10.00", "quantity": index}
+            for index in range(25)
+        ]
+
+        with self.settings(PRODUCTS_BULK_CREATE_BATCH_SIZE=10):
+            response = self.client.post(self.base_url, products_data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 25)
+        self.assertListEqual(response.data["errors"], [])
+        self.assertEqual(self.seller_account.products.count(), 25)
+
+    def test_bulk_create_reports_invalid_items(self):
+        products_data = [
+            {"description": "mouse", "price": "10.00", "quantity": 1},
+            {"description": "teclado", "price": "barato", "quantity": 1},
+            {"price": "10.00", "quantity": 1},
+            "not a product",
+        ]
+
+        response = self.client.post(self.base_url, products_data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertListEqual([item["index"] for item in response.data["created"]], [0])
+        self.assertListEqual(
+            [error["index"] for error in response.data["errors"]], [1, 2, 3]
+        )
+        self.assertIn("description", response.data["errors"][1]["errors"])
+        self.assertEqual(self.seller_account.products.count(), 1)
+
+    def test_bulk_create_without_valid_items_fails(self):
+        response = self.client.post(self.base_url, [{}], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Product.objects.exists())
+
+    def test_bulk_create_query_count_does_not_grow_per_item(self):
+        query_counts = []
+
+        # Warms the token cache, so every request below authenticates alike.
+        self.client.post(self.base_url, [], format="json")
+
+        for items in (10, 100):
+            products_data = [
+                {"description": f"produto {index}", "price": "10.00", "quantity": 1}
+                for index in range(items)
+            ]
+
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(self.base_url, products_data, format="json")
+
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class TestProductInventoryView(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.user_data2 = {
+            "username": "sandy",
+            "password": "1234",
+            "first_name": "sandy",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        seller_account = User.objects.create_user(**cls.user_data)
+        other_seller_account = User.objects.create_user(**cls.user_data2)
+        cls.seller_token = Token.objects.create(user=seller_account)
+
+        cls.products = [
+            Product.objects.create(
+                description=f"produto {index}",
+                price="10.00",
+                quantity=1,
+                seller=seller_account,
+            )
+            for index in range(3)
+        ]
+        cls.other_product = Product.objects.create(
+            description="teclado",
+            price="250.99",
+            quantity=10,
+            seller=other_seller_account,
+        )
+
+        cls.inventory_url = reverse("product-inventory")
+
+    def setUp(self) -> None:
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+    def test_seller_can_update_inventory_in_bulk(self):
+        changes = [
+            {"id": str(product.id), "price": "12.50", "quantity": index}
+            for index, product in enumerate(self.products)
+        ]
+        changes.append({"id": str(self.products[0].id), "is_active": False})
+
+        response = self.client.patch(self.inventory_url, changes, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["updated"]), 3)
+
+        for index, product in enumerate(self.products):
+            product.refresh_from_db()
+            self.assertEqual(str(product.price), "12.50")
+            self.assertEqual(product.quantity, index)
+
+        self.assertFalse(self.products[0].is_active)
+        self.assertTrue(self.products[1].is_active)
+
+    def test_inventory_update_reports_unknown_and_foreign_products(self):
+        unknown_id = "8d5c8ba1-2a4c-4dc1-8a35-8f5cbdc2f6e1"
+        changes = [
+            {"id": str(self.products[0].id), "quantity": 5},
+            {"id": str(self.other_product.id), "quantity": 0},
+            {"id": unknown_id, "quantity": 0},
+            {"id": str(self.products[1].id), "quantity": -1},
+        ]
+
+        response = self.client.patch(self.inventory_url, changes, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(response.data["updated"], [self.products[0].id])
+        self.assertListEqual(response.data["not_owned"], [self.other_product.id])
+        self.assertListEqual([str(pk) for pk in response.data["unknown"]], [unknown_id])
+        self.assertListEqual([error["index"] for error in response.data["errors"]], [3])
+
+        self.other_product.refresh_from_db()
+        self.assertEqual(self.other_product.quantity, 10)
+
+    def test_inventory_update_query_count_does_not_grow_per_item(self):
+        changes = [{"id": str(product.id), "quantity": 3} for product in self.products]
+
+        # Warms the token cache, so both requests below authenticate alike.
+        self.client.patch(self.inventory_url, changes[:1], format="json")
+
+        with self.assertNumQueries(2):
+            self.client.patch(self.inventory_url, changes[:1], format="json")
+
+        with self.assertNumQueries(2):
+            self.client.patch(self.inventory_url, changes, format="json")
+
+
+class TestStockReservationView(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "yoshi",
+            "password": "1234",
+            "first_name": "yoshi",
+            "last_name": "mattos",
+            "is_seller": False,
+        }
+
+        seller_account = User.objects.create_user(
+            username="logan", first_name="logan", last_name="mattos", is_seller=True
+        )
+        buyer_account = User.objects.create_user(**cls.user_data)
+        cls.buyer_token = Token.objects.create(user=buyer_account)
+
+        cls.product = Product.objects.create(
+            description="cadeira", price="2500.99", quantity=3, seller=seller_account
+        )
+
+        cls.reservations_url = reverse("product-reservations")
+
+    def reserve(self, quantity):
+        return self.client.post(
+            self.reservations_url,
+            {"items": [{"product": str(self.product.id), "quantity": quantity}]},
+            format="json",
+        )
+
+    def test_buyer_can_reserve_stock(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.buyer_token.key)
+
+        response = self.reserve(2)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 1)
+
+        response = self.reserve(2)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 1)
+
+    def test_anonymous_can_not_reserve_stock(self):
+        response = self.reserve(1)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestProductConditionalRequests(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.seller_account = User.objects.create_user(**cls.user_data)
+        cls.seller_token = Token.objects.create(user=cls.seller_account)
+
+        cls.product = Product.objects.create(
+            description="cadeira",
+            price="2500.99",
+            quantity=10,
+            seller=cls.seller_account,
+        )
+
+        cls.base_url = reverse("product-view")
+        cls.detail_url = reverse("product-detail", kwargs={"pk": cls.product.id})
+
+    def test_unchanged_product_is_not_modified(self):
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_product_and_seller_changes_invalidate_etag(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        self.seller_account.first_name = "updated"
+        self.seller_account.save()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_unchanged_product_list_is_not_modified(self):
+        etag = self.client.get(self.base_url)["ETag"]
+
+        response = self.client.get(self.base_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Product.objects.create(
+            description="teclado",
+            price="250.99",
+            quantity=1,
+            seller=self.seller_account,
+        )
+        response = self.client.get(self.base_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create_precondition_does_not_query_the_catalog(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+        etag = self.client.get(self.base_url)["ETag"]
+        product_data = {"description": "mesa", "price": "10", "quantity": 1}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.base_url, product_data, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertFalse(
+            [query for query in queries if "COUNT(" in query["sql"].upper()]
+        )
+
+        response = self.client.post(self.base_url, product_data, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_update_requires_matching_etag(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        response = self.client.patch(
+            self.detail_url, {"quantity": 5}, HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        response = self.client.patch(
+            self.detail_url, {"quantity": 1}, HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+    def test_update_matches_the_etag_of_any_representation(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+        etag = self.client.get(self.detail_url, {"fields": "description"})["ETag"]
+
+        self.assertNotEqual(self.client.get(self.detail_url)["ETag"], etag)
+
+        response = self.client.patch(
+            self.detail_url, {"quantity": 5}, HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_concurrent_updates_with_the_same_etag_do_not_both_save(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+        etag = self.client.get(self.detail_url)["ETag"]
+        get_object = RetrieveUpdateProductView.get_object
+
+        def get_object_after_another_update(view):
+            # Another writer with the same ETag saves after this request
+            # passed its precondition.
+            Product.objects.filter(pk=self.product.pk).update(
+                quantity=7, updated_at=datetime.datetime.now(datetime.timezone.utc)
+            )
+            return get_object(view)
+
+        with mock.patch.object(
+            RetrieveUpdateProductView, "get_object", get_object_after_another_update
+        ):
+            response = self.client.patch(
+                self.detail_url, {"quantity": 1}, HTTP_IF_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 7)
+
+
+@override_settings(CACHES=LISTING_CACHES)
+class TestProductListingCache(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.admin_user_data = {
+            "username": "kamila",
+            "password": "1234",
+            "first_name": "kamila",
+            "last_name": "muller",
+            "is_seller": False,
+        }
+
+        cls.seller_account = User.objects.create_user(**cls.user_data)
+        cls.seller_token = Token.objects.create(user=cls.seller_account)
+        admin_account = User.objects.create_superuser(**cls.admin_user_data)
+        cls.admin_token = Token.objects.create(user=admin_account)
+
+        cls.product = Product.objects.create(
+            description="cadeira",
+            price="2500.99",
+            quantity=10,
+            seller=cls.seller_account,
+        )
+
+        cls.base_url = reverse("product-view")
+        cls.stats_url = reverse("product-cache-stats")
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+
+    def test_listing_is_cached_by_normalized_query(self):
+        response = self.client.get(self.base_url + "?is_active=true&in_stock=true")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        response = self.client.get(self.base_url + "?in_stock=true&is_active=true")
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        response = self.client.get(self.base_url + "?in_stock=false&is_active=true")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_listing_is_cached_by_scheme_and_host(self):
+        # The pagination links are absolute URLs.
+        self.client.get(self.base_url)
+
+        response = self.client.get(self.base_url, HTTP_HOST="localhost")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        response = self.client.get(self.base_url, secure=True)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        response = self.client.get(self.base_url, secure=True)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_product_writes_invalidate_listing(self):
+        self.client.get(self.base_url)
+
+        self.product.quantity = 1
+        self.product.save()
+
+        response = self.client.get(self.base_url)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["quantity"], 1)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+        self.client.patch(
+            reverse("product-inventory"),
+            [{"id": str(self.product.id), "quantity": 7}],
+            format="json",
+        )
+
+        response = self.client.get(self.base_url)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["quantity"], 7)
+
+        self.product.delete()
+
+        self.assertEqual(self.client.get(self.base_url).data["count"], 0)
+
+    def test_admin_can_read_cache_counters(self):
+        self.client.get(self.base_url)
+        self.client.get(self.base_url)
+
+        response = self.client.get(self.stats_url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.admin_token.key)
+        response = self.client.get(self.stats_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["hits"], 1)
+        self.assertEqual(response.data["misses"], 1)
+
+    def test_process_local_backend_neither_caches_nor_tags_listing(self):
+        local_caches = {
+            **settings.CACHES,
+            "products": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+
+        with override_settings(CACHES=local_caches):
+            for _ in range(2):
+                response = self.client.get(self.base_url)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotIn("X-Cache", response)
+                self.assertNotIn("ETag", response)
+
+
+class TestProductExportView(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        seller_account = User.objects.create_user(**cls.user_data)
+        cls.seller_token = Token.objects.create(user=seller_account)
+
+        cls.products = [
+            Product.objects.create(
+                description=f'produto "{index}", novo',
+                price="10.50",
+                quantity=index,
+                seller=seller_account,
+            )
+            for index in range(3)
+        ]
+
+        cls.export_url = reverse("product-export")
+
+    def export(self, **params):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+        response = self.client.get(self.export_url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        response, content = self.export(format="ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        self.assertListEqual(
+            [row["id"] for row in rows], [str(product.id) for product in self.products]
+        )
+        self.assertDictEqual(
+            rows[1],
+            {
+                "id": str(self.products[1].id),
+                "description": 'produto "1", novo',
+                "price": "10.50",
+                "quantity": 1,
+                "is_active": True,
+                "seller": str(self.products[1].seller_id),
+            },
+        )
+
+    def test_export_csv(self):
+        response, content = self.export(format="csv", in_stock="true")
+        rows = list(csv.reader(io.StringIO(content)))
+
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertListEqual(
+            rows[0], ["id", "description", "price", "quantity", "is_active", "seller"]
+        )
+        self.assertEqual(len(rows), 3)
+        self.assertListEqual(rows[1][1:5], ['produto "1", novo', "10.50", "1", "true"])
+
+    def test_anonymous_can_not_export(self):
+        response = self.client.get(self.export_url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestProductExportOverASGI(TransactionTestCase):
+    """Through the ASGI application, which sends what the response streams."""
+
+    def setUp(self) -> None:
+        seller = User.objects.create_user(
+            username="logan", password="1234", is_seller=True
+        )
+        self.token = Token.objects.create(user=seller)
+        self.products = [
+            Product.objects.create(
+                description=f"produto {index}", price="10", quantity=1, seller=seller
+            )
+            for index in range(5)
+        ]
+
+    async def request(self, path, query_string):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "root_path": "",
+            "query_string": query_string,
+            "headers": [(b"authorization", f"Token {self.token.key}".encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        await application(scope, receive, send)
+
+        return messages
+
+    @override_settings(PRODUCTS_EXPORT_CHUNK_SIZE=2)
+    async def test_export_streams_every_row(self):
+        with mock.patch.object(AsyncReadsASGIHandler, "stream_batch_size", 2):
+            start, *body = await self.request(
+                reverse("product-export"), b"format=ndjson"
+            )
+
+        self.assertEqual(start["status"], status.HTTP_200_OK)
+        self.assertFalse(body[-1].get("more_body", False))
+
+        rows = b"".join(message.get("body", b"") for message in body).splitlines()
+
+        self.assertEqual(
+            [json.loads(row)["id"] for row in rows],
+            [str(product.id) for product in self.products],
+        )
+
+
+@override_settings(CACHES=LISTING_CACHES)
+class TestProductValuesSerializers(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        sellers = [
+            User.objects.create_user(
+                username=username,
+                password="1234",
+                first_name=username,
+                last_name="mattos",
+                is_seller=True,
+            )
+            for username in ("logan", "kamila")
+        ]
+
+        cls.products = [
+            Product.objects.create(
+                description=f"cadeira {index}",
+                price=price,
+                quantity=index,
+                is_active=index % 3 != 0,
+                seller=sellers[index % 2],
+            )
+            for index, price in enumerate(["2500.99", "10", "0.50", "99.9", "7.05"])
+        ]
+
+        cls.base_url = reverse("product-view")
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+
+    def assertSameContent(self, url):
+        responses = []
+
+        for fast_serializers in (False, True):
+            caches["products"].clear()
+
+            with override_settings(FAST_SERIALIZERS=fast_serializers):
+                responses.append(self.client.get(url))
+
+        regular, fast = responses
+
+        self.assertEqual(regular.status_code, fast.status_code)
+        self.assertEqual(regular.content, fast.content)
+
+    def test_list_matches_regular_serializer(self):
+        for query in (
+            "",
+            "?page=2",
+            "?pagination=cursor&page_size=3",
+            "?price_min=5&in_stock=true",
+            "?q=cadeira",
+        ):
+            with self.subTest(query=query):
+                self.assertSameContent(self.base_url + query)
+
+    def test_cursor_pages_match_regular_serializer(self):
+        url = self.base_url + "?pagination=cursor&page_size=2"
+
+        with override_settings(FAST_SERIALIZERS=True):
+            next_url = self.client.get(url).json()["next"]
+
+        self.assertSameContent(next_url)
+
+    def test_retrieve_matches_regular_serializer(self):
+        self.assertSameContent(
+            reverse("product-detail", kwargs={"pk": self.products[1].id})
+        )
+        self.assertSameContent(reverse("product-detail", kwargs={"pk": "missing"}))
+
+
+@override_settings(CACHES=LISTING_CACHES)
+class TestSparseFieldsets(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(
+            username="logan",
+            password="1234",
+            first_name="logan",
+            last_name="mattos",
+            is_seller=True,
+        )
+
+        cls.products = [
+            Product.objects.create(
+                description=f"cadeira {index}",
+                price=price,
+                quantity=index,
+                seller=cls.seller,
+            )
+            for index, price in enumerate(["2500.99", "10", "0.50"])
+        ]
+
+        cls.base_url = reverse("product-view")
+        cls.detail_url = reverse("product-detail", kwargs={"pk": cls.products[1].id})
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+
+    def get_with_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        return response, [query["sql"] for query in context.captured_queries]
+
+    def test_fields_narrow_the_listing_and_its_query(self):
+        response, queries = self.get_with_queries(self.base_url + "?fields=id,price")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [set(row) for row in response.data["results"]], [{"id", "price"}] * 2
+        )
+
+        listing_query = queries[-1]
+        self.assertNotIn("JOIN", listing_query)
+        self.assertNotIn('"description"', listing_query)
+
+    def test_expand_embeds_the_seller(self):
+        response, queries = self.get_with_queries(
+            self.base_url + "?fields=id,seller&expand=seller"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["seller"]["username"], "logan")
+        # Joined in the listing query, not loaded product by product.
+        self.assertIn("JOIN", queries[-1])
+        self.assertEqual(len(queries), 2)
+
+    def test_seller_is_an_id_unless_expanded(self):
+        response = self.client.get(self.base_url)
+
+        self.assertEqual(response.data["results"][0]["seller"], self.seller.id)
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ("?fields=id,password", "?expand=description", "?expand=x"):
+            with self.subTest(query=query):
+                response = self.client.get(self.base_url + query)
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_detail_without_seller_skips_the_join(self):
+        response, queries = self.get_with_queries(self.detail_url + "?fields=price")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"price": "10.00"})
+
+        for query in queries:
+            self.assertNotIn("JOIN", query)
+
+    def test_detail_embeds_the_seller_by_default(self):
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(response.data["seller"]["username"], "logan")
+
+    def test_fieldsets_match_regular_serializer(self):
+        for url in (
+            self.base_url + "?fields=price,description",
+            self.base_url + "?expand=seller",
+            self.base_url + "?pagination=cursor&fields=id&expand=seller",
+            self.detail_url + "?fields=seller,quantity",
+        ):
+            with self.subTest(url=url):
+                responses = []
+
+                for fast_serializers in (False, True):
+                    caches["products"].clear()
+
+                    with override_settings(FAST_SERIALIZERS=fast_serializers):
+                        responses.append(self.client.get(url))
+
+                regular, fast = responses
+
+                self.assertEqual(regular.status_code, status.HTTP_200_OK)
+                self.assertEqual(regular.content, fast.content)
+
+    def test_seller_updates_refresh_expanded_listings(self):
+        url = self.base_url + "?expand=seller"
+        etag = self.client.get(url)["ETag"]
+
+        self.seller.first_name = "kamila"
+        self.seller.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["seller"]["first_name"], "kamila")
+
+    def test_logins_keep_listings_cached(self):
+        etag = self.client.get(self.base_url)["ETag"]
+
+        self.client.login(username="logan", password="1234")
+        self.client.logout()
+
+        response = self.client.get(self.base_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(CACHES=LISTING_CACHES)
+class TestSideloadedSellers(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.sellers = [
+            User.objects.create_user(
+                username=username,
+                password="1234",
+                first_name=username,
+                last_name="mattos",
+                is_seller=True,
+            )
+            for username in ("logan", "kamila")
+        ]
+
+        for index in range(5):
+            Product.objects.create(
+                description=f"cadeira {index}",
+                price="10",
+                quantity=index,
+                seller=cls.sellers[index % 2],
+            )
+
+        cls.base_url = reverse("product-view")
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+
+    def test_sellers_are_listed_once(self):
+        url = self.base_url + "?sideload=seller&page_size=5&pagination=cursor"
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        sellers = response.data["sellers"]
+
+        self.assertEqual(list(sellers), [str(seller.id) for seller in self.sellers])
+        self.assertEqual(sellers[str(self.sellers[1].id)]["username"], "kamila")
+        self.assertEqual(
+            [row["seller_id"] for row in results],
+            [self.sellers[index % 2].id for index in range(5)],
+        )
+        self.assertNotIn("seller", results[0])
+
+        # The page, then the sellers, without a join.
+        listing_query, sellers_query = [
+            query["sql"] for query in context.captured_queries[-2:]
+        ]
+        self.assertNotIn("JOIN", listing_query)
+        self.assertIn('"users_user"', sellers_query)
+
+    def test_sideload_keeps_the_seller_in_sparse_fieldsets(self):
+        response = self.client.get(self.base_url + "?sideload=seller&fields=price")
+
+        self.assertEqual(set(response.data["results"][0]), {"price", "seller_id"})
+        self.assertEqual(len(response.data["sellers"]), 2)
+
+    def test_only_the_sellers_of_the_page_are_listed(self):
+        response = self.client.get(
+            self.base_url + "?sideload=seller&pagination=cursor&page_size=1"
+        )
+
+        self.assertEqual(list(response.data["sellers"]), [str(self.sellers[0].id)])
+
+    def test_sideload_and_expand_conflict(self):
+        for query in ("?sideload=seller&expand=seller", "?sideload=description"):
+            with self.subTest(query=query):
+                response = self.client.get(self.base_url + query)
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("sideload", response.data)
+
+    def test_sideload_matches_regular_serializer(self):
+        for query in ("?sideload=seller", "?sideload=seller&pagination=cursor"):
+            with self.subTest(query=query):
+                responses = []
+
+                for fast_serializers in (False, True):
+                    caches["products"].clear()
+
+                    with override_settings(FAST_SERIALIZERS=fast_serializers):
+                        responses.append(self.client.get(self.base_url + query))
+
+                regular, fast = responses
+
+                self.assertEqual(regular.status_code, status.HTTP_200_OK)
+                self.assertEqual(regular.content, fast.content)
+
+
+class TestContentNegotiation(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(
+            username="logan",
+            password="1234",
+            first_name="logan",
+            last_name="mattos",
+            is_seller=True,
+        )
+        cls.seller_token = Token.objects.create(user=cls.seller)
+
+        for index in range(3):
+            Product.objects.create(
+                description=f"cadeira {index}",
+                price="2500.99",
+                quantity=index,
+                seller=cls.seller,
+            )
+
+        cls.base_url = reverse("product-view")
+
+    def test_orjson_renders_like_json_renderer(self):
+        data = {
+            "id": uuid.uuid4(),
+            "price": decimal.Decimal("10.50"),
+            "created_at": datetime.datetime(
+                2022, 10, 1, 12, 30, 5, 123456, tzinfo=datetime.timezone.utc
+            ),
+            "day": datetime.date(2022, 10, 1),
+            "errors": {0: [ErrorDetail("Inválido.", code="invalid")]},
+            "description": "cadeira\u2028de praia\u2029",
+            "items": [1, 2.5, None, True],
+        }
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_renderer_rejects_non_finite_floats_like_json_renderer(self):
+        for value in (float("nan"), float("inf"), decimal.Decimal("-Infinity")):
+            data = {"items": [{"price": value}, None]}
+
+            with self.subTest(value=value):
+                for renderer in (JSONRenderer(), ORJSONRenderer()):
+                    with self.assertRaises(ValueError):
+                        renderer.render(data)
+
+                non_strict = [JSONRenderer(), ORJSONRenderer()]
+
+                for renderer in non_strict:
+                    renderer.strict = False
+
+                self.assertEqual(*(renderer.render(data) for renderer in non_strict))
+
+    def test_list_renders_like_json_renderer(self):
+        response = self.client.get(self.base_url)
+
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_list_as_msgpack(self):
+        json_response = self.client.get(self.base_url)
+        response = self.client.get(self.base_url, HTTP_ACCEPT="application/msgpack")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), json_response.json())
+
+    def test_create_from_msgpack(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+        response = self.client.post(
+            self.base_url,
+            msgpack.packb({"description": "mesa", "price": "99.90", "quantity": 5}),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)["description"], "mesa")
+
+    def test_invalid_bodies_are_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+        for body, content_type in (
+            (b"\xc1", "application/msgpack"),
+            (b'{"price": NaN}', "application/json"),
+        ):
+            with self.subTest(content_type=content_type):
+                response = self.client.post(
+                    self.base_url, body, content_type=content_type
+                )
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(CACHES=LISTING_CACHES, ROOT_URLCONF="_komercio.urls_async")
+class TestAsyncProductViews(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(
+            username="logan",
+            password="1234",
+            first_name="logan",
+            last_name="mattos",
+            is_seller=True,
+        )
+        cls.seller_token = Token.objects.create(user=cls.seller)
+
+        cls.products = [
+            Product.objects.create(
+                description=f"cadeira {index}",
+                price=price,
+                quantity=index,
+                seller=cls.seller,
+            )
+            for index, price in enumerate(["2500.99", "10", "0.50", "99.9"])
+        ]
+
+        cls.base_url = reverse("product-view")
+        cls.detail_url = reverse("product-detail", kwargs={"pk": cls.products[1].id})
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+
+    def reset_listing_cache(self):
+        caches["products"].clear()
+        caches["products"].set(GENERATION_KEY, 1, timeout=None)
+
+    async def get_both(self, url, sync_view=None, **headers):
+        """Requests `url` from the sync urlconf and from the async one.
+
+        With `sync_view`, the async request fails if it reaches that view.
+        Both start from the same empty listing cache, so both miss it.
+        """
+
+        self.reset_listing_cache()
+
+        with override_settings(ROOT_URLCONF="_komercio.urls"):
+            sync_response = await self.async_client.get(url, **headers)
+
+        self.reset_listing_cache()
+
+        if sync_view is None:
+            return sync_response, await self.async_client.get(url, **headers)
+
+        with mock.patch.object(sync_view, "get", side_effect=AssertionError):
+            return sync_response, await self.async_client.get(url, **headers)
+
+    def assertSameResponse(self, sync_response, async_response):
+        self.assertEqual(sync_response.status_code, async_response.status_code)
+        self.assertEqual(sync_response.content, async_response.content)
+
+        for header in ("Content-Type", "ETag", "Allow", "Vary", "X-Cache"):
+            self.assertEqual(sync_response.get(header), async_response.get(header))
+
+    async def test_list_matches_sync_view(self):
+        for query in ("", "?page=2", "?page=last", "?price_min=5&in_stock=true"):
+            with self.subTest(query=query):
+                self.assertSameResponse(
+                    *await self.get_both(self.base_url + query, ListCreateProductView)
+                )
+
+    async def test_list_reads_the_cache_without_blocking(self):
+        self.reset_listing_cache()
+        cache_class = type(caches["products"])
+
+        def off_the_event_loop(method):
+            def wrapper(*args, **kwargs):
+                with self.assertRaises(RuntimeError):
+                    asyncio.get_running_loop()
+
+                return method(*args, **kwargs)
+
+            return wrapper
+
+        with mock.patch.multiple(
+            cache_class,
+            **{
+                name: off_the_event_loop(getattr(cache_class, name))
+                for name in ("get", "set", "add", "incr")
+            },
+        ):
+            responses = [await self.async_client.get(self.base_url) for _ in "12"]
+
+        self.assertEqual(
+            [response["X-Cache"] for response in responses], ["MISS", "HIT"]
+        )
+
+    async def test_list_hands_unsupported_requests_to_sync_view(self):
+        for query in (
+            "?pagination=cursor",
+            "?price_min=abc",
+            "?page=9",
+            "?format=json",
+        ):
+            with self.subTest(query=query):
+                self.assertSameResponse(*await self.get_both(self.base_url + query))
+
+        # The browsable API embeds a fresh CSRF token, compare the rest.
+        sync_response, async_response = await self.get_both(
+            self.base_url, accept="text/html"
+        )
+        self.assertEqual(sync_response.status_code, async_response.status_code)
+        self.assertEqual(sync_response["Content-Type"], async_response["Content-Type"])
+
+    async def test_list_answers_conditional_requests(self):
+        etag = (await self.async_client.get(self.base_url))["ETag"]
+
+        response = await self.async_client.get(self.base_url, **{"if-none-match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    async def test_retrieve_matches_sync_view(self):
+        sync_response, async_response = await self.get_both(
+            self.detail_url, RetrieveUpdateProductView
+        )
+
+        self.assertSameResponse(sync_response, async_response)
+
+        response = await self.async_client.get(
+            self.detail_url, **{"if-none-match": async_response["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        missing_url = reverse("product-detail", kwargs={"pk": uuid.uuid4()})
+        self.assertSameResponse(*await self.get_both(missing_url))
+
+    async def test_fieldsets_match_sync_view(self):
+        for url in (
+            self.base_url + "?fields=id,price",
+            self.base_url + "?expand=seller&fields=seller,description",
+            self.detail_url + "?fields=price",
+            self.detail_url + "?expand=seller",
+        ):
+            with self.subTest(url=url):
+                self.assertSameResponse(*await self.get_both(url))
+
+        self.assertSameResponse(
+            *await self.get_both(
+                self.base_url + "?sideload=seller&fields=id", ListCreateProductView
+            )
+        )
+
+        for url in (self.base_url + "?fields=x", self.detail_url + "?expand=x"):
+            with self.subTest(url=url):
+                sync_response, async_response = await self.get_both(url)
+
+                self.assertEqual(sync_response.status_code, 400)
+                self.assertSameResponse(sync_response, async_response)
+
+    def test_writes_reach_sync_views(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+        response = self.client.post(
+            self.base_url,
+            {"description": "mesa", "price": "99.90", "quantity": 5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.patch(self.detail_url, {"quantity": 3}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(CACHES=LISTING_CACHES)
+class TestServerTiming(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(
+            username="logan",
+            password="1234",
+            first_name="logan",
+            last_name="mattos",
+            is_seller=True,
+        )
+        cls.seller_token = Token.objects.create(user=cls.seller)
+
+        cls.product = Product.objects.create(
+            description="cadeira", price="10", quantity=1, seller=cls.seller
+        )
+
+        cls.base_url = reverse("product-view")
+        cls.detail_url = reverse("product-detail", kwargs={"pk": cls.product.id})
+        cls.metrics_url = reverse("metrics")
+
+    def setUp(self) -> None:
+        caches["products"].clear()
+
+    def parse_server_timing(self, response):
+        timings = {}
+
+        for metric in response["Server-Timing"].split(", "):
+            name, *params = metric.split(";")
+            timings[name] = dict(param.split("=", 1) for param in params)
+
+        return timings
+
+    def get_metric(self, name, **labels):
+        response = self.client.get(self.metrics_url)
+        selector = ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+        for line in response.content.decode().splitlines():
+            if line.startswith(f"{name}{{{selector}}} "):
+                return float(line.rsplit(" ", 1)[1])
+
+        return 0
+
+    def test_server_timing_reports_each_phase(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.detail_url)
+
+        timings = self.parse_server_timing(response)
+
+        self.assertEqual(
+            set(timings),
+            {
+                "resolve",
+                "auth",
+                "permissions",
+                "db",
+                "serialize",
+                "view",
+                "render",
+                "total",
+            },
+        )
+        self.assertEqual(
+            timings["db"]["desc"], f'"{len(context.captured_queries)} queries"'
+        )
+
+    def test_server_timing_phases_add_up_to_total(self):
+        response = self.client.get(self.base_url)
+
+        timings = self.parse_server_timing(response)
+        total = float(timings.pop("total")["dur"])
+        phases = sum(float(params["dur"]) for params in timings.values())
+
+        self.assertAlmostEqual(phases, total, delta=0.01)
+
+    def test_metrics_count_requests_per_route(self):
+        labels = {"route": "api/products/<pk>/", "method": "GET"}
+        count = self.get_metric("http_request_duration_seconds_count", **labels)
+
+        self.client.get(self.detail_url)
+        self.client.get(self.detail_url)
+
+        self.assertEqual(
+            self.get_metric("http_request_duration_seconds_count", **labels),
+            count + 2,
+        )
+        self.assertGreater(
+            self.get_metric("http_request_db_queries_total", **labels), 0
+        )
+
+    def test_metrics_add_up_every_process(self):
+        labels = {"route": "api/products/", "method": "GET"}
+        other_process = [
+            [
+                "api/products/",
+                "GET",
+                {
+                    "buckets": [5] + [0] * 10,
+                    "count": 5,
+                    "sum": 0.01,
+                    "queries": 10,
+                    "phases": {"db": 0.005},
+                },
+            ]
+        ]
+
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            with open(f"{metrics_dir}/1.json", "w") as file:
+                json.dump(other_process, file)
+
+            with override_settings(METRICS_DIR=metrics_dir):
+                self.client.get(self.base_url)
+                count = self.get_metric("http_request_duration_seconds_count", **labels)
+
+        own_count = self.get_metric("http_request_duration_seconds_count", **labels)
+
+        self.assertEqual(count, own_count + 5)
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_are_only_for_allowed_clients(self):
+        self.assertEqual(
+            self.client.get(self.metrics_url).status_code, status.HTTP_200_OK
+        )
+
+        remote = {"REMOTE_ADDR": "203.0.113.7"}
+        response = self.client.get(self.metrics_url, **remote)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(
+            self.metrics_url, HTTP_AUTHORIZATION="Bearer wrong", **remote
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(
+            self.metrics_url, HTTP_AUTHORIZATION="Bearer scraper", **remote
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(ROOT_URLCONF="_komercio.urls_async")
+    async def test_async_views_report_server_timing(self):
+        # The queries run on the connection of the test thread, which was
+        # opened before the middleware started listening for new ones.
+        await sync_to_async(install_query_recorder)(connection)
+
+        response = await self.async_client.get(self.detail_url)
+
+        timings = self.parse_server_timing(response)
+
+        self.assertIn("db", timings)
+        self.assertIn("view", timings)
+
+
+class TestTrafficCapture(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = User.objects.create_user(
+            username="logan",
+            password="1234",
+            first_name="logan",
+            last_name="mattos",
+            is_seller=True,
+        )
+        cls.seller_token = Token.objects.create(user=cls.seller)
+
+        cls.base_url = reverse("product-view")
+        cls.register_url = reverse("account-register")
+
+    def capture(self, *requests):
+        with tempfile.TemporaryDirectory() as capture_dir:
+            path = f"{capture_dir}/traffic.jsonl"
+
+            with override_settings(TRAFFIC_CAPTURE_FILE=path):
+                for request in requests:
+                    request()
+
+            with open(path) as file:
+                return [json.loads(line) for line in file]
+
+    def test_capture_records_requests(self):
+        [record] = self.capture(lambda: self.client.get(self.base_url, {"page": 1}))
+
+        self.assertEqual(record["method"], "GET")
+        self.assertEqual(record["path"], self.base_url)
+        self.assertEqual(record["query"], "page=1")
+        self.assertEqual(record["route"], "api/products/")
+        self.assertEqual(record["status"], 200)
+        self.assertIsNone(record["auth"])
+        self.assertIsNone(record["body"])
+
+    def test_capture_anonymizes_credentials(self):
+        account_data = {
+            "username": "yoshi",
+            "password": "1234",
+            "first_name": "yoshi",
+            "last_name": "mattos",
+            "is_seller": False,
+        }
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+        records = self.capture(
+            lambda: self.client.post(
+                self.base_url,
+                {"description": "cadeira", "price": "10", "quantity": 1},
+                format="json",
+            ),
+            lambda: self.client.post(self.register_url, account_data, format="json"),
+        )
+
+        self.assertNotIn(self.seller_token.key, json.dumps(records))
+        self.assertEqual(records[0]["auth"]["user"], records[1]["auth"]["user"])
+        self.assertEqual(records[0]["auth"]["is_seller"], True)
+        self.assertEqual(
+            json.loads(records[1]["body"]), {**account_data, "password": "<redacted>"}
+        )
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_capture_skips_bodies_too_big_to_read(self):
+        products_data = [
+            {"description": f"cadeira {index}", "price": "10", "quantity": 1}
+            for index in range(10)
+        ]
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.seller_token.key)
+
+        [record] = self.capture(
+            lambda: self.client.post(self.base_url, products_data, format="json")
+        )
+
+        self.assertEqual(record["status"], status.HTTP_201_CREATED)
+        self.assertIsNone(record["body"])
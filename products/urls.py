@@ -4,6 +4,26 @@ from . import views
 
 urlpatterns = [
     path("products/", views.ListCreateProductView.as_view(), name="product-view"),
+    path(
+        "products/cache/",
+        views.ProductListingCacheStatsView.as_view(),
+        name="product-cache-stats",
+    ),
+    path(
+        "products/export/",
+        views.ProductExportView.as_view(),
+        name="product-export",
+    ),
+    path(
+        "products/inventory/",
+        views.BulkUpdateInventoryView.as_view(),
+        name="product-inventory",
+    ),
+    path(
+        "products/reservations/",
+        views.StockReservationView.as_view(),
+        name="product-reservations",
+    ),
     path(
         "products/<pk>/",
         views.RetrieveUpdateProductView.as_view(),
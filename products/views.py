@@ -1,38 +1,246 @@
-from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from products.cache import (
+    get_cached_listing,
+    get_listing_generation,
+    get_listing_key,
+    get_listing_stats,
+    set_cached_listing,
+)
+from products.export import EXPORT_WRITERS, iter_product_rows
+from products.filters import LISTING_ORDERING, filter_listing, filter_products
 from products.models import Product
+from products.pagination import ProductCursorPagination, ProductPageNumberPagination
 from products.permissions import IsSellerOrReadOnly, IsSellerProductOwner
+from products.renderers import CSVRenderer, NDJSONRenderer
+from products.sharding import ShardedQuerySetMixin, shard_queryset
+from products.services import (
+    bulk_create_products,
+    bulk_update_inventory,
+    reserve_stock,
+)
 from products.serializers import (
     ProductFilterSerializer,
+    ProductFilterValuesSerializer,
     ProductGeneralSerializer,
+    ProductGeneralValuesSerializer,
     ProductDetailedSerializer,
+    ProductInventorySerializer,
+    StockReservationSerializer,
+)
+from users.authentication import CachedTokenAuthentication
+from users.permissions import CustomAdminPermission
+from utils.mixins import (
+    ConditionalRequestMixin,
+    PaginationByQueryParamMixin,
+    SerializerByMethodMixin,
+    SparseFieldsetMixin,
+    TimedChecksMixin,
+    ValuesSerializerMixin,
 )
-
-from utils.mixins import SerializerByMethodMixin
 
 
-class ListCreateProductView(SerializerByMethodMixin, generics.ListCreateAPIView):
+class ListCreateProductView(
+    TimedChecksMixin,
+    ConditionalRequestMixin,
+    SerializerByMethodMixin,
+    PaginationByQueryParamMixin,
+    SparseFieldsetMixin,
+    ValuesSerializerMixin,
+    ShardedQuerySetMixin,
+    generics.ListCreateAPIView,
+):
+    allow_sideload = True
     permission_classes = [IsSellerOrReadOnly]
-    queryset = Product.objects.all()
+    queryset = Product.objects.order_by(*LISTING_ORDERING)
     serializer_map = {
         "GET": ProductGeneralSerializer,
         "POST": ProductDetailedSerializer,
     }
-    authentication_classes = [TokenAuthentication]
+    values_serializer_map = {
+        "GET": ProductGeneralValuesSerializer,
+    }
+    pagination_class = ProductPageNumberPagination
+    pagination_map = {
+        "cursor": ProductCursorPagination,
+    }
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if self.request.method != "GET":
+            return queryset
+
+        return filter_listing(queryset, self.request.query_params)
+
+    def get_conditional_state(self):
+        # The listing generation changes on every product write, so it
+        # versions the listing (for preconditions on POST too) without
+        # touching the database.
+        self.listing_generation = get_listing_generation()
+
+        if self.listing_generation is None:
+            return None
+
+        return (self.listing_generation,), None
+
+    def list(self, request, *args, **kwargs):
+        if self.listing_generation is None:
+            return super().list(request, *args, **kwargs)
+
+        key = get_listing_key(request, self.listing_generation)
+        data = get_cached_listing(key)
+
+        if data is not None:
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        set_cached_listing(key, response.data)
+        response["X-Cache"] = "MISS"
+
+        return response
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
+
+        return super().create(request, *args, **kwargs)
+
+    def bulk_create(self, request):
+        created, errors = bulk_create_products(request.user, request.data)
+
+        response_status = status.HTTP_201_CREATED
+        if not created and errors:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(
+            {
+                "created": [
+                    {"index": index, "id": product.id} for index, product in created
+                ],
+                "errors": errors,
+            },
+            response_status,
+        )
 
     def perform_create(self, serializer):
         serializer.save(seller=self.request.user)
 
 
 class RetrieveUpdateProductView(
+    TimedChecksMixin,
+    ConditionalRequestMixin,
     SerializerByMethodMixin,
+    SparseFieldsetMixin,
+    ValuesSerializerMixin,
+    ShardedQuerySetMixin,
     generics.RetrieveUpdateAPIView,
 ):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsSellerProductOwner]
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related("seller")
     serializer_map = {
         "GET": ProductFilterSerializer,
         "PATCH": ProductDetailedSerializer,
     }
+    values_serializer_map = {
+        "GET": ProductFilterValuesSerializer,
+    }
+
+    def get_conditional_state(self):
+        lookups = ["updated_at", "seller__updated_at"]
+
+        if self.request.method == "GET" and not (
+            self.get_sparse_values_serializer().relations
+        ):
+            # The seller is left out, so is its version (and the join).
+            lookups.pop()
+
+        try:
+            state = (
+                shard_queryset(Product.objects.all())
+                .filter(pk=self.kwargs["pk"])
+                .values_list(*lookups)
+                .first()
+            )
+        except (ValueError, ValidationError):
+            return None
+
+        return state and (state, max(state))
+
+
+class BulkUpdateInventoryView(TimedChecksMixin, generics.GenericAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsSellerOrReadOnly]
+    serializer_class = ProductInventorySerializer
+
+    def patch(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return Response(
+                {"detail": "Expected a list of inventory changes."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(bulk_update_inventory(request.user, request.data))
+
+
+class StockReservationView(TimedChecksMixin, generics.GenericAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockReservationSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        items = serializer.validated_data["items"]
+        reserve_stock(items)
+
+        return Response(
+            {
+                "items": [
+                    {"product": product_id, "quantity": quantity}
+                    for product_id, quantity in items.items()
+                ]
+            },
+            status.HTTP_201_CREATED,
+        )
+
+
+class ProductListingCacheStatsView(TimedChecksMixin, APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [CustomAdminPermission]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_listing_stats())
+
+
+class ProductExportView(TimedChecksMixin, APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        queryset = filter_products(
+            shard_queryset(Product.objects.all()), request.query_params
+        )
+        rows = iter_product_rows(queryset)
+
+        response = StreamingHttpResponse(
+            EXPORT_WRITERS[renderer.format](rows),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="products.{renderer.format}"'
+
+        return response
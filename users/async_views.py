@@ -0,0 +1,131 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_backends
+from django.db.models import Count, Max
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+
+from users.hashing import HashingPoolBusy, amake_password
+from users.models import User
+from users.newest import aget_newest_accounts, get_newest_state
+from users.serializers import AccountSerializer, AccountValuesSerializer
+from utils.async_views import AsyncReadView
+
+
+class AsyncAccountListMixin:
+    query_params = ("page",)
+
+    async def aget_state(self):
+        state = await User.objects.aaggregate(
+            last_updated=Max("updated_at"), count=Count("pk")
+        )
+
+        return (state["last_updated"], state["count"]), None
+
+    def get_queryset(self):
+        return User.objects.values(*AccountValuesSerializer.lookups)
+
+    async def aget_response(self):
+        data = await self.apaginate(self.get_queryset(), AccountValuesSerializer)
+
+        if data is None:
+            return None
+
+        return self.render(data)
+
+
+class AsyncListAccountView(AsyncAccountListMixin, AsyncReadView):
+    http_method_names = ["get", "post"]
+
+    async def post(self, request, *args, **kwargs):
+        data = self.parse_json()
+
+        if data is None:
+            return await self.fallback(request, *args, **kwargs)
+
+        serializer = AccountSerializer(data=data)
+
+        if not await sync_to_async(serializer.is_valid)():
+            return self.finalize_response(self.render(serializer.errors, 400))
+
+        try:
+            password_hash = await amake_password(serializer.validated_data["password"])
+        except HashingPoolBusy as exc:
+            return self.render_exception(exc)
+
+        await sync_to_async(serializer.save)(password_hash=password_hash)
+
+        return self.finalize_response(self.render(serializer.data, 201))
+
+
+class AsyncListAccountByDateView(AsyncReadView):
+    query_params = ("page",)
+
+    async def aget_state(self):
+        self.rows = await aget_newest_accounts(self.kwargs["num"])
+
+        return get_newest_state(self.rows)
+
+    async def aget_response(self):
+        data = self.paginate(self.rows, AccountValuesSerializer)
+
+        if data is None:
+            return None
+
+        return self.render(data)
+
+
+class AsyncLoginView(AsyncReadView):
+    """Answers `ObtainAuthToken` JSON logins, awaiting the password check."""
+
+    http_method_names = ["post"]
+
+    def can_serve(self, request) -> bool:
+        # Other backends may not check passwords the same way.
+        backends = get_backends()
+
+        if len(backends) != 1 or not hasattr(backends[0], "aauthenticate"):
+            return False
+
+        return super().can_serve(request)
+
+    def get_credentials(self, data):
+        """Returns the username and password, if `AuthTokenSerializer` would
+        take them as they are."""
+
+        username, password = data.get("username"), data.get("password")
+
+        if not isinstance(username, str) or not isinstance(password, str):
+            return None
+
+        username = username.strip()
+
+        if not username or not password or "\x00" in username + password:
+            return None
+
+        return username, password
+
+    async def post(self, request, *args, **kwargs):
+        data = self.parse_json()
+        credentials = data and self.get_credentials(data)
+
+        if credentials is None:
+            return await self.fallback(request, *args, **kwargs)
+
+        try:
+            user = await get_backends()[0].aauthenticate(request, *credentials)
+        except HashingPoolBusy as exc:
+            return self.render_exception(exc)
+
+        if user is None:
+            errors = {
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    _("Unable to log in with provided credentials.")
+                ]
+            }
+
+            return self.finalize_response(self.render(errors, 400))
+
+        token, created = await Token.objects.aget_or_create(user=user)
+
+        return self.finalize_response(self.render({"token": token.key}))
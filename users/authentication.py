@@ -0,0 +1,117 @@
+"""Token authentication with the token -> user lookup cached.
+
+`CachedTokenAuthentication` keeps the user of every successful lookup in
+`CACHES[AUTH_TOKEN_CACHE]`, under a hash of the token key. Only its
+`USER_FIELDS` are kept, never the key or the password hash: the user is
+rebuilt from them and reads its other fields on first access. Saving or deleting a user
+or a token (see `users.signals`) drops its entry, so a deactivated account
+or a revoked token stops authenticating on the next request. Queryset
+`update()`/`delete()` calls send no signals: call `invalidate_user_tokens`
+after them.
+
+The drop only reaches every worker through a shared backend (Redis, the
+database, files). A process-local cache keeps its entries for
+`AUTH_TOKEN_LOCAL_TIMEOUT` seconds only, the longest a revocation made by
+another worker can go unnoticed.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+from users.serializers import SellerSerializer
+from utils.caches import is_process_local
+from utils.replicas import use_primary
+
+TOKEN_KEY = "auth:token:%s"
+USER_KEY = "auth:user:%s"
+
+# What the permissions check and what a product shows of its seller.
+USER_FIELDS = (*SellerSerializer.Meta.fields, "is_staff")
+
+
+def get_token_cache():
+    return caches[settings.AUTH_TOKEN_CACHE]
+
+
+def get_token_cache_key(key: str) -> str:
+    return TOKEN_KEY % hashlib.sha256(key.encode()).hexdigest()
+
+
+def drop_cached_user(user_pk, token_key: str = None) -> None:
+    cache = get_token_cache()
+    user_key = USER_KEY % user_pk
+    keys = [user_key, cache.get(user_key)]
+
+    if token_key is not None:
+        keys.append(get_token_cache_key(token_key))
+
+    cache.delete_many([key for key in keys if key])
+
+
+def invalidate_user_tokens(user_pk, token_key: str = None) -> None:
+    """Drops the cached lookups of a user.
+
+    Like the product listing cache, the entry is dropped right away and
+    again once the surrounding transaction commits, so a lookup reading the
+    not-yet-committed state cannot outlive the write.
+    """
+
+    drop_cached_user(user_pk, token_key)
+    transaction.on_commit(lambda: drop_cached_user(user_pk, token_key))
+
+
+def get_cached_values(user) -> dict:
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+
+def rebuild_token(key: str, values: dict):
+    """The token `key` of the user with the cached `values`, as read from
+    the primary."""
+
+    fields = [
+        field.attname for field in User._meta.concrete_fields if field.attname in values
+    ]
+    user = User.from_db(DEFAULT_DB_ALIAS, fields, [values[field] for field in fields])
+    token = Token.from_db(DEFAULT_DB_ALIAS, ["key", "user_id"], [key, user.pk])
+    token.user = user
+
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in `TokenAuthentication` that skips the token query on hits."""
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cache_key = get_token_cache_key(key)
+        values = cache.get(cache_key)
+
+        if values is None:
+            # Read from the primary, which a replica may lag behind on new
+            # and revoked tokens. Raises for unknown keys and inactive
+            # users, neither is cached.
+            with use_primary():
+                user, token = super().authenticate_credentials(key)
+
+            timeout = (
+                settings.AUTH_TOKEN_LOCAL_TIMEOUT
+                if is_process_local(cache)
+                else DEFAULT_TIMEOUT
+            )
+            cache.set_many(
+                {cache_key: get_cached_values(user), USER_KEY % user.pk: cache_key},
+                timeout,
+            )
+
+            return user, token
+
+        token = rebuild_token(key, values)
+
+        return token.user, token
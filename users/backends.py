@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from users.hashing import acheck_password, amake_password, check_password, make_password
+
+UserModel = get_user_model()
+
+
+class HashingPoolModelBackend(ModelBackend):
+    """`ModelBackend` checking passwords through `users.hashing`."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so unknown usernames take as long to turn down.
+            make_password(password)
+            return None
+
+        if check_password(password, user) and self.user_can_authenticate(user):
+            return user
+
+        return None
+
+    async def aauthenticate(self, request, username, password):
+        try:
+            user = await UserModel._default_manager.aget(
+                **{UserModel.USERNAME_FIELD: username}
+            )
+        except UserModel.DoesNotExist:
+            await amake_password(password)
+            return None
+
+        if await acheck_password(password, user) and self.user_can_authenticate(user):
+            return user
+
+        return None
@@ -0,0 +1,177 @@
+"""Password hashing off the request workers.
+
+PBKDF2 keeps a core busy for the whole hash, so login and registration run
+it in a bounded pool of `PASSWORD_HASHING_WORKERS` processes instead of
+the request worker. At most `PASSWORD_HASHING_MAX_PENDING` hashes wait or
+run at once; past that, `HashingPoolBusy` turns the request away with a
+503 rather than letting a login burst queue up behind every other request.
+With no workers, hashing runs inline, as in plain Django.
+
+`make_password` and `check_password` block the calling thread until the
+pool answers; `amake_password` and `acheck_password` await it, so async
+views never tie up the event loop or a thread with a hash. A successful
+check against a hash made with other parameters (another hasher, or other
+`PASSWORD_HASHER_ITERATIONS`) stores a new hash, like Django does.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import APIException
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """Django's PBKDF2 hasher, run `PASSWORD_HASHER_ITERATIONS` times."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHER_ITERATIONS
+
+
+class HashingPoolBusy(APIException):
+    status_code = 503
+    default_detail = "Too many logins at once, try again in a moment."
+    default_code = "password_hashing_busy"
+    wait = 1
+
+
+def verify_password(password: str, encoded: str):
+    """Checks `password` like `django.contrib.auth.hashers.check_password`.
+
+    Returns whether it matches and, when the hash is due for an update, the
+    new hash, so a rehash costs no second trip to the pool.
+    """
+
+    preferred = hashers.get_hasher("default")
+
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False, None
+
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    is_correct = hasher.verify(password, encoded)
+
+    if not is_correct and not hasher_changed and must_update:
+        hasher.harden_runtime(password, encoded)
+
+    if is_correct and must_update:
+        return True, preferred.encode(password, preferred.salt())
+
+    return is_correct, None
+
+
+# Settings the workers hash with, passed on as a spawned worker starts
+# from the settings module and would miss later changes (or overrides).
+WORKER_SETTINGS = ("PASSWORD_HASHERS", "PASSWORD_HASHER_ITERATIONS")
+POOL_SETTINGS = (
+    *WORKER_SETTINGS,
+    "PASSWORD_HASHING_WORKERS",
+    "PASSWORD_HASHING_MAX_PENDING",
+)
+
+pool = None
+pool_slots = None
+pool_lock = threading.Lock()
+
+
+def init_worker(values) -> None:
+    if settings.configured:
+        for name, value in values.items():
+            setattr(settings, name, value)
+    else:
+        settings.configure(**values)
+
+
+def get_pool():
+    global pool, pool_slots
+
+    with pool_lock:
+        if pool is None:
+            # Spawned, as forking a threaded server process is unsafe.
+            pool = ProcessPoolExecutor(
+                settings.PASSWORD_HASHING_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=({name: getattr(settings, name) for name in WORKER_SETTINGS},),
+            )
+            pool_slots = threading.BoundedSemaphore(
+                settings.PASSWORD_HASHING_MAX_PENDING
+            )
+
+    return pool, pool_slots
+
+
+def shutdown_pool() -> None:
+    """Stops the workers; the next hash starts new ones."""
+
+    global pool
+
+    with pool_lock:
+        if pool is not None:
+            pool.shutdown()
+            pool = None
+
+
+def submit(function, *args) -> Future:
+    if not settings.PASSWORD_HASHING_WORKERS:
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+    pool, slots = get_pool()
+
+    if not slots.acquire(blocking=False):
+        raise HashingPoolBusy
+
+    try:
+        future = pool.submit(function, *args)
+    except BaseException:
+        slots.release()
+        raise
+
+    future.add_done_callback(lambda future: slots.release())
+
+    return future
+
+
+def make_password(password: str) -> str:
+    return submit(hashers.make_password, password).result()
+
+
+async def amake_password(password: str) -> str:
+    return await asyncio.wrap_future(submit(hashers.make_password, password))
+
+
+def check_password(password: str, user) -> bool:
+    if password is None or not hashers.is_password_usable(user.password):
+        return False
+
+    is_correct, encoded = submit(verify_password, password, user.password).result()
+
+    if encoded:
+        user.password = encoded
+        user.save(update_fields=["password"])
+
+    return is_correct
+
+
+async def acheck_password(password: str, user) -> bool:
+    if password is None or not hashers.is_password_usable(user.password):
+        return False
+
+    is_correct, encoded = await asyncio.wrap_future(
+        submit(verify_password, password, user.password)
+    )
+
+    if encoded:
+        user.password = encoded
+        await sync_to_async(user.save)(update_fields=["password"])
+
+    return is_correct
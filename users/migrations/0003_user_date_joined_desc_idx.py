@@ -0,0 +1,19 @@
+# Generated by Django 4.1.2 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["-date_joined", "-id"], name="user_date_joined_desc_idx"
+            ),
+        ),
+    ]
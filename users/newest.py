@@ -0,0 +1,243 @@
+"""In-memory index of the newest accounts, for `/api/accounts/newest/<num>/`.
+
+Each process keeps the `ACCOUNTS_NEWEST_MAX` most recently joined accounts
+in a ring, newest last, and answers `num` up to that cap from it without
+touching the database. The ring is loaded with one query on the
+`date_joined` index and then kept current by the `User` signals (see
+`users.signals`): once a write commits, it is applied to the ring of the
+process that made it.
+
+Processes find out about each other's writes through a generation number
+in `CACHES[ACCOUNTS_NEWEST_CACHE]`, which every write bumps. A ring is
+served only while its generation is current, and is reloaded otherwise.
+A write inside a transaction also bumps the generation right away, so its
+own connection never reads a ring without it. Bulk writes, which send no
+signals, call `invalidate_newest_accounts()`. With a process-local backend
+the other processes' writes can not be seen: there is no generation then,
+and every listing is read from the `date_joined` index.
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from users.serializers import AccountValuesSerializer
+from utils.caches import is_process_local
+from utils.replicas import use_primary
+
+GENERATION_KEY = "users:newest:generation"
+
+FIELDS = (*AccountValuesSerializer.lookups, "updated_at")
+
+
+def get_newest_cache():
+    return caches[settings.ACCOUNTS_NEWEST_CACHE]
+
+
+def get_newest_generation(generation=None):
+    if generation is None:
+        cache = get_newest_cache()
+
+        if is_process_local(cache):
+            return None
+
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+
+    return generation
+
+
+async def aget_newest_generation():
+    """The current generation through the async cache interface, or None if
+    it had been evicted (or there is none)."""
+
+    cache = get_newest_cache()
+
+    if is_process_local(cache):
+        return None
+
+    return await cache.aget(GENERATION_KEY)
+
+
+def bump_newest_generation():
+    """Returns the new generation, or None if it had been evicted (or there
+    is none)."""
+
+    cache = get_newest_cache()
+
+    if is_process_local(cache):
+        return None
+
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        return None
+
+
+def get_sort_key(row):
+    return row["date_joined"], row["id"]
+
+
+class NewestAccounts:
+    """The newest accounts, oldest first, with the generation they are of.
+
+    `complete` tells whether the ring holds every account. If not, it still
+    holds the true newest `len(ring)` ones: a deletion shrinks it, and an
+    account joining older than all of them is left out.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        self.ring = None
+        self.generation = None
+        self.complete = False
+
+    def get(self, num: int, generation: int):
+        with self.lock:
+            if self.ring is None or generation is None:
+                return None
+
+            if self.generation != generation:
+                return None
+
+            if num > len(self.ring) and not self.complete:
+                return None
+
+            return list(islice(reversed(self.ring), num))
+
+    def load(self, generation: int) -> list:
+        """Reads the newest accounts, newest first, into the ring."""
+
+        from users.models import User
+
+        size = settings.ACCOUNTS_NEWEST_MAX
+
+        # The ring is served as of `generation`, which a replica may lag.
+        with use_primary():
+            rows = list(
+                User.objects.order_by("-date_joined", "-id").values(*FIELDS)[:size]
+            )
+
+        with self.lock:
+            self.ring = deque(reversed(rows), maxlen=size)
+            self.generation = generation
+            self.complete = len(rows) < size
+
+        return rows
+
+    def apply(self, pk, row, generations) -> None:
+        """Replaces (or, with no `row`, removes) the account `pk`.
+
+        `generations` are the ones the write bumped the generation to. The
+        ring must be of the one right before them or in between (reloaded
+        while the write was uncommitted, with or without it); a ring that
+        missed other writes is dropped instead, for the next read to reload.
+        """
+
+        with self.lock:
+            if (
+                self.ring is None
+                or None in generations
+                or generations[-1] - generations[0] != len(generations) - 1
+                or not generations[0] - 1 <= self.generation < generations[-1]
+            ):
+                self.clear()
+                return
+
+            self.generation = generations[-1]
+
+            for index, other in enumerate(self.ring):
+                if other["id"] == pk:
+                    del self.ring[index]
+                    break
+
+            if row is None:
+                return
+
+            keys = [get_sort_key(other) for other in self.ring]
+            index = bisect.bisect(keys, get_sort_key(row))
+
+            if index == 0 and not self.complete:
+                # Older than the whole ring, so maybe than accounts left out.
+                return
+
+            if len(self.ring) == self.ring.maxlen:
+                if index == 0:
+                    self.complete = False
+                    return
+
+                self.ring.popleft()
+                self.complete = False
+                index -= 1
+
+            self.ring.insert(index, row)
+
+
+newest_accounts = NewestAccounts()
+
+
+def get_newest_limit(num: int) -> int:
+    return min(num, settings.ACCOUNTS_NEWEST_MAX)
+
+
+def get_newest_accounts(num: int, generation=None) -> list:
+    """Returns the rows of the `num` newest accounts (at most the cap)."""
+
+    num = get_newest_limit(num)
+    generation = get_newest_generation(generation)
+    rows = newest_accounts.get(num, generation)
+
+    if rows is None:
+        rows = newest_accounts.load(generation)[:num]
+
+    return rows
+
+
+async def aget_newest_accounts(num: int) -> list:
+    generation = await aget_newest_generation()
+    rows = newest_accounts.get(get_newest_limit(num), generation)
+
+    if rows is None:
+        rows = await sync_to_async(get_newest_accounts)(num, generation)
+
+    return rows
+
+
+def get_newest_state(rows):
+    """The `(version, last_modified)` of a listing of `rows`.
+
+    No `Last-Modified`, as an account deleted from the listing would not
+    make it any newer.
+    """
+
+    return tuple(f"{row['id']}:{row['updated_at'].isoformat()}" for row in rows), None
+
+
+def record_account_change(user, deleted=False) -> None:
+    generations = ()
+
+    if transaction.get_connection().in_atomic_block:
+        generations = (bump_newest_generation(),)
+
+    pk = user.pk
+    row = None if deleted else {field: getattr(user, field) for field in FIELDS}
+
+    transaction.on_commit(
+        lambda: newest_accounts.apply(pk, row, (*generations, bump_newest_generation()))
+    )
+
+
+def invalidate_newest_accounts() -> None:
+    bump_newest_generation()
+    transaction.on_commit(bump_newest_generation)
@@ -1,12 +1,24 @@
 from rest_framework import serializers
+from .hashing import make_password
 from .models import User
+from utils.serializers import TimedSerializerMixin, ValuesSerializer
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class AccountSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     def create(self, validated_data):
-        return User.objects.create_user(**validated_data)
+        # Like `create_user`, hashing through the pool unless the (async)
+        # view hashed already and saved with `password_hash`.
+        password = validated_data.pop("password")
+        password_hash = validated_data.pop("password_hash", None)
+        username = User.normalize_username(validated_data.pop("username"))
+
+        return User.objects.create(
+            username=username,
+            password=password_hash or make_password(password),
+            **validated_data,
+        )
 
     class Meta:
         model = User
@@ -24,6 +36,9 @@ class AccountSerializer(serializers.ModelSerializer):
         extra_kwargs = {"is_seller": {"required": True}}
 
 
+AccountValuesSerializer = ValuesSerializer(AccountSerializer)
+
+
 class SellerSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -39,7 +54,7 @@ class SellerSerializer(serializers.ModelSerializer):
         ]
 
 
-class AccountUpdateSerializer(serializers.ModelSerializer):
+class AccountUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -58,7 +73,7 @@ class AccountUpdateSerializer(serializers.ModelSerializer):
         read_only_fields = ["is_active"]
 
 
-class AccountDeactivateSerializer(serializers.ModelSerializer):
+class AccountDeactivateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
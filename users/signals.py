@@ -0,0 +1,42 @@
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users import hashing
+from users.authentication import invalidate_user_tokens
+from users.models import User
+from users.newest import FIELDS as NEWEST_FIELDS
+from users.newest import record_account_change
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_token_cache(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def record_newest_account_save(sender, instance, update_fields=None, **kwargs):
+    # E.g. `last_login` or a password rehash, which the listing never shows.
+    if update_fields and update_fields.isdisjoint(NEWEST_FIELDS):
+        return
+
+    record_account_change(instance)
+
+
+@receiver(post_delete, sender=User)
+def record_newest_account_delete(sender, instance, **kwargs):
+    record_account_change(instance, deleted=True)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token_cache(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.user_id, instance.key)
+
+
+@receiver(setting_changed)
+def reset_hashing_pool(setting, **kwargs):
+    if setting in hashing.POOL_SETTINGS:
+        hashing.shutdown_pool()
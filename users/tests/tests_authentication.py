@@ -0,0 +1,156 @@
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.views import status
+
+from users.authentication import (
+    CachedTokenAuthentication,
+    get_token_cache,
+    get_token_cache_key,
+)
+from users.models import User
+
+
+SHARED_CACHES = {
+    **settings.CACHES,
+    "auth": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(),
+    },
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TestCachedTokenAuthentication(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.admin_user_data = {
+            "username": "kamila",
+            "password": "1234",
+            "first_name": "kamila",
+            "last_name": "muller",
+            "is_seller": False,
+        }
+
+        owner_account = User.objects.create_user(**cls.user_data)
+        admin_account = User.objects.create_superuser(**cls.admin_user_data)
+
+        cls.owner_token = Token.objects.create(user=owner_account)
+        cls.admin_token = Token.objects.create(user=admin_account)
+
+        cls.update_url = reverse("account-update", kwargs={"pk": owner_account.id})
+        cls.manager_url = reverse("account-manager", kwargs={"pk": owner_account.id})
+
+    def setUp(self) -> None:
+        get_token_cache().clear()
+
+    def authenticate(self, token):
+        return CachedTokenAuthentication().authenticate_credentials(token.key)
+
+    def test_cached_token_saves_a_query(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.admin_token.key)
+        executed = []
+
+        for is_active in (True, True):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.patch(self.manager_url, {"is_active": is_active})
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            executed.append(len(context.captured_queries))
+
+        self.assertEqual(executed[0] - 1, executed[1])
+
+    def test_cached_user_is_a_copy(self):
+        user, token = self.authenticate(self.owner_token)
+        user.first_name = "changed"
+
+        user, token = self.authenticate(self.owner_token)
+
+        self.assertEqual(user.first_name, self.user_data["first_name"])
+        self.assertEqual(token, self.owner_token)
+
+    def test_deactivated_account_can_not_authenticate(self):
+        self.authenticate(self.owner_token)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.admin_token.key)
+        self.client.patch(self.manager_url, {"is_active": False})
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.owner_token.key)
+        response = self.client.patch(self.update_url, {"first_name": "logan"})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_can_not_authenticate(self):
+        self.authenticate(self.owner_token)
+        Token.objects.get(pk=self.owner_token.pk).delete()
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.owner_token.key)
+        response = self.client.patch(self.update_url, {"first_name": "logan"})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_account_is_read_again(self):
+        self.authenticate(self.owner_token)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.owner_token.key)
+        self.client.patch(self.update_url, {"first_name": "first name updated"})
+
+        user, token = self.authenticate(self.owner_token)
+
+        self.assertEqual(user.first_name, "first name updated")
+
+    def test_cache_holds_no_credentials(self):
+        self.authenticate(self.owner_token)
+
+        values = get_token_cache().get(get_token_cache_key(self.owner_token.key))
+        user = User.objects.get(pk=self.owner_token.user_id)
+
+        self.assertNotIn("password", values)
+        self.assertNotIn(self.owner_token.key, repr(values))
+        self.assertNotIn(user.password, repr(values))
+
+    def test_cached_user_reads_other_fields_on_access(self):
+        self.authenticate(self.owner_token)
+        user, token = self.authenticate(self.owner_token)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user.is_seller)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password(self.user_data["password"]))
+
+    @override_settings(CACHES=settings.CACHES, AUTH_TOKEN_LOCAL_TIMEOUT=5)
+    def test_process_local_cache_expires_quickly(self):
+        with CaptureQueriesContext(connection) as context:
+            self.authenticate(self.owner_token)
+            self.authenticate(self.owner_token)
+
+        self.assertEqual(len(context.captured_queries), 1)
+
+        # As if another worker revoked it, whose drop misses this process.
+        with mock.patch("users.authentication.drop_cached_user"):
+            Token.objects.filter(pk=self.owner_token.pk).delete()
+
+        self.authenticate(self.owner_token)
+
+        with mock.patch("time.time", return_value=time.time() + 5):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(self.owner_token)
@@ -0,0 +1,92 @@
+from django.contrib.auth.hashers import check_password as django_check_password
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework.views import status
+
+from users import hashing
+from users.models import User
+
+
+class TestHashingService(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.login_url = reverse("login")
+        cls.register_url = reverse("account-register")
+
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+    def test_hashes_match_django_hashers(self):
+        for workers in (0, 1):
+            with self.subTest(workers=workers):
+                with override_settings(PASSWORD_HASHING_WORKERS=workers):
+                    encoded = hashing.make_password("1234")
+
+                self.assertTrue(django_check_password("1234", encoded))
+                self.assertFalse(django_check_password("4321", encoded))
+
+    def test_register_hashes_password(self):
+        response = self.client.post(self.register_url, self.user_data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = User.objects.get(username="logan")
+        self.assertTrue(user.check_password("1234"))
+
+    def test_login_rehashes_with_new_iterations(self):
+        user = User.objects.create_user(**self.user_data)
+
+        with override_settings(PASSWORD_HASHER_ITERATIONS=1000):
+            response = self.client.post(self.login_url, self.user_data)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+
+            response = self.client.post(self.login_url, self.user_data)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_wrong_password_is_not_rehashed(self):
+        user = User.objects.create_user(**self.user_data)
+        encoded = user.password
+
+        with override_settings(PASSWORD_HASHER_ITERATIONS=1000):
+            response = self.client.post(
+                self.login_url, {**self.user_data, "password": "4321"}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
+
+    def test_unusable_password_never_matches(self):
+        user = User.objects.create_user(username="yoshi", password=None)
+
+        self.assertFalse(hashing.check_password("", user))
+        self.assertFalse(hashing.check_password(None, user))
+
+    @override_settings(PASSWORD_HASHING_MAX_PENDING=0)
+    def test_busy_pool_turns_logins_away(self):
+        User.objects.create_user(**self.user_data)
+
+        response = self.client.post(self.login_url, self.user_data)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+
+        response = self.client.post(
+            self.register_url, {**self.user_data, "username": "yoshi"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(User.objects.filter(username="yoshi").exists())
@@ -0,0 +1,206 @@
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework.views import status
+
+from users.models import User
+from users.newest import (
+    bump_newest_generation,
+    get_newest_accounts,
+    get_newest_cache,
+    invalidate_newest_accounts,
+    newest_accounts,
+)
+
+
+# The ring is only used with a cache every process shares.
+SHARED_CACHES = {
+    **settings.CACHES,
+    "auth": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "komercio-tests-auth"),
+    },
+}
+
+
+def get_expected_ids(num):
+    return list(
+        User.objects.order_by("-date_joined", "-id").values_list("id", flat=True)[:num]
+    )
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TestNewestAccountsView(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        now = timezone.now()
+        password = make_password(None)
+
+        User.objects.bulk_create(
+            User(
+                username=f"logan{index}",
+                password=password,
+                date_joined=now - timedelta(days=index),
+            )
+            for index in range(5)
+        )
+        invalidate_newest_accounts()
+
+    def setUp(self) -> None:
+        newest_accounts.clear()
+
+    def test_lists_newest_accounts_first(self):
+        response = self.client.get(reverse("list-view", kwargs={"num": 3}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [row["username"] for row in response.data["results"]],
+            ["logan0", "logan1"],
+        )
+
+    @override_settings(ACCOUNTS_NEWEST_MAX=4)
+    def test_num_is_capped(self):
+        response = self.client.get(reverse("list-view", kwargs={"num": 1000}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 4)
+
+    def test_repeated_requests_skip_the_database(self):
+        url = reverse("list-view", kwargs={"num": 5})
+        response = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(url)
+
+        self.assertEqual(response.content, cached_response.content)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_in_a_transaction_are_listed(self):
+        url = reverse("list-view", kwargs={"num": 5})
+        etag = self.client.get(url)["ETag"]
+
+        User.objects.create_user(username="yoshi", password=None)
+        response = self.client.get(url)
+
+        self.assertEqual(response.data["results"][0]["username"], "yoshi")
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(ACCOUNTS_NEWEST_MAX=4, CACHES=SHARED_CACHES)
+class TestNewestAccountsIndex(TransactionTestCase):
+    def setUp(self) -> None:
+        get_newest_cache().clear()
+        newest_accounts.clear()
+
+        now = timezone.now()
+        self.users = [
+            User.objects.create_user(
+                username=f"logan{index}",
+                password=None,
+                date_joined=now - timedelta(days=index * 2),
+            )
+            for index in range(6)
+        ]
+
+    def assertListsNewest(self, queries, num=4):
+        expected_ids = get_expected_ids(num)
+
+        with self.assertNumQueries(queries):
+            rows = get_newest_accounts(num)
+
+        self.assertEqual([row["id"] for row in rows], expected_ids)
+
+        return rows
+
+    def test_commits_are_applied_without_reloading(self):
+        get_newest_accounts(4)
+        now = timezone.now()
+
+        # Newest, between the listed ones, and older than all of them.
+        for days in (-1, 1, 30):
+            User.objects.create_user(
+                username=f"yoshi{days}",
+                password=None,
+                date_joined=now - timedelta(days=days),
+            )
+
+        self.users[0].first_name = "updated"
+        self.users[0].save()
+
+        rows = self.assertListsNewest(0)
+
+        self.assertEqual(rows[0]["username"], "yoshi-1")
+        self.assertEqual(rows[1]["first_name"], "updated")
+
+    def test_deletes_are_applied(self):
+        get_newest_accounts(4)
+        self.users[1].delete()
+
+        self.assertListsNewest(0, num=3)
+
+        # The ring only knows the 3 newest accounts left.
+        self.assertListsNewest(1)
+
+    def test_date_joined_changes_reorder(self):
+        get_newest_accounts(4)
+
+        self.users[5].date_joined = timezone.now()
+        self.users[5].save()
+        self.users[0].date_joined -= timedelta(days=100)
+        self.users[0].save()
+
+        # The account moved back out of the ring, which knows 3 accounts.
+        self.assertListsNewest(0, num=3)
+        self.assertListsNewest(1)
+
+    def test_writes_of_other_processes_reload(self):
+        get_newest_accounts(4)
+
+        User.objects.filter(pk=self.users[0].pk).delete()
+        bump_newest_generation()
+
+        self.assertListsNewest(1)
+
+    def test_login_does_not_invalidate(self):
+        get_newest_accounts(4)
+        self.users[0].last_login = timezone.now()
+        self.users[0].save(update_fields=["last_login"])
+
+        self.assertListsNewest(0)
+
+
+@override_settings(ACCOUNTS_NEWEST_MAX=4)
+class TestNewestAccountsWithProcessLocalCache(TransactionTestCase):
+    def setUp(self) -> None:
+        newest_accounts.clear()
+
+        self.users = [
+            User.objects.create_user(username=f"logan{index}", password=None)
+            for index in range(3)
+        ]
+
+    def test_every_listing_reads_the_index(self):
+        with self.assertNumQueries(1):
+            get_newest_accounts(4)
+
+        # A write of another process, which this one is not told about.
+        User.objects.filter(pk=self.users[0].pk).update(first_name="updated")
+
+        with self.assertNumQueries(1):
+            rows = get_newest_accounts(4)
+
+        self.assertEqual([row["id"] for row in rows], get_expected_ids(4))
+        self.assertIn("updated", [row["first_name"] for row in rows])
@@ -0,0 +1,106 @@
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APITestCase
+from rest_framework.views import status
+
+from users.models import User
+from utils.query_budget import QueryBudgetMixin
+
+
+class TestAccountQueryBudget(QueryBudgetMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user_data = {
+            "username": "logan",
+            "password": "1234",
+            "first_name": "logan",
+            "last_name": "mattos",
+            "is_seller": True,
+        }
+
+        cls.admin_user_data = {
+            "username": "kamila",
+            "password": "1234",
+            "first_name": "kamila",
+            "last_name": "muller",
+            "is_seller": False,
+        }
+
+        cls.owner_account = User.objects.create_user(**cls.user_data)
+        admin_account = User.objects.create_superuser(**cls.admin_user_data)
+
+        cls.owner_token = Token.objects.create(user=cls.owner_account)
+        cls.admin_token = Token.objects.create(user=admin_account)
+
+        cls.base_url = reverse("account-register")
+        cls.login_url = reverse("login")
+        cls.update_url = reverse("account-update", kwargs={"pk": cls.owner_account.id})
+        cls.manager_url = reverse(
+            "account-manager", kwargs={"pk": cls.owner_account.id}
+        )
+
+    def create_rows(self, rows: int) -> None:
+        password = make_password(None)
+        User.objects.bulk_create(
+            User(username=f"user{User.objects.count() + index}", password=password)
+            for index in range(rows)
+        )
+
+    def test_budget_requires_create_rows(self):
+        with self.assertRaises(TypeError):
+
+            class TestWithoutRows(QueryBudgetMixin, APITestCase):
+                pass
+
+    @mock.patch.object(PageNumberPagination, "page_size", 100)
+    def test_list_accounts_budget(self):
+        self.assertQueryBudget(
+            3, lambda: self.client.get(self.base_url), status.HTTP_200_OK
+        )
+
+    def test_list_newest_accounts_budget(self):
+        newest_url = reverse("list-view", kwargs={"num": 1000})
+
+        self.assertQueryBudget(
+            3, lambda: self.client.get(newest_url), status.HTTP_200_OK
+        )
+
+    def test_register_account_budget(self):
+        usernames = (f"new{index}" for index in count())
+
+        def register():
+            return self.client.post(
+                self.base_url, {**self.user_data, "username": next(usernames)}
+            )
+
+        self.assertQueryBudget(2, register, status.HTTP_201_CREATED)
+
+    def test_login_budget(self):
+        self.assertQueryBudget(
+            2,
+            lambda: self.client.post(self.login_url, self.user_data),
+            status.HTTP_200_OK,
+        )
+
+    def test_update_account_budget(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.owner_token.key)
+
+        self.assertQueryBudget(
+            3,
+            lambda: self.client.patch(self.update_url, {"first_name": "updated"}),
+            status.HTTP_200_OK,
+        )
+
+    def test_deactivate_account_budget(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.admin_token.key)
+
+        self.assertQueryBudget(
+            3,
+            lambda: self.client.patch(self.manager_url, {"is_active": True}),
+            status.HTTP_200_OK,
+        )
@@ -1,11 +1,16 @@
+from unittest import mock
+
+from django.test import override_settings
 from django.urls import reverse
 
+from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 from rest_framework.views import status
 
 from users.serializers import AccountSerializer, SellerSerializer
 from users.models import User
+from users.views import ListAccountByDateView, ListCreateAccountView
 
 
 class TestAccountRegisterView(APITestCase):
@@ -168,6 +173,17 @@ class TestUpdateAccountView(APITestCase):
         self.assertEqual(self.data_to_update["first_name"], response.data["first_name"])
         self.assertEqual(self.data_to_update["last_name"], response.data["last_name"])
 
+    def test_owner_edit_requires_matching_etag(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.owner_token.key)
+        response = self.client.patch(
+            self.update_url, self.data_to_update, HTTP_IF_MATCH='"stale"'
+        )
+
+        expected_status = status.HTTP_412_PRECONDITION_FAILED
+        response_status = response.status_code
+
+        self.assertEqual(expected_status, response_status)
+
     def test_account_can_not_be_edited_by_no_owner_account(self):
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.regular_token.key)
         response = self.client.patch(self.update_url, self.data_to_update)
@@ -221,3 +237,143 @@ class TestUpdateAccountView(APITestCase):
         response_status = response.status_code
 
         self.assertEqual(expected_status, response_status)
+
+
+@override_settings(ROOT_URLCONF="_komercio.urls_async")
+class TestAsyncAccountViews(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        for index in range(5):
+            User.objects.create_user(
+                username=f"logan{index}",
+                password="1234",
+                first_name="logan",
+                last_name="mattos",
+                is_seller=index % 2 == 0,
+            )
+
+    async def assertSameResponse(self, url, sync_view):
+        with override_settings(ROOT_URLCONF="_komercio.urls"):
+            sync_response = await self.async_client.get(url)
+
+        with mock.patch.object(sync_view, "get", side_effect=AssertionError):
+            async_response = await self.async_client.get(url)
+
+        self.assertEqual(sync_response.status_code, async_response.status_code)
+        self.assertEqual(sync_response.content, async_response.content)
+
+        for header in ("Content-Type", "ETag", "Allow", "Vary"):
+            self.assertEqual(sync_response.get(header), async_response.get(header))
+
+        return async_response
+
+    async def test_list_accounts_matches_sync_view(self):
+        for query in ("", "?page=2", "?page=last"):
+            with self.subTest(query=query):
+                await self.assertSameResponse(
+                    reverse("account-register") + query, ListCreateAccountView
+                )
+
+    async def test_newest_accounts_match_sync_view(self):
+        for num in (1, 3, 10):
+            with self.subTest(num=num):
+                await self.assertSameResponse(
+                    reverse("list-view", kwargs={"num": num}), ListAccountByDateView
+                )
+
+    async def test_list_accounts_answers_conditional_requests(self):
+        url = reverse("account-register")
+        response = await self.assertSameResponse(url, ListCreateAccountView)
+
+        response = await self.async_client.get(
+            url, **{"if-none-match": response["ETag"]}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def assertSamePost(self, url, sync_view, data, get_data=None):
+        """Posts `data` to the sync view and then the (same) async view."""
+
+        with override_settings(ROOT_URLCONF="_komercio.urls"):
+            sync_response = await self.async_client.post(
+                url, data, content_type="application/json"
+            )
+
+        data = get_data() if get_data else data
+
+        with mock.patch.object(sync_view, "post", side_effect=AssertionError):
+            async_response = await self.async_client.post(
+                url, data, content_type="application/json"
+            )
+
+        self.assertEqual(sync_response.status_code, async_response.status_code)
+
+        for header in ("Content-Type", "Allow", "Vary", "Retry-After"):
+            self.assertEqual(sync_response.get(header), async_response.get(header))
+
+        return sync_response, async_response
+
+    async def test_register_matches_sync_view(self):
+        data = {
+            "username": "yoshi",
+            "password": "1234",
+            "first_name": "yoshi",
+            "last_name": "mattos",
+            "is_seller": False,
+        }
+        url = reverse("account-register")
+
+        sync_response, async_response = await self.assertSamePost(
+            url, ListCreateAccountView, data, lambda: {**data, "username": "sandy"}
+        )
+
+        self.assertEqual(async_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sync_response.json().keys(), async_response.json().keys())
+
+        user = await User.objects.aget(username="sandy")
+        self.assertTrue(user.check_password("1234"))
+
+        # Invalid: the username is taken.
+        sync_response, async_response = await self.assertSamePost(
+            url, ListCreateAccountView, data
+        )
+
+        self.assertEqual(async_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sync_response.content, async_response.content)
+
+    async def test_login_matches_sync_view(self):
+        url = reverse("login")
+
+        for password in ("1234", "4321"):
+            with self.subTest(password=password):
+                sync_response, async_response = await self.assertSamePost(
+                    url, ObtainAuthToken, {"username": "logan0", "password": password}
+                )
+
+                self.assertEqual(sync_response.content, async_response.content)
+
+        sync_response, async_response = await self.assertSamePost(
+            url, ObtainAuthToken, {"username": "nobody", "password": "1234"}
+        )
+
+        self.assertEqual(async_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sync_response.content, async_response.content)
+
+    async def test_login_hands_invalid_input_to_sync_view(self):
+        response = await self.async_client.post(
+            reverse("login"), {"username": "logan0"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {"password": ["This field is required."]})
+
+    @override_settings(PASSWORD_HASHING_MAX_PENDING=0)
+    async def test_login_turned_away_when_pool_busy(self):
+        sync_response, async_response = await self.assertSamePost(
+            reverse("login"),
+            ObtainAuthToken,
+            {"username": "logan0", "password": "1234"},
+        )
+
+        self.assertEqual(async_response.status_code, 503)
+        self.assertEqual(sync_response.content, async_response.content)
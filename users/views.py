@@ -1,40 +1,91 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
 from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
 
+from users.authentication import CachedTokenAuthentication
 from users.permissions import CustomAdminPermission, IsAccountOwner
+from utils.mixins import ConditionalRequestMixin, TimedChecksMixin
 
 from .models import User
 
+from .newest import get_newest_accounts, get_newest_state
 from .serializers import (
     AccountDeactivateSerializer,
     AccountSerializer,
     AccountUpdateSerializer,
+    AccountValuesSerializer,
 )
 
 
-class ListCreateAccountView(generics.ListCreateAPIView):
+class AccountListConditionalMixin(ConditionalRequestMixin):
+    def get_conditional_state(self):
+        state = User.objects.aggregate(
+            last_updated=Max("updated_at"), count=Count("pk")
+        )
+
+        return (state["last_updated"], state["count"]), None
+
+
+class AccountConditionalMixin(ConditionalRequestMixin):
+    def get_conditional_state(self):
+        try:
+            updated_at = (
+                User.objects.filter(pk=self.kwargs["pk"])
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+        except (ValueError, ValidationError):
+            return None
+
+        return updated_at and ((updated_at,), updated_at)
+
+
+class ListCreateAccountView(
+    TimedChecksMixin, AccountListConditionalMixin, generics.ListCreateAPIView
+):
     queryset = User.objects.all()
     serializer_class = AccountSerializer
 
 
-class ListAccountByDateView(generics.ListAPIView):
+class ListAccountByDateView(
+    TimedChecksMixin, ConditionalRequestMixin, generics.ListAPIView
+):
+    """Lists the `num` newest accounts (up to `ACCOUNTS_NEWEST_MAX`) from
+    the in-memory index of `users.newest`."""
+
     queryset = User.objects.all()
     serializer_class = AccountSerializer
 
-    def get_queryset(self):
-        url_num = self.kwargs["num"]
-        return self.queryset.order_by("-date_joined")[0:url_num]
+    def get_rows(self):
+        if not hasattr(self, "rows"):
+            self.rows = get_newest_accounts(self.kwargs["num"])
+
+        return self.rows
+
+    def get_conditional_state(self):
+        return get_newest_state(self.get_rows())
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_rows())
+
+        return self.get_paginated_response(
+            AccountValuesSerializer.to_representation_many(page)
+        )
 
 
-class UpdateAccountView(generics.UpdateAPIView):
-    authentication_classes = [TokenAuthentication]
+class UpdateAccountView(
+    TimedChecksMixin, AccountConditionalMixin, generics.UpdateAPIView
+):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAccountOwner]
     queryset = User.objects.all()
     serializer_class = AccountUpdateSerializer
 
 
-class DeactivateAccountView(generics.UpdateAPIView):
-    authentication_classes = [TokenAuthentication]
+class DeactivateAccountView(
+    TimedChecksMixin, AccountConditionalMixin, generics.UpdateAPIView
+):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [CustomAdminPermission]
     queryset = User.objects.all()
     serializer_class = AccountDeactivateSerializer
@@ -0,0 +1,245 @@
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.decorators import classonlymethod
+from django.utils.http import http_date
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from utils.mixins import get_etag
+from utils.parsers import ORJSONParser
+from utils.renderers import ORJSONRenderer
+
+JSON_MEDIA_TYPES = ("*/*", "application/*", "application/json")
+
+
+class AsyncReadView(View):
+    """Answers the GET requests of a DRF read endpoint natively under ASGI.
+
+    Subclasses implement `aget_state()`, returning the same `(version,
+    last_modified)` pair as the `get_conditional_state()` of `sync_view`,
+    and `aget_response()`, returning the JSON response (or None to give
+    up). Both read through Django's async ORM interface and serialize with
+    a `ValuesSerializer`, so no model instance (and no lazy relation load)
+    is ever touched from the event loop.
+
+    Requests that the view can not answer exactly like `sync_view` does
+    (other methods, credentials to authenticate, query parameters missing
+    from `query_params`, renderers other than JSON, invalid input) are
+    handed to `sync_view`, in a thread like any sync view under ASGI. It
+    is passed to `as_view()`, e.g. `as_view(sync_view=View.as_view())`.
+
+    Subclasses adding "post" to `http_method_names` also get the anonymous
+    POST requests with a JSON object body (see `parse_json()`).
+    """
+
+    http_method_names = ["get"]
+    sync_view = None
+    query_params = ()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # The DRF views answering the other methods do their own CSRF checks.
+        view = csrf_exempt(super().as_view(**initkwargs))
+
+        # Lets DRF (e.g. the browsable API breadcrumbs) introspect the URL as
+        # the endpoint it stands in for.
+        view.cls = initkwargs["sync_view"].cls
+        view.initkwargs = initkwargs["sync_view"].initkwargs
+
+        return view
+
+    def can_serve(self, request) -> bool:
+        method = request.method.lower()
+
+        if method not in self.http_method_names or "HTTP_AUTHORIZATION" in request.META:
+            return False
+
+        if self.uses_sessions() and settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return False
+
+        if method == "get":
+            if not request.GET.keys() <= set(self.query_params):
+                return False
+        elif request.GET or request.content_type != ORJSONParser.media_type:
+            return False
+
+        accept = request.META.get("HTTP_ACCEPT") or "*/*"
+
+        return all(
+            media_range.split(";")[0].strip() in JSON_MEDIA_TYPES
+            for media_range in accept.split(",")
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.can_serve(request):
+            return getattr(self, request.method.lower())(request, *args, **kwargs)
+
+        return self.fallback(request, *args, **kwargs)
+
+    async def fallback(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    async def aget_state(self):
+        raise NotImplementedError
+
+    async def aget_response(self):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        state = await self.aget_state()
+
+        if state is None:
+            return await self.fallback(request, *args, **kwargs)
+
+        version, last_modified = state
+        etag = get_etag(request, version)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified and int(last_modified.timestamp()),
+        )
+
+        if response is None:
+            response = await self.aget_response()
+
+        if response is None:
+            return await self.fallback(request, *args, **kwargs)
+
+        # What `ConditionalRequestMixin` adds.
+        response["ETag"] = etag
+
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+
+        return self.finalize_response(response)
+
+    def finalize_response(self, response):
+        # What DRF's `finalize_response` adds.
+        response["Allow"] = ", ".join(self.get_allowed_methods())
+
+        if len(self.sync_view.cls.renderer_classes) > 1:
+            patch_vary_headers(response, ("Accept",))
+
+        if self.uses_sessions():
+            # The sync view reads the (here absent) session to authenticate.
+            patch_vary_headers(response, ("Cookie",))
+
+        return response
+
+    def parse_json(self):
+        """Returns the JSON object of the request body, or None.
+
+        Anything else (invalid JSON, arrays, scalars) is for the sync view
+        to turn down.
+        """
+
+        try:
+            data = ORJSONParser().parse(BytesIO(self.request.body))
+        except APIException:
+            return None
+
+        return data if isinstance(data, dict) else None
+
+    def uses_sessions(self) -> bool:
+        return any(
+            issubclass(authentication_class, SessionAuthentication)
+            for authentication_class in self.sync_view.cls.authentication_classes
+        )
+
+    def get_allowed_methods(self):
+        view = self.sync_view.cls(**self.sync_view.initkwargs)
+        view.setup(self.request, *self.args, **self.kwargs)
+
+        return view.allowed_methods
+
+    def render(self, data, status=200) -> HttpResponse:
+        return HttpResponse(
+            ORJSONRenderer().render(data),
+            content_type=ORJSONRenderer.media_type,
+            status=status,
+        )
+
+    def render_exception(self, exc: APIException) -> HttpResponse:
+        """Renders `exc` like DRF's default exception handler."""
+
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else None
+        response = self.render(data or {"detail": exc.detail}, exc.status_code)
+
+        if getattr(exc, "wait", None):
+            response["Retry-After"] = "%d" % exc.wait
+
+        return self.finalize_response(response)
+
+    def get_page(self, count: int):
+        """Picks the requested page of `count` rows like the default
+        `PageNumberPagination`.
+
+        Returns the paginator and the slice of the rows on the page, or None
+        for a page that does not exist.
+        """
+
+        paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        request = Request(self.request)
+
+        page_size = paginator.get_page_size(request)
+        django_paginator = paginator.django_paginator_class([], page_size)
+        django_paginator.count = count
+
+        number = request.query_params.get(paginator.page_query_param, 1)
+
+        if number in paginator.last_page_strings:
+            number = django_paginator.num_pages
+
+        try:
+            page = django_paginator.page(number)
+        except InvalidPage:
+            return None
+
+        paginator.request, paginator.page = request, page
+        bottom = (page.number - 1) * page_size
+
+        return paginator, slice(bottom, min(bottom + page_size, count))
+
+    def get_paginated_data(self, paginator, rows, values_serializer):
+        paginator.page.object_list = rows
+
+        return paginator.get_paginated_response(
+            values_serializer.to_representation_many(rows)
+        ).data
+
+    async def apaginate(self, queryset, values_serializer):
+        """Paginates `queryset`, see `get_page()`.
+
+        Returns the paginated data, or None for a page that does not exist.
+        """
+
+        page = self.get_page(await queryset.acount())
+
+        if page is None:
+            return None
+
+        paginator, bounds = page
+        rows = [row async for row in queryset[bounds]]
+
+        return self.get_paginated_data(paginator, rows, values_serializer)
+
+    def paginate(self, rows, values_serializer):
+        """Paginates the list `rows` like `apaginate()` does a queryset."""
+
+        page = self.get_page(len(rows))
+
+        if page is None:
+            return None
+
+        paginator, bounds = page
+
+        return self.get_paginated_data(paginator, rows[bounds], values_serializer)
@@ -0,0 +1,14 @@
+"""Helpers for the cache backends of `CACHES`."""
+
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(cache) -> bool:
+    """Whether `cache` lives in this process only.
+
+    Deletes and writes to such a cache never reach the other workers, so it
+    can not hold anything the workers must agree on (revocations,
+    invalidation generations).
+    """
+
+    return isinstance(cache, LocMemCache)
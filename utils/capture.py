@@ -0,0 +1,153 @@
+"""Records live traffic for `benchmarks.replay` to play back.
+
+With `TRAFFIC_CAPTURE_FILE` set, `TrafficCaptureMiddleware` appends one
+JSON line per request (or per `TRAFFIC_CAPTURE_SAMPLE_RATE` of them) to
+that file:
+
+    {"method": "GET", "path": "/api/products/", "query": "page=2",
+     "content_type": null, "body": null, "auth": null,
+     "route": "api/products/", "status": 200, "duration": 0.0042}
+
+Nothing that grants access is written. `auth` holds a stable pseudonym of
+the token (an HMAC keyed with `SECRET_KEY`) and the role flags of the user
+it authenticated, so a replay can stand in users of the same kind. JSON
+bodies are kept with their `password` fields redacted; other bodies (forms,
+uploads, MessagePack) and the JSON ones over `DATA_UPLOAD_MAX_MEMORY_SIZE`
+are dropped.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.authentication import get_authorization_header
+
+REDACTED_FIELDS = {"password"}
+REDACTED = "<redacted>"
+
+
+def redact(data):
+    if isinstance(data, dict):
+        return {
+            key: REDACTED if key in REDACTED_FIELDS else redact(value)
+            for key, value in data.items()
+        }
+
+    if isinstance(data, list):
+        return [redact(item) for item in data]
+
+    return data
+
+
+def get_auth_pseudonym(key: bytes) -> str:
+    digest = hmac.new(settings.SECRET_KEY.encode(), key, hashlib.sha256)
+    return digest.hexdigest()[:16]
+
+
+class TrafficCaptureMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_FILE:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        self.lock = threading.Lock()
+        self.file = None
+
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        if not self.should_capture():
+            return self.get_response(request)
+
+        body = self.read_body(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.capture(request, body, response, time.perf_counter() - start)
+
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_capture():
+            return await self.get_response(request)
+
+        body = self.read_body(request)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.capture(request, body, response, time.perf_counter() - start)
+
+        return response
+
+    def should_capture(self) -> bool:
+        return random.random() < settings.TRAFFIC_CAPTURE_SAMPLE_RATE
+
+    def get_auth(self, request):
+        auth = get_authorization_header(request).split()
+
+        if len(auth) != 2:
+            return None
+
+        # Set by DRF once the view authenticated the request.
+        user = getattr(request, "user", None)
+
+        return {
+            "user": get_auth_pseudonym(auth[1]),
+            "is_seller": getattr(user, "is_seller", False),
+            "is_superuser": getattr(user, "is_superuser", False),
+        }
+
+    def read_body(self, request):
+        # Read before the view consumes the stream. Other bodies are left
+        # alone, so uploads keep streaming to the parsers.
+        if request.content_type != "application/json":
+            return None
+
+        # DRF's parsers stream bodies past `DATA_UPLOAD_MAX_MEMORY_SIZE`
+        # (e.g. bulk creates), which `request.body` would turn down.
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+
+        try:
+            if limit is not None and int(request.META["CONTENT_LENGTH"]) > limit:
+                return None
+        except (KeyError, ValueError):
+            return None
+
+        try:
+            return json.dumps(redact(json.loads(request.body)))
+        except ValueError:
+            return None
+
+    def capture(self, request, body, response, duration: float) -> None:
+        resolver_match = request.resolver_match
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "query": request.META.get("QUERY_STRING", ""),
+            "content_type": request.META.get("CONTENT_TYPE") or None,
+            "body": body,
+            "auth": self.get_auth(request),
+            "route": resolver_match.route if resolver_match else None,
+            "status": response.status_code,
+            "duration": round(duration, 6),
+        }
+        line = json.dumps(record) + "\n"
+
+        with self.lock:
+            if self.file is None:
+                # Appends of whole lines, so workers can share the file.
+                self.file = open(settings.TRAFFIC_CAPTURE_FILE, "a", buffering=1)
+
+            self.file.write(line)
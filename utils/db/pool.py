@@ -0,0 +1,362 @@
+"""A bounded, process-wide pool of database connections.
+
+Django opens a connection per thread and closes it at the end of every
+request, unless `CONN_MAX_AGE` keeps it for the later requests of that
+same thread. The pooled backends (`utils.db.postgresql` and
+`utils.db.sqlite3`) hand the connections they close back to a
+`ConnectionPool` instead, and take the ones they open from it. Any thread
+then reuses a connection another one released: the request threads of a
+threaded worker, or the threads the async ORM runs queries in under ASGI.
+The process never holds more than `MAX_SIZE` connections per database.
+
+The pool is configured under the `POOL` key of the database settings:
+
+- MAX_SIZE: connections the pool may open, 0 to turn pooling off.
+- TIMEOUT: seconds a checkout waits for a connection while all of them
+  are in use, before it fails with an `OperationalError`.
+- MAX_AGE: seconds after which a connection is closed instead of reused,
+  None to keep connections for good.
+- CHECK_IDLE: connections idle for longer than that many seconds are
+  pinged on checkout, and replaced if the server dropped them.
+
+`/metrics` reports the connections and the checkout waits of the pools of
+the process it runs in.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from django.utils.asyncio import async_unsafe
+
+from utils.metrics import escape_label, registry
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Pools the connections of one database.
+
+    Backends subclass it to tell a usable connection from a broken one
+    (`is_alive()`, a check without a round trip, and `ping()`) and to
+    return connections in a clean state (`reset()`).
+    """
+
+    def __init__(self, label, max_size=10, timeout=5.0, max_age=None, check_idle=1.0):
+        self.label = label
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check_idle = check_idle
+
+        self.condition = threading.Condition()
+        # (connection, created_at, released_at), most recently released last.
+        self.idle = deque()
+        # Created time of the connections in use, by connection.
+        self.in_use = {}
+        # Connections idle, in use or being opened.
+        self.size = 0
+        self.stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "opened": 0,
+            "closed": 0,
+        }
+
+    def is_alive(self, connection) -> bool:
+        return True
+
+    def ping(self, connection) -> bool:
+        return True
+
+    def reset(self, connection) -> bool:
+        return True
+
+    def close_connection(self, connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def is_expired(self, created_at, now) -> bool:
+        return self.max_age is not None and now - created_at >= self.max_age
+
+    def is_usable(self, connection, created_at, released_at) -> bool:
+        now = time.monotonic()
+
+        if self.is_expired(created_at, now) or not self.is_alive(connection):
+            return False
+
+        return now - released_at < self.check_idle or self.ping(connection)
+
+    def checkout(self, connect):
+        """Returns an idle connection, or a new one `connect()` opens.
+
+        Waits up to `timeout` seconds for one while the pool is full, and
+        then raises `PoolTimeout`.
+        """
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        with self.condition:
+            self.stats["checkouts"] += 1
+
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No connection of the {self.label} pool was "
+                            f"released within {self.timeout} seconds."
+                        )
+
+                    waited = True
+                    self.condition.wait(remaining)
+
+                if self.idle:
+                    entry = self.idle.pop()
+                else:
+                    entry = None
+                    self.size += 1
+
+            if entry is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self.release_slot()
+                    raise
+
+                created_at = time.monotonic()
+                opened = 1
+            else:
+                connection, created_at, released_at = entry
+                opened = 0
+
+                if not self.is_usable(connection, created_at, released_at):
+                    self.discard(connection)
+                    continue
+
+            with self.condition:
+                self.in_use[connection] = created_at
+                self.stats["opened"] += opened
+
+                if waited:
+                    self.stats["waits"] += 1
+                    self.stats["wait_seconds"] += time.monotonic() - started
+
+            return connection
+
+    def checkin(self, connection) -> None:
+        with self.condition:
+            created_at = self.in_use.pop(connection, None)
+
+        if created_at is None:
+            # Checked out before the pool was cleared, see `clear()`.
+            self.close_connection(connection)
+            return
+
+        if (
+            self.is_expired(created_at, time.monotonic())
+            or not self.is_alive(connection)
+            or not self.reset(connection)
+        ):
+            self.discard(connection)
+            return
+
+        with self.condition:
+            self.idle.append((connection, created_at, time.monotonic()))
+            self.condition.notify()
+
+    def release_slot(self) -> None:
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def discard(self, connection) -> None:
+        with self.condition:
+            self.stats["closed"] += 1
+
+        self.release_slot()
+        self.close_connection(connection)
+
+    def clear(self, close=True) -> None:
+        """Drops every connection: idle ones now, the ones in use when they
+        are checked in. Without `close`, they are left open (e.g. in a
+        forked child, where closing would end the sessions of the parent).
+        """
+
+        with self.condition:
+            idle = [entry[0] for entry in self.idle]
+            # Connections being opened stay counted.
+            self.size -= len(idle) + len(self.in_use)
+            self.idle.clear()
+            self.in_use.clear()
+            self.stats["closed"] += len(idle)
+            self.condition.notify_all()
+
+        if close:
+            for connection in idle:
+                self.close_connection(connection)
+
+    def get_state(self) -> dict:
+        with self.condition:
+            return {
+                **self.stats,
+                "idle": len(self.idle),
+                "in_use": len(self.in_use),
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(key, factory) -> ConnectionPool:
+    with pools_lock:
+        pool = pools.get(key)
+
+        if pool is None:
+            pool = pools[key] = factory()
+
+        return pool
+
+
+def clear_pools(alias=None, close=True) -> None:
+    """Clears the pools of the database `alias`, or all of them."""
+
+    with pools_lock:
+        cleared = [pool for key, pool in pools.items() if alias in (None, key[0])]
+
+    for pool in cleared:
+        pool.clear(close=close)
+
+
+os.register_at_fork(after_in_child=partial(clear_pools, close=False))
+
+
+def render_pool_metrics() -> list:
+    with pools_lock:
+        states = sorted((pool.label, pool.get_state()) for pool in pools.values())
+
+    lines = [
+        "# HELP db_pool_connections Pooled database connections, by state.",
+        "# TYPE db_pool_connections gauge",
+    ]
+
+    for label, state in states:
+        for name in ("idle", "in_use"):
+            lines.append(
+                f'db_pool_connections{{pool="{escape_label(label)}",state="{name}"}}'
+                f" {state[name]}"
+            )
+
+    counters = (
+        ("checkouts", "Connections checked out of the pool."),
+        ("waits", "Checkouts that waited for a connection to be released."),
+        ("wait_seconds", "Time checkouts spent waiting for a connection."),
+        ("timeouts", "Checkouts that gave up waiting for a connection."),
+        ("opened", "Connections the pool opened."),
+        ("closed", "Connections the pool closed (expired, broken or cleared)."),
+    )
+
+    for name, description in counters:
+        lines += [
+            f"# HELP db_pool_{name}_total {description}",
+            f"# TYPE db_pool_{name}_total counter",
+        ]
+
+        for label, state in states:
+            lines.append(
+                f'db_pool_{name}_total{{pool="{escape_label(label)}"}} {state[name]}'
+            )
+
+    return lines
+
+
+registry.add_collector(render_pool_metrics)
+
+
+class PooledDatabaseWrapperMixin:
+    """Takes the connections of a database backend from a `ConnectionPool`.
+
+    Backends set `pool_class`. Without a `POOL` setting (or with a
+    `MAX_SIZE` of 0), connections are opened and closed as usual.
+    """
+
+    pool_class = ConnectionPool
+    pool = None
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get("POOL") or {}
+
+        if not options.get("MAX_SIZE"):
+            return None
+
+        # The test runner connects to other databases with the same alias.
+        key = (self.alias, repr(sorted(conn_params.items())))
+        label = f"{self.alias}:{conn_params.get('database') or ''}"
+
+        return get_pool(
+            key,
+            lambda: self.pool_class(
+                label, **{name.lower(): value for name, value in options.items()}
+            ),
+        )
+
+    def init_pooled_connection(self, connection) -> None:
+        """Sets up the wrapper for a pooled connection, which another wrapper
+        may have opened."""
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+
+        try:
+            connection = self.pool.checkout(
+                partial(super().get_new_connection, conn_params)
+            )
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+        self.init_pooled_connection(connection)
+
+        return connection
+
+    def _close(self):
+        if self.pool is None:
+            return super()._close()
+
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.checkin(self.connection)
+
+
+class PooledDatabaseCreationMixin:
+    """Closes the pooled connections to the test databases before they are
+    dropped or copied, which connected sessions would prevent."""
+
+    def _create_test_db(self, *args, **kwargs):
+        clear_pools(self.connection.alias)
+        return super()._create_test_db(*args, **kwargs)
+
+    def _clone_test_db(self, *args, **kwargs):
+        clear_pools(self.connection.alias)
+        return super()._clone_test_db(*args, **kwargs)
+
+    def _destroy_test_db(self, *args, **kwargs):
+        clear_pools(self.connection.alias)
+        return super()._destroy_test_db(*args, **kwargs)
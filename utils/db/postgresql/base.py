@@ -0,0 +1,59 @@
+"""Django's PostgreSQL backend with pooled connections, see `utils.db.pool`."""
+
+from django.db.backends.postgresql import base, creation
+from psycopg2 import extensions
+
+from utils.db.pool import (
+    ConnectionPool,
+    PooledDatabaseCreationMixin,
+    PooledDatabaseWrapperMixin,
+)
+
+
+class PostgreSQLPool(ConnectionPool):
+    def is_alive(self, connection) -> bool:
+        return (
+            not connection.closed
+            and connection.get_transaction_status()
+            != extensions.TRANSACTION_STATUS_UNKNOWN
+        )
+
+    def ping(self, connection) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+            if not connection.autocommit:
+                connection.rollback()
+        except base.Database.Error:
+            return False
+
+        return True
+
+    def reset(self, connection) -> bool:
+        # Django closes connections in a failed or unfinished transaction too.
+        try:
+            if (
+                connection.get_transaction_status()
+                != extensions.TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+        except base.Database.Error:
+            return False
+
+        return True
+
+
+class DatabaseCreation(PooledDatabaseCreationMixin, creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pool_class = PostgreSQLPool
+    creation_class = DatabaseCreation
+
+    def init_pooled_connection(self, connection) -> None:
+        # What the backend reads from the connections it opens.
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
@@ -0,0 +1,48 @@
+"""Django's SQLite backend with pooled connections, see `utils.db.pool`.
+
+Pooling spares the setup of every new connection (the SQL functions the
+backend registers, its PRAGMAs). In-memory databases are left alone, as
+the backend never closes their connection.
+"""
+
+from django.db.backends.sqlite3 import base, creation
+
+from utils.db.pool import (
+    ConnectionPool,
+    PooledDatabaseCreationMixin,
+    PooledDatabaseWrapperMixin,
+)
+
+
+class SQLitePool(ConnectionPool):
+    def ping(self, connection) -> bool:
+        try:
+            connection.execute("SELECT 1").close()
+        except base.Database.Error:
+            return False
+
+        return True
+
+    def reset(self, connection) -> bool:
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except base.Database.Error:
+            return False
+
+        return True
+
+
+class DatabaseCreation(PooledDatabaseCreationMixin, creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pool_class = SQLitePool
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        if self.is_in_memory_db():
+            return None
+
+        return super().get_pool(conn_params)
@@ -0,0 +1,213 @@
+"""Per-route request latency histograms in the Prometheus text format.
+
+Each process aggregates the timings of `utils.timing` in memory. With
+`METRICS_DIR` set, it also dumps its totals to `<METRICS_DIR>/<pid>.json`
+(at most once per `METRICS_FLUSH_INTERVAL` seconds, and at exit), and
+`/metrics` adds up the files of every process, so whichever gunicorn
+worker answers the scrape reports for all of them. The files of exited
+workers are kept, as their requests still count; empty the directory on
+deploy.
+
+`/metrics` answers the addresses of `METRICS_ALLOWED_IPS` and requests
+carrying `Authorization: Bearer <METRICS_TOKEN>`, and nobody else.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def new_stats() -> dict:
+    return {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0, "queries": 0}
+
+
+def merge_stats(stats: dict, other: dict) -> None:
+    stats["buckets"] = [a + b for a, b in zip(stats["buckets"], other["buckets"])]
+
+    for name in ("count", "sum", "queries"):
+        stats[name] += other[name]
+
+    phases = stats.setdefault("phases", {})
+
+    for phase, seconds in other.get("phases", {}).items():
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.flushed_at = 0.0
+        self.collectors = []
+
+    def add_collector(self, collector) -> None:
+        """Adds the lines `collector()` returns to every scrape.
+
+        They describe the process answering it, whatever `METRICS_DIR` is.
+        """
+
+        self.collectors.append(collector)
+
+    def observe(self, route, method: str, timings) -> None:
+        key = (route or UNMATCHED_ROUTE, method)
+
+        with self.lock:
+            stats = self.routes.get(key)
+
+            if stats is None:
+                stats = self.routes[key] = {**new_stats(), "phases": {}}
+
+            index = bisect.bisect_left(BUCKETS, timings.total)
+
+            if index < len(BUCKETS):
+                stats["buckets"][index] += 1
+
+            stats["count"] += 1
+            stats["sum"] += timings.total
+            stats["queries"] += timings.queries
+
+            for phase, seconds in timings.phases.items():
+                stats["phases"][phase] = stats["phases"].get(phase, 0.0) + seconds
+
+        if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        if not settings.METRICS_DIR:
+            return
+
+        with self.lock:
+            self.flushed_at = time.monotonic()
+            entries = [[*key, stats] for key, stats in self.routes.items()]
+            data = json.dumps(entries)
+
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        temp_path = path.with_suffix(".tmp")
+
+        # Atomic, so a concurrent scrape never reads a partial file.
+        temp_path.write_text(data)
+        os.replace(temp_path, path)
+
+    def collect(self) -> dict:
+        if not settings.METRICS_DIR:
+            with self.lock:
+                return {
+                    key: {
+                        **stats,
+                        "buckets": list(stats["buckets"]),
+                        "phases": dict(stats["phases"]),
+                    }
+                    for key, stats in self.routes.items()
+                }
+
+        self.flush()
+        routes = {}
+
+        for path in sorted(Path(settings.METRICS_DIR).glob("*.json")):
+            try:
+                entries = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+
+            for route, method, stats in entries:
+                merge_stats(routes.setdefault((route, method), new_stats()), stats)
+
+        return routes
+
+    def render(self) -> str:
+        routes = sorted(self.collect().items())
+        lines = [
+            "# HELP http_request_duration_seconds Time spent handling requests.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+
+        for (route, method), stats in routes:
+            labels = f'route="{escape_label(route)}",method="{method}"'
+            cumulative = 0
+
+            for bound, count in zip(BUCKETS, stats["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}}'
+                    f" {cumulative}"
+                )
+
+            lines += [
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'
+                f' {stats["count"]}',
+                f'http_request_duration_seconds_sum{{{labels}}} {stats["sum"]}',
+                f'http_request_duration_seconds_count{{{labels}}} {stats["count"]}',
+            ]
+
+        lines += [
+            "# HELP http_request_phase_seconds_total Time spent in each phase.",
+            "# TYPE http_request_phase_seconds_total counter",
+        ]
+
+        for (route, method), stats in routes:
+            labels = f'route="{escape_label(route)}",method="{method}"'
+
+            for phase, seconds in sorted(stats.get("phases", {}).items()):
+                lines.append(
+                    f'http_request_phase_seconds_total{{{labels},phase="{phase}"}}'
+                    f" {seconds}"
+                )
+
+        lines += [
+            "# HELP http_request_db_queries_total SQL queries run by requests.",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+
+        for (route, method), stats in routes:
+            labels = f'route="{escape_label(route)}",method="{method}"'
+            lines.append(
+                f'http_request_db_queries_total{{{labels}}} {stats["queries"]}'
+            )
+
+        for collector in self.collectors:
+            lines += collector()
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush)
+
+
+def can_read_metrics(request) -> bool:
+    if request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS:
+        return True
+
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+
+    return bool(token) and constant_time_compare(authorization, f"Bearer {token}")
+
+
+@require_GET
+def metrics_view(request):
+    if not can_read_metrics(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
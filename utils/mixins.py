@@ -1,3 +1,389 @@
+import hashlib
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import permissions, status
+from rest_framework.exceptions import APIException
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from utils.serializers import (
+    get_sideload_key,
+    get_sideloaded,
+    get_sideloaded_pks,
+    get_sparse_values_serializer,
+    get_values_serializer,
+    parse_sparse_fieldset,
+)
+from utils.timing import measure
+
+
 class SerializerByMethodMixin:
     def get_serializer_class(self, *args, **kwargs):
         return self.serializer_map.get(self.request.method, self.serializer_class)
+
+
+class PaginationByQueryParamMixin:
+    pagination_query_param = "pagination"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            mode = self.request.query_params.get(self.pagination_query_param)
+            pagination_class = self.pagination_map.get(mode, self.pagination_class)
+            self._paginator = pagination_class() if pagination_class else None
+
+        return self._paginator
+
+
+class TimedChecksMixin:
+    """Reports authentication and permission checks as their own phases of
+    the request timings, see `utils.timing`."""
+
+    def perform_authentication(self, request):
+        with measure("auth"):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with measure("permissions"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with measure("permissions"):
+            super().check_object_permissions(request, obj)
+
+
+def get_etag(request, version) -> str:
+    """A strong ETag of the resource at the path of `request`, and of the
+    representation its query string picks.
+
+    The tag is `"<resource>.<representation>"`: the resource part hashes
+    the path and the first value of `version` (the version of the resource
+    itself), the representation part the query string and the other values
+    (e.g. the version of a related object it shows). `If-None-Match`
+    compares all of it, `If-Match` only the resource (see
+    `get_if_match_etag()`), so a write can be conditioned on the ETag of any
+    representation.
+    """
+
+    first, *others = [*map(str, version)] or [""]
+    resource = hashlib.md5(f"{request.path}|{first}".encode())
+    representation = hashlib.md5(
+        "|".join([request.META.get("QUERY_STRING", ""), *others]).encode()
+    )
+
+    return quote_etag(f"{resource.hexdigest()}.{representation.hexdigest()[:8]}")
+
+
+def get_resource_tag(etag: str) -> str:
+    return etag.strip('"').split(".")[0]
+
+
+def get_if_match_etag(request, etag: str) -> str:
+    """The `If-Match` tag of the same resource as `etag`, if any, else `etag`.
+
+    Weak tags never match, `If-Match` uses the strong comparison.
+    """
+
+    resource = get_resource_tag(etag)
+
+    for tag in parse_etags(request.META.get("HTTP_IF_MATCH", "")):
+        if tag.startswith('"') and get_resource_tag(tag) == resource:
+            return tag
+
+    return etag
+
+
+def get_ordering_lookups(paginator) -> tuple:
+    ordering = getattr(paginator, "ordering", None) or ()
+
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+
+    return tuple(field.lstrip("-") for field in ordering)
+
+
+class ValuesSerializerMixin:
+    """Serves list and retrieve requests from `values()` rows.
+
+    With `FAST_SERIALIZERS` on, the `ValuesSerializer` that
+    `values_serializer_map` holds for the request method replaces the
+    regular serializer, and model instances are never built. The ordering
+    fields of the paginator are fetched too, so cursor pagination keeps
+    working on the rows.
+    """
+
+    values_serializer_map = {}
+
+    def get_values_serializer(self):
+        if not settings.FAST_SERIALIZERS:
+            return None
+
+        return self.values_serializer_map.get(self.request.method)
+
+    def get_values_queryset(self, values_serializer):
+        lookups = dict.fromkeys(values_serializer.lookups)
+        lookups.update(dict.fromkeys(get_ordering_lookups(self.paginator)))
+
+        return self.filter_queryset(self.get_queryset()).values(*lookups)
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_values_queryset(values_serializer)
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            return self.get_paginated_response(
+                values_serializer.to_representation_many(page)
+            )
+
+        return Response(values_serializer.to_representation_many(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+
+        if values_serializer is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_values_queryset(values_serializer),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        self.check_object_permissions(request, row)
+
+        return Response(values_serializer.to_representation(row))
+
+
+class SparseFieldsetMixin:
+    """Serves the `fields` and `expand` query parameters on GET requests.
+
+    The GET serializer (a `SparseFieldsetSerializerMixin`) keeps the fields
+    in `fields` and nests the relations in `expand`, and the queryset loads
+    just the columns those fields read, joining only the relations they
+    render. Goes before `ValuesSerializerMixin`, whose rows it narrows too.
+
+    With `allow_sideload`, paginated responses also take `sideload`: the
+    rows then carry `<name>_id` and the response a `<name>s` map of the
+    related objects, each read and rendered once however many rows refer
+    to it.
+    """
+
+    allow_sideload = False
+
+    def get_sparse_fieldset(self):
+        if not hasattr(self, "sparse_fieldset"):
+            self.sparse_fieldset = parse_sparse_fieldset(
+                self.get_serializer_class(),
+                self.request.query_params,
+                sideload=self.allow_sideload,
+            )
+
+        return self.sparse_fieldset
+
+    def get_sparse_values_serializer(self):
+        return get_sparse_values_serializer(
+            self.get_serializer_class(), *self.get_sparse_fieldset()
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == "GET":
+            (
+                kwargs["fields"],
+                kwargs["expand"],
+                kwargs["sideload"],
+            ) = self.get_sparse_fieldset()
+
+        return super().get_serializer(*args, **kwargs)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+
+        if self.request.method == "GET":
+            for name in self.get_sparse_fieldset()[2]:
+                response.data[get_sideload_key(name)] = self.get_sideloaded(data, name)
+
+        return response
+
+    def get_sideloaded(self, data, name) -> dict:
+        serializer_class = self.get_serializer_class().Meta.expandable_fields[name]
+        pks = get_sideloaded_pks(data, name)
+        queryset = serializer_class.Meta.model._default_manager.filter(pk__in=pks)
+
+        if settings.FAST_SERIALIZERS:
+            values_serializer = get_values_serializer(serializer_class)
+            items = values_serializer.to_representation_many(
+                queryset.values(*values_serializer.lookups)
+            )
+        else:
+            with measure("serialize"):
+                items = serializer_class(queryset, many=True).data
+
+        return get_sideloaded(pks, items)
+
+    def get_values_serializer(self):
+        values_serializer = super().get_values_serializer()
+
+        if values_serializer is None or self.request.method != "GET":
+            return values_serializer
+
+        return self.get_sparse_values_serializer()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if self.request.method != "GET":
+            return queryset
+
+        values_serializer = self.get_sparse_values_serializer()
+        lookups = dict.fromkeys(values_serializer.lookups)
+        lookups.update(dict.fromkeys(get_ordering_lookups(self.paginator)))
+
+        queryset = queryset.select_related(None).only(*lookups)
+
+        if values_serializer.relations:
+            queryset = queryset.select_related(*values_serializer.relations)
+
+        return queryset
+
+
+class ConditionalResponse(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was modified since the precondition was checked."
+    default_code = "precondition_failed"
+
+
+class ConditionalRequestMixin:
+    """Answers conditional requests before the view handler runs.
+
+    Views implement `get_conditional_state()` and return a `(version,
+    last_modified)` pair, where `version` is a tuple of the values the
+    representation depends on (typically `updated_at` timestamps read with
+    a single indexed query), or None when the resource does not exist. The
+    version is hashed into a strong ETag; `If-None-Match`/`If-Modified-Since`
+    short-circuit to a 304 and `If-Match`/`If-Unmodified-Since` to a 412
+    after authentication and permission checks, so neither the object
+    fetch nor the serializer runs.
+
+    Unsafe requests only pay for the state lookup when they carry a
+    precondition, and then get the new ETag back once they succeed. Their
+    update is then a compare and swap on `version_field`, which must be the
+    first value of `version`: of the writers that passed the same
+    precondition, one saves and the others get a 412.
+    """
+
+    version_field = "updated_at"
+
+    conditional_headers = (
+        "HTTP_IF_MATCH",
+        "HTTP_IF_NONE_MATCH",
+        "HTTP_IF_MODIFIED_SINCE",
+        "HTTP_IF_UNMODIFIED_SINCE",
+    )
+
+    def get_conditional_state(self):
+        raise NotImplementedError
+
+    def get_etag_and_last_modified(self):
+        state = self.get_conditional_state()
+
+        if state is None:
+            return None, None
+
+        version, last_modified = state
+
+        return get_etag(self.request, version), last_modified
+
+    def is_conditional_request(self, request):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+
+        return any(header in request.META for header in self.conditional_headers)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self.etag = self.last_modified = self.checked_version = None
+
+        if not self.is_conditional_request(request):
+            return
+
+        state = self.get_conditional_state()
+
+        if state is not None:
+            version, self.last_modified = state
+            self.etag = get_etag(request, version)
+
+        etag = self.etag
+
+        if etag and request.method not in permissions.SAFE_METHODS:
+            etag = get_if_match_etag(request, etag)
+
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=self.last_modified and int(self.last_modified.timestamp()),
+        )
+
+        if response is not None:
+            raise ConditionalResponse(response)
+
+        if state is not None and request.method not in permissions.SAFE_METHODS:
+            self.checked_version = version[0]
+
+    def perform_update(self, serializer):
+        if self.checked_version is None:
+            return super().perform_update(serializer)
+
+        instance = serializer.instance
+        model = type(instance)
+        using = router.db_for_write(model, instance=instance)
+
+        with transaction.atomic(using=using):
+            # Takes the row (and its lock, until the save commits) from the
+            # version the precondition was checked against.
+            swapped = (
+                model._base_manager.using(using)
+                .filter(pk=instance.pk, **{self.version_field: self.checked_version})
+                .update(**{self.version_field: timezone.now()})
+            )
+
+            if not swapped:
+                raise PreconditionFailed()
+
+            super().perform_update(serializer)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return exc.response
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if not getattr(self, "etag", None) or not 200 <= response.status_code < 400:
+            return response
+
+        if request.method not in permissions.SAFE_METHODS:
+            self.etag, self.last_modified = self.get_etag_and_last_modified()
+
+        if self.etag:
+            response["ETag"] = self.etag
+
+        if self.last_modified:
+            response["Last-Modified"] = http_date(self.last_modified.timestamp())
+
+        return response
@@ -0,0 +1,40 @@
+import codecs
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from utils.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class ORJSONParser(parsers.JSONParser):
+    """Parses JSON with orjson, which rejects NaN and Infinity like the
+    strict `JSONParser` does."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        body = stream.read()
+
+        try:
+            if codecs.lookup(encoding).name != "utf-8":
+                body = body.decode(encoding)
+
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+class MessagePackParser(parsers.BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError("MessagePack parse error - %s" % str(exc))
@@ -0,0 +1,44 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Asserts that an endpoint issues a bounded number of SQL queries.
+
+    Test cases must implement `create_rows(count)` to top up the table
+    under test (checked when the class is defined), and every
+    `assertQueryBudget` call replays the request once per entry in
+    `row_counts`. A budget that only holds for small tables means the
+    endpoint is doing O(n) work per row (usually an N+1 on a relation), so
+    listings must be requested with pages holding many of the rows.
+    """
+
+    row_counts = (1, 10, 1000)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if not callable(getattr(cls, "create_rows", None)):
+            raise TypeError(f"{cls.__name__} must implement create_rows(count).")
+
+    def assertQueryBudget(self, budget: int, make_request, expected_status=None):
+        rows = 0
+
+        for count in self.row_counts:
+            self.create_rows(count - rows)
+            rows = count
+
+            with self.subTest(rows=count):
+                with CaptureQueriesContext(connection) as context:
+                    response = make_request()
+
+                if expected_status is not None:
+                    self.assertEqual(response.status_code, expected_status)
+
+                executed = [query["sql"] for query in context.captured_queries]
+                self.assertLessEqual(
+                    len(executed),
+                    budget,
+                    f"{len(executed)} queries for {count} rows, budget is {budget}:\n"
+                    + "\n".join(executed),
+                )
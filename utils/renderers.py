@@ -0,0 +1,77 @@
+import math
+from decimal import Decimal
+
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+# Whatever orjson and msgpack can not encode natively (Decimal, timedelta,
+# lazy strings, querysets and, for msgpack, UUIDs and datetimes) is
+# converted the way DRF's own JSON encoder does it.
+encode_default = JSONEncoder().default
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def has_non_finite_float(data) -> bool:
+    """Whether `data` holds a NaN or infinite float (or Decimal, which
+    `encode_default` turns into a float)."""
+
+    if isinstance(data, float):
+        return not math.isfinite(data)
+
+    if isinstance(data, Decimal):
+        return not data.is_finite()
+
+    if isinstance(data, dict):
+        return any(map(has_non_finite_float, data)) or any(
+            map(has_non_finite_float, data.values())
+        )
+
+    if isinstance(data, (list, tuple)):
+        return any(map(has_non_finite_float, data))
+
+    return False
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """Renders JSON with orjson, byte for byte like `JSONRenderer`.
+
+    Indented output (`application/json; indent=4`, the browsable API) is
+    left to `JSONRenderer`, as orjson only indents with two spaces. So is
+    data with NaN or infinite floats, which orjson writes as null:
+    `JSONRenderer` raises for them with `STRICT_JSON` (the default) and
+    writes `NaN`/`Infinity` without.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+
+        # Only walked when there is a null they could have become.
+        if b"null" in ret and has_non_finite_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict javascript subset escaping as `JSONRenderer`.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
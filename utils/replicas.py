@@ -0,0 +1,179 @@
+"""Sends reads to the read replicas of `DATABASE_REPLICAS`, writes to primary.
+
+`PrimaryReplicaRouter` routes the reads of a request to a random replica,
+unless the request is pinned to the primary ("default").
+`PrimaryStickinessMiddleware` pins:
+
+- requests with an unsafe method, whose reads must see what they write;
+- requests from a client that wrote in the last
+  `DATABASE_PRIMARY_STICKY_SECONDS`, so that it reads its own writes
+  despite replication lag. A successful write response carries a signed,
+  timestamped token in the `primary_sticky` cookie and the
+  `X-Primary-Sticky` header, which clients without cookies send back;
+- requests to views with `use_primary_database = True`, or function views
+  decorated with `primary_database`.
+
+Code outside requests pins with `with use_primary():`, and reads inside a
+transaction on the primary stay on it. Caches filled from a lagging
+replica can hold data older than the write that invalidated them, until
+their timeout or the next write.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_COOKIE = "primary_sticky"
+STICKY_HEADER = "X-Primary-Sticky"
+
+primary_pinned = ContextVar("primary_pinned", default=False)
+
+signer = signing.TimestampSigner(salt="utils.replicas")
+
+
+@contextmanager
+def use_primary():
+    token = primary_pinned.set(True)
+
+    try:
+        yield
+    finally:
+        primary_pinned.reset(token)
+
+
+def primary_database(view_func):
+    """Makes the requests to a function view read from the primary."""
+
+    view_func.use_primary_database = True
+    return view_func
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+
+        if instance is not None and instance._state.db:
+            # Relations of an object are read where it was.
+            return instance._state.db
+
+        if (
+            not settings.DATABASE_REPLICAS
+            or primary_pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        # Without replicas, objects are saved where they were read, as usual.
+        return DEFAULT_DB_ALIAS if settings.DATABASE_REPLICAS else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+
+def is_sticky(request) -> bool:
+    value = request.COOKIES.get(STICKY_COOKIE) or request.headers.get(STICKY_HEADER)
+
+    if not value:
+        return False
+
+    try:
+        signer.unsign(value, max_age=settings.DATABASE_PRIMARY_STICKY_SECONDS)
+    except signing.BadSignature:
+        return False
+
+    return True
+
+
+def uses_primary_database(view_func) -> bool:
+    return getattr(view_func, "use_primary_database", False) or getattr(
+        getattr(view_func, "cls", None), "use_primary_database", False
+    )
+
+
+def pin_for_view(view_func):
+    if settings.DATABASE_REPLICAS and uses_primary_database(view_func):
+        primary_pinned.set(True)
+
+
+class PrimaryStickinessMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+
+        if self.is_async:
+            markcoroutinefunction(self)
+            # Django only looks up `process_view`, and a sync hook would set
+            # the pin in a copy of the context.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        token = primary_pinned.set(self.is_pinned(request))
+
+        try:
+            response = self.get_response(request)
+        finally:
+            primary_pinned.reset(token)
+
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        token = primary_pinned.set(self.is_pinned(request))
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            primary_pinned.reset(token)
+
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        pin_for_view(view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        pin_for_view(view_func)
+
+    def is_pinned(self, request) -> bool:
+        return request.method not in SAFE_METHODS or is_sticky(request)
+
+    def finish(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+
+        value = signer.sign("primary")
+        response.set_cookie(
+            STICKY_COOKIE,
+            value,
+            max_age=settings.DATABASE_PRIMARY_STICKY_SECONDS,
+            secure=request.is_secure(),
+            httponly=True,
+            samesite="Lax",
+        )
+        response[STICKY_HEADER] = value
+
+        return response
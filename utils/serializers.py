@@ -0,0 +1,264 @@
+from functools import cached_property, lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from utils.timing import measure
+
+# Fields whose `to_representation` returns database values of the right
+# type unchanged.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+def compile_fields(serializer, prefix=""):
+    """Turns the readable fields of `serializer` into a representation plan.
+
+    Every entry is a `(name, lookup, convert, nested)` tuple, where `lookup`
+    is the `values()` key holding the field and `convert` its precompiled
+    `to_representation` (None when the value is already represented).
+    Nested model serializers get a plan of their own, read through the
+    relation.
+    """
+
+    plan = []
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+
+        if field.source == "*" or "." in field.source:
+            raise ImproperlyConfigured(
+                f"{serializer.__class__.__name__}.{name} can not be read from "
+                "values() rows."
+            )
+
+        lookup = prefix + field.source
+
+        if isinstance(field, serializers.ModelSerializer):
+            plan.append((name, lookup, None, compile_fields(field, lookup + "__")))
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            convert = field.pk_field and field.pk_field.to_representation
+            plan.append((name, lookup, convert, None))
+        elif type(field) in IDENTITY_FIELDS:
+            plan.append((name, lookup, None, None))
+        elif (
+            type(field) is serializers.UUIDField and field.uuid_format == "hex_verbose"
+        ):
+            plan.append((name, lookup, str, None))
+        elif isinstance(field, (serializers.Serializer, serializers.ManyRelatedField)):
+            raise ImproperlyConfigured(
+                f"{serializer.__class__.__name__}.{name} can not be read from "
+                "values() rows."
+            )
+        else:
+            plan.append((name, lookup, field.to_representation, None))
+
+    return plan
+
+
+def get_plan_lookups(plan):
+    for _, lookup, _, nested in plan:
+        yield lookup
+
+        if nested is not None:
+            yield from get_plan_lookups(nested)
+
+
+def get_plan_relations(plan):
+    """Yields the relations the plan reads through, for `select_related()`."""
+
+    for _, lookup, _, nested in plan:
+        if nested is not None:
+            yield lookup
+            yield from get_plan_relations(nested)
+
+
+def represent(plan, row) -> dict:
+    data = {}
+
+    for name, lookup, convert, nested in plan:
+        value = row[lookup]
+
+        if value is None:
+            data[name] = None
+        elif nested is not None:
+            data[name] = represent(nested, row)
+        elif convert is None:
+            data[name] = value
+        else:
+            data[name] = convert(value)
+
+    return data
+
+
+class ValuesSerializer:
+    """Renders `values()` rows the way `serializer_class` renders instances.
+
+    The serializer fields are compiled once, on first use, into `values()`
+    lookups paired with their representation, so a row costs a few dict
+    operations instead of a field walk with a nested serializer per
+    instance. The output is the same data the serializer would produce,
+    so it renders to the same JSON.
+    """
+
+    def __init__(self, serializer_class, **serializer_kwargs):
+        self.serializer_class = serializer_class
+        self.serializer_kwargs = serializer_kwargs
+
+    @cached_property
+    def plan(self):
+        return compile_fields(self.serializer_class(**self.serializer_kwargs))
+
+    @cached_property
+    def lookups(self):
+        return tuple(dict.fromkeys(get_plan_lookups(self.plan)))
+
+    @cached_property
+    def relations(self):
+        return tuple(dict.fromkeys(get_plan_relations(self.plan)))
+
+    def to_representation(self, row) -> dict:
+        with measure("serialize"):
+            return represent(self.plan, row)
+
+    def to_representation_many(self, rows) -> list:
+        plan = self.plan
+
+        with measure("serialize"):
+            return [represent(plan, row) for row in rows]
+
+
+class TimedSerializerMixin:
+    """Reports the representation of instances as the serialize phase of the
+    request timings, see `utils.timing`. Goes on the serializers views
+    render responses with, not on the ones nested in them."""
+
+    def to_representation(self, instance):
+        with measure("serialize"):
+            return super().to_representation(instance)
+
+
+class SparseFieldsetSerializerMixin:
+    """Lets a model serializer render a subset of its fields.
+
+    `expand` names relation fields to render with the nested serializer
+    `Meta.expandable_fields` holds for them instead, and `fields` the fields
+    to keep (all of them when None). `sideload` names relation fields to
+    render as their pk under `<name>_id`, for the related objects to be
+    rendered once each next to the rows (see `get_sideloaded()`).
+    """
+
+    def __init__(self, *args, fields=None, expand=(), sideload=(), **kwargs):
+        super().__init__(*args, **kwargs)
+
+        for name in expand:
+            self.fields[name] = self.Meta.expandable_fields[name](read_only=True)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+        for name in sideload:
+            self.fields.pop(name)
+            self.fields[f"{name}_id"] = serializers.PrimaryKeyRelatedField(
+                source=name, read_only=True
+            )
+
+
+def parse_sparse_fieldset(serializer_class, query_params, sideload=False):
+    """Reads the `fields` and `expand` (and, with `sideload`, `sideload`)
+    query parameters for `serializer_class`.
+
+    All take comma separated names. Returns them as sorted tuples (`fields`
+    None when not given), or raises a `ValidationError` on unknown names.
+    Sideloaded fields are kept even if `fields` leaves them out.
+    """
+
+    errors = {}
+    names = {}
+    expandable = set(getattr(serializer_class.Meta, "expandable_fields", ()))
+    choices = {
+        "expand": expandable,
+        "fields": set(get_readable_fields(serializer_class)),
+    }
+
+    if sideload:
+        choices["sideload"] = expandable
+
+    for param, valid in choices.items():
+        value = query_params.get(param)
+        names[param] = value and {name.strip() for name in value.split(",")} - {""}
+        unknown = sorted((names[param] or set()) - valid)
+
+        if unknown:
+            errors[param] = [f"Unknown field: {name}." for name in unknown]
+
+    expand, sideload = names["expand"] or set(), names.get("sideload") or set()
+
+    if expand & sideload and "sideload" not in errors:
+        errors["sideload"] = [
+            f"Can not both expand and sideload: {name}."
+            for name in sorted(expand & sideload)
+        ]
+
+    if errors:
+        raise ValidationError(errors)
+
+    fields = names["fields"] and tuple(sorted(names["fields"] | sideload))
+
+    return fields or None, tuple(sorted(expand)), tuple(sorted(sideload))
+
+
+@lru_cache(maxsize=None)
+def get_readable_fields(serializer_class) -> tuple:
+    return tuple(
+        name
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+@lru_cache(maxsize=256)
+def get_sparse_values_serializer(serializer_class, fields, expand, sideload=()):
+    """The `ValuesSerializer` of `serializer_class` for a sparse fieldset."""
+
+    return ValuesSerializer(
+        serializer_class, fields=fields, expand=expand, sideload=sideload
+    )
+
+
+@lru_cache(maxsize=None)
+def get_values_serializer(serializer_class):
+    return ValuesSerializer(serializer_class)
+
+
+def get_sideload_key(name) -> str:
+    """The key of the map the objects of the sideloaded field `name` go in."""
+
+    return f"{name}s"
+
+
+def get_sideloaded_pks(data, name) -> list:
+    """The distinct pks in the `<name>_id` of the `data` rows, in order."""
+
+    return list(
+        dict.fromkeys(
+            row[f"{name}_id"] for row in data if row[f"{name}_id"] is not None
+        )
+    )
+
+
+def get_sideloaded(pks, items) -> dict:
+    """Maps the `pks` to the rendered `items`, which render theirs as `id`.
+
+    Follows the order of `pks`, the order the rows refer to them in.
+    """
+
+    items = {str(item["id"]): item for item in items}
+
+    return {str(pk): items[str(pk)] for pk in pks if str(pk) in items}
@@ -0,0 +1,181 @@
+"""Per-request timings, reported in a `Server-Timing` header.
+
+`ServerTimingMiddleware`, the innermost middleware, splits the time a
+request spends under it into exclusive phases:
+
+- resolve: URL resolution, up to the view middleware.
+- auth, permissions: DRF authentication and permission checks, see
+  `utils.mixins.TimedChecksMixin`.
+- db: SQL queries, through an execute wrapper on every connection.
+- serialize: turning instances or `values()` rows into response data,
+  see `utils.serializers.TimedSerializerMixin` and `ValuesSerializer`.
+- view: everything else the view does (parsing, validation, saving).
+- render: rendering a DRF `Response` once the view returned it.
+
+A phase started inside another one pauses it, so the phases add up to the
+total. Every request is then recorded in `utils.metrics`. The body of a
+streaming response is produced after the middleware returned and is not
+accounted for.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from utils.metrics import registry
+
+current_timings = ContextVar("current_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.phases = {}
+        self.stack = ["resolve"]
+        self.queries = 0
+        self.start = self.mark = time.perf_counter()
+        self.total = None
+
+    def charge(self) -> None:
+        now = time.perf_counter()
+        phase = self.stack[-1]
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.mark
+        self.mark = now
+
+    def switch(self, phase: str) -> None:
+        self.charge()
+        self.stack[-1] = phase
+
+    def push(self, phase: str) -> None:
+        self.charge()
+        self.stack.append(phase)
+
+    def pop(self) -> None:
+        self.charge()
+        self.stack.pop()
+
+    def finish(self) -> None:
+        self.charge()
+        self.total = self.mark - self.start
+
+    def get_header(self) -> str:
+        metrics = []
+
+        for phase, seconds in self.phases.items():
+            metric = f"{phase};dur={seconds * 1000:.3f}"
+
+            if phase == "db":
+                metric += f';desc="{self.queries} queries"'
+
+            metrics.append(metric)
+
+        metrics.append(f"total;dur={self.total * 1000:.3f}")
+
+        return ", ".join(metrics)
+
+
+@contextmanager
+def measure(phase: str):
+    timings = current_timings.get()
+
+    if timings is None:
+        yield
+        return
+
+    timings.push(phase)
+
+    try:
+        yield
+    finally:
+        timings.pop()
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    timings.queries += 1
+
+    with measure("db"):
+        return execute(sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs) -> None:
+    # Wrappers stick to the connection object (one per thread and alias),
+    # across reconnections.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+
+        if self.is_async:
+            markcoroutinefunction(self)
+            # Sync hooks would cost async requests a trip to a thread.
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+        connection_created.connect(install_query_recorder)
+
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.finish(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_timings.get().switch("view")
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        current_timings.get().switch("view")
+
+    def process_template_response(self, request, response):
+        current_timings.get().switch("render")
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        current_timings.get().switch("render")
+        return response
+
+    def finish(self, request, response, timings):
+        timings.finish()
+        response["Server-Timing"] = timings.get_header()
+
+        resolver_match = request.resolver_match
+        route = resolver_match.route if resolver_match else None
+        registry.observe(route, request.method, timings)
+
+        return response